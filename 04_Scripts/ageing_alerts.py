@@ -0,0 +1,260 @@
+"""
+ageing_alerts.py - Deal-ageing alerts from a priority queue of close dates
+
+Plan 2.1 asks for automated alerts when Open deals age past their
+CloseDate. Re-running Section 2 over the whole table on every check scans
+all rows. AgeingAlertEngine instead keeps one heap entry per Open deal,
+keyed by the day on which the deal crosses its next ageing threshold
+(default: 0, 31 and 91 days past CloseDate). Advancing the clock pops only
+the entries that became due. Each tick therefore costs O(k log n) for the
+k deals that cross a threshold.
+
+New snapshots are diffed against the tracked deals by (ID, occurrence)
+key, as in incremental.py. Only deals whose Status or CloseDate changed
+get new heap entries. Entries belonging to an older version of a deal are
+dropped lazily when they reach the top of the heap.
+
+Author: Svitlana Kovalivska
+Purpose: Automated deal-ageing alerts for pipeline hygiene (Plan 2.1)
+"""
+
+import heapq
+from bisect import bisect_right
+from dataclasses import dataclass
+
+import numpy as np
+
+from close_date_index import AGEING_THRESHOLDS, day_to_date, to_day
+from date_index import MISSING_DAY
+from incremental import ChangeSummary, match_keys, sorted_keys
+
+# Days past CloseDate at which an Open deal raises an alert: the Section 2 ageing bucket edges
+DEFAULT_THRESHOLDS = AGEING_THRESHOLDS
+
+
+@dataclass(slots=True)
+class AgeingAlert:
+    """One Open deal crossing an ageing threshold"""
+    id: str
+    occurrence: int
+    threshold: int
+    days_overdue: int
+    close_date: str
+    acv: float
+    as_of: str
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class AgeingAlertEngine:
+    """
+    Open deals in a heap keyed by the day of their next ageing threshold
+
+    Tracked deals are stored as arrays sorted by (ID, occurrence). The heap
+    holds (due day, version, ID, occurrence); an entry is stale once the
+    deal's version changes.
+
+    Args:
+        thresholds (tuple): Ascending days past CloseDate that raise an alert
+        open_status (str): Status of the deals to watch
+    """
+
+    def __init__(self, thresholds=DEFAULT_THRESHOLDS, open_status='Open'):
+        self.thresholds = tuple(sorted(thresholds))
+        self.open_status = open_status
+        self.clock = None
+        self.ids = np.array([], dtype=str)
+        self.occurrence = np.array([], dtype=np.int32)
+        self.is_open = np.array([], dtype=bool)
+        self.close_day = np.array([], dtype=np.int32)
+        self.acv = np.array([], dtype=np.float64)
+        self.version = np.array([], dtype=np.int64)
+        self.next_level = np.array([], dtype=np.int8)
+        self._heap = []
+        self._next_version = 0
+
+    # -- snapshots ---------------------------------------------------------
+
+    def _snapshot(self, table):
+        order, ids, occurrence = sorted_keys(table.ids)
+        return (ids, occurrence, (table.statuses == self.open_status)[order],
+                table.close_days[order], np.asarray(table.acvs, dtype=np.float64)[order])
+
+    def _levels_at(self, close_day, day):
+        """Number of thresholds already crossed on `day` (vectorized)"""
+        age = day - close_day.astype(np.int64)
+        return np.searchsorted(np.array(self.thresholds), age, side='right').astype(np.int8)
+
+    @classmethod
+    def build(cls, table, thresholds=DEFAULT_THRESHOLDS, clock=None, open_status='Open'):
+        """
+        Track every Open deal of `table`
+
+        Args:
+            clock: Start date. Thresholds crossed before it count as already
+                   notified; without it the first tick reports the backlog.
+        """
+        engine = cls(thresholds, open_status)
+        (engine.ids, engine.occurrence, engine.is_open,
+         engine.close_day, engine.acv) = engine._snapshot(table)
+        engine.version = np.arange(len(engine.ids), dtype=np.int64)
+        engine._next_version = len(engine.ids)
+        if clock is None:
+            engine.next_level = np.zeros(len(engine.ids), dtype=np.int8)
+        else:
+            engine.clock = to_day(clock)
+            engine.next_level = engine._levels_at(engine.close_day, engine.clock)
+        engine._rebuild_heap()
+        return engine
+
+    def _rebuild_heap(self):
+        """Heap of one entry per watched deal (O(n) heapify); drops stale entries"""
+        rows = np.flatnonzero(self.is_open & (self.close_day != MISSING_DAY)
+                              & (self.next_level < len(self.thresholds)))
+        due = self.close_day[rows].astype(np.int64) + np.array(self.thresholds)[self.next_level[rows]]
+        self._heap = list(zip(due.tolist(), self.version[rows].tolist(),
+                              self.ids[rows].tolist(), self.occurrence[rows].tolist()))
+        heapq.heapify(self._heap)
+
+    def _push(self, row):
+        level = self.next_level[row]
+        if self.is_open[row] and self.close_day[row] != MISSING_DAY and level < len(self.thresholds):
+            heapq.heappush(self._heap, (int(self.close_day[row]) + self.thresholds[level],
+                                        int(self.version[row]), str(self.ids[row]),
+                                        int(self.occurrence[row])))
+
+    def apply_snapshot(self, table):
+        """
+        Bring the tracked deals up to date with a new snapshot
+
+        Deals whose Status or CloseDate changed (and new deals) get a new
+        version and a heap entry for their first threshold not yet reached
+        on the current clock; ACV-only changes are updated in place.
+
+        Returns: ChangeSummary
+        """
+        ids, occurrence, is_open, close_day, acv = self._snapshot(table)
+        found, old_index = match_keys(self.ids, ids, occurrence)
+
+        changed = np.zeros(len(ids), dtype=bool)
+        changed[found] = ((self.is_open[old_index] != is_open[found])
+                          | (self.close_day[old_index] != close_day[found]))
+        added = ~found
+        fresh = changed | added
+        removed = len(self.ids) - int(found.sum())
+
+        version = np.empty(len(ids), dtype=np.int64)
+        next_level = np.empty(len(ids), dtype=np.int8)
+        version[found] = self.version[old_index]
+        next_level[found] = self.next_level[old_index]
+        version[fresh] = np.arange(self._next_version, self._next_version + int(fresh.sum()))
+        self._next_version += int(fresh.sum())
+        # A re-dated or reopened deal alerts again for the thresholds it
+        # crosses from now on, starting with the highest one already passed
+        if self.clock is None:
+            next_level[fresh] = 0
+        else:
+            next_level[fresh] = np.maximum(self._levels_at(close_day[fresh], self.clock) - 1, 0)
+
+        self.ids, self.occurrence, self.is_open, self.close_day, self.acv = ids, occurrence, is_open, close_day, acv
+        self.version, self.next_level = version, next_level
+
+        if len(self._heap) > 2 * int(is_open.sum()) + 1024:
+            self._rebuild_heap()
+        else:
+            for row in np.flatnonzero(fresh):
+                self._push(row)
+
+        return ChangeSummary(added=int(added.sum()), removed=removed, changed=int(changed.sum()),
+                             unchanged=int(found.sum() - changed.sum()))
+
+    # -- clock ---------------------------------------------------------------
+
+    def _row_of(self, opportunity_id, occurrence):
+        position = int(np.searchsorted(self.ids, opportunity_id)) + occurrence
+        if position < len(self.ids) and self.ids[position] == opportunity_id:
+            return position
+        return None
+
+    def tick(self, as_of):
+        """
+        Advance the clock to `as_of` and return the alerts that became due
+
+        Each due deal raises one alert for the highest threshold it has
+        crossed and is re-queued for its next threshold.
+
+        Returns: list of AgeingAlert, most overdue first
+        """
+        day = to_day(as_of)
+        as_of_text = str(day_to_date(day))
+        alerts = []
+        heap = self._heap
+        while heap and heap[0][0] <= day:
+            _, version, opportunity_id, occurrence = heapq.heappop(heap)
+            row = self._row_of(opportunity_id, occurrence)
+            if row is None or self.version[row] != version or not self.is_open[row]:
+                continue                                    # stale entry
+            close = int(self.close_day[row])
+            level = bisect_right(self.thresholds, day - close)
+            if level <= self.next_level[row]:
+                continue
+            alerts.append(AgeingAlert(
+                id=opportunity_id, occurrence=occurrence, threshold=self.thresholds[level - 1],
+                days_overdue=day - close, close_date=str(day_to_date(close)),
+                acv=float(self.acv[row]), as_of=as_of_text))
+            self.next_level[row] = level
+            self._push(row)
+        self.clock = day if self.clock is None else max(self.clock, day)
+        alerts.sort(key=lambda alert: -alert.days_overdue)
+        return alerts
+
+    def next_alert_date(self):
+        """Date of the earliest queued threshold crossing (None if nothing is queued)"""
+        while self._heap:
+            _, version, opportunity_id, occurrence = self._heap[0]
+            row = self._row_of(opportunity_id, occurrence)
+            if row is not None and self.version[row] == version and self.is_open[row]:
+                return day_to_date(self._heap[0][0])
+            heapq.heappop(self._heap)
+        return None
+
+    @property
+    def open_deals(self):
+        """Number of Open deals being watched"""
+        return int(self.is_open.sum())
+
+    def __len__(self):
+        return len(self._heap)
+
+
+if __name__ == "__main__":
+    """
+    Replay daily alert ticks: python ageing_alerts.py --start 2026-01-01 --days 30
+    """
+    import argparse
+    from datetime import date, timedelta
+
+    from dataset_session import get_dataset
+
+    parser = argparse.ArgumentParser(description="Daily deal-ageing alerts")
+    parser.add_argument('--start', default=date.today().isoformat(), help="first day (YYYY-MM-DD)")
+    parser.add_argument('--days', type=int, default=7, help="number of daily ticks")
+    parser.add_argument('--backlog', action='store_true', help="also report thresholds crossed before --start")
+    args = parser.parse_args()
+
+    start = date.fromisoformat(args.start)
+    engine = AgeingAlertEngine.build(get_dataset().table,
+                                     clock=None if args.backlog else start - timedelta(days=1))
+    print(f"🔔 DEAL-AGEING ALERTS ({engine.open_deals} open deals watched, thresholds {engine.thresholds} days)")
+    print("=" * 60)
+    for offset in range(args.days):
+        day = start + timedelta(days=offset)
+        alerts = engine.tick(day)
+        if alerts:
+            by_threshold = {}
+            for alert in alerts:
+                by_threshold[alert.threshold] = by_threshold.get(alert.threshold, 0) + 1
+            crossings = ", ".join(f"{count} at {threshold}+ days" for threshold, count in sorted(by_threshold.items()))
+            print(f"{day}: {len(alerts)} alerts ({crossings}), ${sum(a.acv for a in alerts):,.0f} ACV")
+    print(f"\n⏭️  Next alert: {engine.next_alert_date()}")
@@ -0,0 +1,256 @@
+"""
+analysis_engine.py - Vectorized calculations behind test.py Sections 2-5
+
+This module holds the business logic of the analysis script as whole-column
+NumPy operations. Each function takes the arrays extracted in Section 1
+(ids, statuses, acvs, closedates, startdates) and returns exactly the values
+test.py reports, without per-row loops or per-element date conversion.
+
+Author: Svitlana Kovalivska
+Purpose: Keep the analysis fast enough for full CRM exports (millions of rows)
+"""
+
+import numpy as np
+
+from date_index import DateColumnIndex, as_datetime64
+
+
+def date_years(dates):
+    """
+    Calendar year of every date (0 where the date is missing)
+
+    `dates` may be any array of dates or a precomputed DateColumnIndex,
+    in which case its year column is returned without any conversion.
+    """
+    if isinstance(dates, DateColumnIndex):
+        return dates.year
+    dates = as_datetime64(dates)
+    years = dates.astype('datetime64[Y]').astype(np.int64) + 1970
+    return np.where(np.isnat(dates), 0, years)
+
+
+def date_months(dates):
+    """Calendar month (1-12) of every date (0 where the date is missing)"""
+    if isinstance(dates, DateColumnIndex):
+        return dates.month
+    dates = as_datetime64(dates)
+    months = dates.astype('datetime64[M]').astype(np.int64) % 12 + 1
+    return np.where(np.isnat(dates), 0, months)
+
+
+def _select(values, mask):
+    """values[mask] for NumPy arrays and compact table columns alike"""
+    if not hasattr(values, 'shape'):
+        values = np.asarray(values)
+    return values[mask]
+
+
+def _status_mask(statuses, status):
+    """Boolean mask of rows whose status equals `status`"""
+    return np.asarray(statuses == status, dtype=bool)
+
+
+def find_overdue_open_deals(ids, statuses, closedates, year=2025):
+    """
+    Section 2: IDs of deals still Open although their CloseDate is in `year`
+
+    Returns: numpy array of IDs in dataset order
+    """
+    mask = _status_mask(statuses, 'Open') & (date_years(closedates) == year)
+    return _select(ids, mask)
+
+
+def won_acv_by_start_year(statuses, acvs, startdates, year=2026):
+    """
+    Section 3: total ACV of Won deals whose StartDate is in `year`
+
+    Returns: ACV total with the dtype of `acvs` (integer ACVs stay integer)
+    """
+    mask = _status_mask(statuses, 'Won') & (date_years(startdates) == year)
+    return np.asarray(acvs)[mask].sum()
+
+
+def expected_acv_for_month(statuses, acvs, startdates, year=2026, month=3,
+                           open_probability=0.25):
+    """
+    Section 4: probability-weighted expected ACV for one start month
+
+    Won deals count at 100% of their ACV, Open deals at `open_probability`.
+
+    Returns: (total_expected_acv, won_count, open_count)
+    """
+    acvs = np.asarray(acvs)
+    month_mask = (date_years(startdates) == year) & (date_months(startdates) == month)
+    won_mask = month_mask & _status_mask(statuses, 'Won')
+    open_mask = month_mask & _status_mask(statuses, 'Open')
+
+    won_count = int(won_mask.sum())
+    open_count = int(open_mask.sum())
+
+    total_expected = acvs[won_mask].sum()
+    if open_count:
+        total_expected = total_expected + (acvs[open_mask] * open_probability).sum()
+    return total_expected, won_count, open_count
+
+
+def monthly_win_rates(statuses, closedates, year=2025):
+    """
+    Section 5: won/total closed deal counts per CloseDate month of `year`
+
+    Only Won and Lost deals are counted. Months appear in the order they
+    are first encountered in the data, matching the row-by-row build of
+    test.py, so tie-breaking between equal win rates is unchanged.
+
+    Returns: dict {month: {'won': count, 'total': count}}
+    """
+    won = _status_mask(statuses, 'Won')
+    closed = won | _status_mask(statuses, 'Lost')
+    mask = closed & (date_years(closedates) == year)
+
+    months = date_months(closedates)[mask]
+    won = won[mask]
+
+    totals = np.bincount(months, minlength=13)
+    wins = np.bincount(months[won], minlength=13)
+
+    present, first_seen = np.unique(months, return_index=True)
+    ordered = present[np.argsort(first_seen)]
+    return {int(m): {'won': int(wins[m]), 'total': int(totals[m])} for m in ordered}
+
+
+# ---------------------------------------------------------------------------
+# Mergeable accumulators
+# ---------------------------------------------------------------------------
+# Each accumulator consumes the dataset chunk by chunk (a dict of column
+# arrays plus its DateIndex) and can be merged with an accumulator that saw
+# a later part of the data. Memory therefore depends on the chunk size and
+# the size of the result, never on the size of the file.
+
+class ExtractionAccumulator:
+    """Section 1: number of entries seen per column"""
+
+    def __init__(self, columns):
+        self.columns = list(columns)
+        self.counts = dict.fromkeys(self.columns, 0)
+
+    def update(self, chunk, dates=None):
+        for column in self.columns:
+            if column in chunk:
+                self.counts[column] += len(chunk[column])
+        return self
+
+    def merge(self, other):
+        for column, count in other.counts.items():
+            self.counts[column] = self.counts.get(column, 0) + count
+        return self
+
+    def result(self):
+        return dict(self.counts)
+
+
+class OverdueAccumulator:
+    """Section 2: IDs of Open deals with CloseDate in `year`"""
+
+    def __init__(self, year=2025):
+        self.year = year
+        self.parts = []
+
+    def update(self, chunk, dates):
+        self.parts.append(find_overdue_open_deals(chunk['ID'], chunk['Status'], dates.close, self.year))
+        return self
+
+    def merge(self, other):
+        self.parts.extend(other.parts)
+        return self
+
+    def result(self):
+        return np.concatenate(self.parts) if self.parts else np.array([], dtype=object)
+
+
+class WonAcvAccumulator:
+    """Section 3: ACV total and deal count of Won deals starting in `year`"""
+
+    def __init__(self, year=2026):
+        self.year = year
+        self.total = 0
+        self.count = 0
+
+    def update(self, chunk, dates):
+        mask = _status_mask(chunk['Status'], 'Won') & (date_years(dates.start) == self.year)
+        self.total = self.total + np.asarray(chunk['ACV'])[mask].sum()
+        self.count += int(mask.sum())
+        return self
+
+    def merge(self, other):
+        self.total = self.total + other.total
+        self.count += other.count
+        return self
+
+    def result(self):
+        return self.total
+
+
+class MonthForecastAccumulator:
+    """Section 4: Won and Open ACV sums for one start month"""
+
+    def __init__(self, year=2026, month=3, open_probability=0.25):
+        self.year = year
+        self.month = month
+        self.open_probability = open_probability
+        self.won_acv = 0
+        self.open_acv = 0
+        self.won_count = 0
+        self.open_count = 0
+
+    def update(self, chunk, dates):
+        acvs = np.asarray(chunk['ACV'])
+        month_mask = (date_years(dates.start) == self.year) & (date_months(dates.start) == self.month)
+        won_mask = month_mask & _status_mask(chunk['Status'], 'Won')
+        open_mask = month_mask & _status_mask(chunk['Status'], 'Open')
+        self.won_acv = self.won_acv + acvs[won_mask].sum()
+        self.open_acv = self.open_acv + acvs[open_mask].sum()
+        self.won_count += int(won_mask.sum())
+        self.open_count += int(open_mask.sum())
+        return self
+
+    def merge(self, other):
+        self.won_acv = self.won_acv + other.won_acv
+        self.open_acv = self.open_acv + other.open_acv
+        self.won_count += other.won_count
+        self.open_count += other.open_count
+        return self
+
+    def result(self):
+        """Returns: (total_expected_acv, won_count, open_count) as expected_acv_for_month()"""
+        total_expected = self.won_acv
+        if self.open_count:
+            total_expected = total_expected + self.open_acv * self.open_probability
+        return total_expected, self.won_count, self.open_count
+
+
+class WinRateAccumulator:
+    """Section 5: per-month won/total counts of closed deals in `year`"""
+
+    def __init__(self, year=2025):
+        self.year = year
+        self.won = np.zeros(13, dtype=np.int64)
+        self.total = np.zeros(13, dtype=np.int64)
+        self.order = []
+
+    def update(self, chunk, dates):
+        return self._add(monthly_win_rates(chunk['Status'], dates.close, self.year))
+
+    def _add(self, monthly):
+        for month, counts in monthly.items():
+            if not self.total[month]:
+                self.order.append(month)
+            self.won[month] += counts['won']
+            self.total[month] += counts['total']
+        return self
+
+    def merge(self, other):
+        return self._add(other.result())
+
+    def result(self):
+        """Returns: dict {month: {'won', 'total'}} as monthly_win_rates()"""
+        return {m: {'won': int(self.won[m]), 'total': int(self.total[m])} for m in self.order}
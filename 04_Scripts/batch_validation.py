@@ -0,0 +1,262 @@
+"""
+batch_validation.py - Validate many opportunity workbooks on a process pool
+
+Regional and weekly CRM exports arrive as hundreds of files shaped like
+opportunities.xlsx. This module expands a directory or glob pattern into
+workbooks and runs DataValidator.run_comprehensive_validation() on each in
+a separate worker process. Every worker loads its file through a private
+dataset session (using the file's columnar snapshot when it is fresh) and
+returns one summary row, so only a few scalars cross process boundaries.
+Snapshots are kept under one cache root owned by the batch run
+(--cache-root, default 02_Data_Analysis/.cache/batch) rather than in the
+export directories, and a snapshot that cannot be written only costs speed.
+
+Rows are yielded as files finish and can be streamed straight to a CSV or
+JSON-lines table. A file that cannot be read or validated produces a row
+with status 'error' instead of stopping the batch.
+
+Usage: python batch_validation.py EXPORTS_DIR_OR_GLOB [--workers N] [--output batch.csv]
+
+Author: Svitlana Kovalivska
+Purpose: Validate every regional/weekly export in one run
+"""
+
+import csv
+import glob
+import json
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+WORKBOOK_EXTENSIONS = ('.xlsx', '.xlsm')
+DEFAULT_CACHE_ROOT = os.path.normpath(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), os.pardir, '02_Data_Analysis', '.cache', 'batch'))
+
+# Columns of the consolidated table, in output order
+SUMMARY_COLUMNS = (
+    'file', 'status', 'passed', 'records', 'failed_sections',
+    'overdue_deals', 'won_acv_2026', 'won_deals_2026', 'march_2026_expected_acv',
+    'win_rate_2025', 'closed_deals_2025', 'seconds', 'error',
+)
+
+
+def find_workbooks(pattern):
+    """
+    Expand a directory, a glob pattern or a single file into workbook paths
+
+    Directories are searched recursively; Excel lock files (~$...) are skipped.
+
+    Returns: sorted list of absolute paths
+    """
+    if os.path.isdir(pattern):
+        candidates = glob.glob(os.path.join(pattern, '**', '*'), recursive=True)
+    else:
+        candidates = glob.glob(pattern, recursive=True)
+    return sorted(
+        os.path.abspath(path) for path in candidates
+        if os.path.isfile(path)
+        and path.lower().endswith(WORKBOOK_EXTENSIONS)
+        and not os.path.basename(path).startswith('~$')
+    )
+
+
+def summarize_results(path, results, seconds):
+    """Condense run_comprehensive_validation() output into one summary row"""
+    row = dict.fromkeys(SUMMARY_COLUMNS)
+    row.update(file=path, seconds=seconds)
+    if 'error' in results:
+        row.update(status='error', passed=False, error=results['error'])
+        return row
+
+    failed = [key for key, result in results.items() if not result.passed]
+    integrity = results['data_integrity']
+    overdue, won, forecast, win_rate = (results[key] for key in ('section2', 'section3', 'section4', 'section5'))
+    row.update(
+        status='ok',
+        passed=not failed,
+        records=integrity.total_records,
+        failed_sections=';'.join(failed),
+        overdue_deals=overdue.expected_count,
+        won_acv_2026=float(won.expected_acv),
+        won_deals_2026=won.deal_count,
+        march_2026_expected_acv=float(forecast.total_expected),
+        win_rate_2025=float(win_rate.overall_win_rate),
+        closed_deals_2025=win_rate.total_deals,
+    )
+    return row
+
+
+def validate_file(path, cache_root=DEFAULT_CACHE_ROOT):
+    """
+    Validate one workbook (runs inside a worker process)
+
+    The workbook's snapshot is read from / written to `cache_root`.
+    Never raises: failures are returned as a row with status 'error'.
+    """
+    from compact_table import load_table
+    from data_cache import cache_dir_for
+    from dataset_session import DatasetSession
+    from validation import DataValidator
+
+    start = time.perf_counter()
+    try:
+        session = DatasetSession(
+            loader=lambda excel_file: load_table(excel_file, cache_dir_for(excel_file, cache_root)))
+        validator = DataValidator(path, session=session, quiet=True)
+        results = validator.run_comprehensive_validation()
+        return summarize_results(path, results, time.perf_counter() - start)
+    except Exception as e:
+        row = dict.fromkeys(SUMMARY_COLUMNS)
+        row.update(file=path, status='error', passed=False, seconds=time.perf_counter() - start,
+                   error=f"{type(e).__name__}: {e}", failed_sections='load')
+        row['traceback'] = traceback.format_exc()
+        return row
+
+
+def iter_batch(paths, max_workers=None, cache_root=DEFAULT_CACHE_ROOT):
+    """
+    Validate `paths` on a process pool, yielding summary rows as files finish
+
+    Args:
+        paths (list): Workbook paths
+        max_workers (int): Worker processes (default: CPU count); 1 runs in-process
+        cache_root (str): Directory holding the workbooks' snapshots
+    """
+    paths = list(paths)
+    workers = min(max_workers or os.cpu_count() or 1, max(len(paths), 1))
+    if workers <= 1:
+        for path in paths:
+            yield validate_file(path, cache_root)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(validate_file, path, cache_root): path for path in paths}
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                # The worker process itself died (e.g. out of memory)
+                row = dict.fromkeys(SUMMARY_COLUMNS)
+                row.update(file=futures[future], status='error', passed=False,
+                           error=f"{type(e).__name__}: {e}")
+                yield row
+
+
+class BatchWriter:
+    """
+    Append summary rows to a CSV or JSON-lines file as they arrive
+
+    The format follows the extension: .csv, otherwise JSON lines.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._csv = path.lower().endswith('.csv')
+        self._handle = open(path, 'w', newline='' if self._csv else None)
+        if self._csv:
+            self._writer = csv.DictWriter(self._handle, SUMMARY_COLUMNS, extrasaction='ignore')
+            self._writer.writeheader()
+
+    def write(self, row):
+        if self._csv:
+            self._writer.writerow(row)
+        else:
+            self._handle.write(json.dumps({key: row.get(key) for key in SUMMARY_COLUMNS}) + '\n')
+        self._handle.flush()
+
+    def close(self):
+        self._handle.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+
+def run_batch(pattern, max_workers=None, output=None, on_row=None, cache_root=DEFAULT_CACHE_ROOT):
+    """
+    Validate every workbook matching `pattern`
+
+    Args:
+        pattern (str): Directory, glob pattern or single workbook
+        max_workers (int): Worker processes (default: CPU count)
+        output (str): Optional .csv / .jsonl file written row by row
+        on_row (callable): Called with each summary row as it arrives
+        cache_root (str): Directory holding the workbooks' snapshots
+
+    Returns: (rows sorted by file, wall seconds)
+    """
+    paths = find_workbooks(pattern)
+    rows = []
+    start = time.perf_counter()
+    writer = BatchWriter(output) if output else None
+    try:
+        for row in iter_batch(paths, max_workers, cache_root):
+            rows.append(row)
+            if writer:
+                writer.write(row)
+            if on_row:
+                on_row(row)
+    finally:
+        if writer:
+            writer.close()
+    rows.sort(key=lambda row: row['file'])
+    return rows, time.perf_counter() - start
+
+
+def to_frame(rows):
+    """Consolidated pandas DataFrame of the summary rows"""
+    import pandas as pd
+
+    return pd.DataFrame([{key: row.get(key) for key in SUMMARY_COLUMNS} for row in rows],
+                        columns=list(SUMMARY_COLUMNS))
+
+
+def print_row(row):
+    name = os.path.basename(row['file'])
+    if row['status'] == 'error':
+        print(f"❌ {name}: {row['error']}")
+    else:
+        status = "✅" if row['passed'] else "⚠️ "
+        print(f"{status} {name}: {row['records']} records, {row['overdue_deals']} overdue, "
+              f"won ACV 2026 ${row['won_acv_2026']:,.0f}, win rate {row['win_rate_2025']:.1f}% "
+              f"({row['seconds']:.2f}s)")
+
+
+def print_summary(rows, wall_time):
+    errors = sum(row['status'] == 'error' for row in rows)
+    failed = sum(row['status'] == 'ok' and not row['passed'] for row in rows)
+    busy_time = sum(row['seconds'] or 0 for row in rows)
+    print("\n" + "=" * 60)
+    print("BATCH VALIDATION SUMMARY")
+    print("=" * 60)
+    print(f"📁 Workbooks: {len(rows)} ({len(rows) - errors - failed} passed, {failed} failed, {errors} errors)")
+    print(f"📊 Records: {sum(row['records'] or 0 for row in rows):,}")
+    print(f"⏱️  Wall time: {wall_time:.2f}s (files: {busy_time:.2f}s, "
+          f"{busy_time / wall_time if wall_time > 0 else 1.0:.2f}x)")
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    parser = argparse.ArgumentParser(description="Validate every workbook in a directory or glob")
+    parser.add_argument('pattern', help="directory, glob pattern (quote it) or workbook")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--output', help="consolidated table (.csv or .jsonl), written as files finish")
+    parser.add_argument('--cache-root', default=DEFAULT_CACHE_ROOT,
+                        help="directory for the workbooks' columnar snapshots (default: %(default)s)")
+    parser.add_argument('--quiet', action='store_true', help="print nothing")
+    args = parser.parse_args()
+
+    rows, wall_time = run_batch(args.pattern, args.workers, args.output,
+                                on_row=None if args.quiet else print_row, cache_root=args.cache_root)
+    if not args.quiet:
+        if not rows:
+            print(f"⚠️  No workbooks match {args.pattern}")
+        else:
+            print_summary(rows, wall_time)
+    sys.exit(0 if rows and all(row['status'] == 'ok' and row['passed'] for row in rows) else 1)
@@ -0,0 +1,256 @@
+"""
+benchmark.py - Performance benchmarks on synthetic opportunity data
+
+Times loading, data integrity, Sections 1-5 and the full
+run_comprehensive_validation() on seeded synthetic datasets
+(synthetic_data.py) of 10k rows up to 10M rows. Each size runs in its own
+subprocess so its peak RSS is measured in isolation. Every run is appended
+to a JSON history (default: 02_Data_Analysis/.cache/benchmark_history.json,
+kept out of git). The runner exits with status 1 when a gated stage
+(load, Sections 1-5, comprehensive) is slower than the median of the recent
+comparable runs by more than the threshold; data generation and the data
+integrity check are reported but never gated.
+
+Usage:
+    python benchmark.py                         # 10k, 100k, 1M rows
+    python benchmark.py --sizes 10k,10M --repeat 5
+    python benchmark.py --threshold 0.10 --no-record
+
+Author: Svitlana Kovalivska
+Purpose: Catch performance regressions in the analysis and validation paths
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+# Kept in the gitignored cache folder: timings are per machine, not project outputs
+DEFAULT_HISTORY = os.path.normpath(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), os.pardir, '02_Data_Analysis', '.cache', 'benchmark_history.json'))
+DEFAULT_THRESHOLD = 0.25
+# Best-of-N per stage; a single repetition is too noisy to gate on
+DEFAULT_REPEAT = 3
+# Stages checked for regressions ('generate' and 'data_integrity' are informational)
+GATED_STAGES = ('load', 'section1', 'section2', 'section3', 'section4', 'section5', 'comprehensive')
+# Stages faster than this are dominated by timer noise and never flagged
+MIN_SECONDS = 0.005
+BASELINE_RUNS = 5
+
+
+def parse_size(text):
+    """'10k' -> 10000, '1M' -> 1000000, '2500' -> 2500"""
+    text = text.strip().lower().replace('_', '')
+    factor = {'k': 1_000, 'm': 1_000_000}.get(text[-1:], 1)
+    return int(float(text[:-1] if factor > 1 else text) * factor)
+
+
+def _peak_rss_mb():
+    """Peak resident set size of this process so far, in MB"""
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def machine_info():
+    """Identifies comparable runs: timings are only compared on the same machine"""
+    import numpy as np
+
+    return {
+        'host': platform.node(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'cpus': os.cpu_count(),
+    }
+
+
+def run_size(n_rows, seed=42, repeat=1):
+    """
+    Benchmark one dataset size in the current process
+
+    Loading and validation stages are repeated `repeat` times on fresh
+    datasets and the fastest time is kept.
+
+    Returns: {stage: {'seconds', 'rows_per_sec', 'peak_rss_mb'}}
+    """
+    from compact_table import OpportunityTable
+    from data_cache import load_columns
+    from dataset_session import DatasetSession
+    from synthetic_data import write_snapshot
+    from validation import DataValidator, VALIDATION_SECTIONS
+
+    stages = {}
+
+    def record(stage, seconds):
+        best = min(seconds, stages.get(stage, {}).get('seconds', seconds))
+        stages[stage] = {
+            'seconds': best,
+            'rows_per_sec': n_rows / best if best > 0 else None,
+            'peak_rss_mb': _peak_rss_mb(),
+        }
+
+    with tempfile.TemporaryDirectory(prefix='revops_bench_') as cache_dir:
+        start = time.perf_counter()
+        write_snapshot(n_rows, cache_dir, seed)
+        record('generate', time.perf_counter() - start)
+
+        for _ in range(repeat):
+            start = time.perf_counter()
+            table = OpportunityTable.from_columns(load_columns(cache_dir))
+            table.dates
+            record('load', time.perf_counter() - start)
+
+            session = DatasetSession(loader=lambda path: table)
+            validator = DataValidator(cache_dir, session=session, quiet=True)
+            for key, method in VALIDATION_SECTIONS:
+                start = time.perf_counter()
+                getattr(validator, method)()
+                record(key, time.perf_counter() - start)
+
+            # Fresh dataset so memoized cubes from the sections above are not reused
+            session = DatasetSession(loader=lambda path: table)
+            validator = DataValidator(cache_dir, session=session, quiet=True)
+            start = time.perf_counter()
+            validator.run_comprehensive_validation()
+            record('comprehensive', time.perf_counter() - start)
+
+    return stages
+
+
+def run_isolated(n_rows, seed=42, repeat=1):
+    """Run run_size() in a subprocess so peak RSS covers this size only"""
+    command = [sys.executable, os.path.abspath(__file__), '--worker',
+               '--sizes', str(n_rows), '--seed', str(seed), '--repeat', str(repeat)]
+    completed = subprocess.run(command, capture_output=True, text=True,
+                               cwd=os.path.dirname(os.path.abspath(__file__)))
+    if completed.returncode != 0:
+        raise RuntimeError(f"Benchmark worker for {n_rows:,} rows failed:\n{completed.stderr}")
+    return json.loads(completed.stdout)
+
+
+def load_history(path):
+    try:
+        with open(path) as handle:
+            return json.load(handle)
+    except FileNotFoundError:
+        return []
+
+
+def save_history(path, history):
+    """Write the history atomically"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as handle:
+        json.dump(history, handle, indent=2)
+    os.replace(tmp_path, path)
+
+
+def find_regressions(run, history, threshold=DEFAULT_THRESHOLD, min_seconds=MIN_SECONDS,
+                     baseline_runs=BASELINE_RUNS, gated_stages=GATED_STAGES):
+    """
+    Compare the `gated_stages` of a run with the median of the last
+    `baseline_runs` comparable runs
+
+    Runs are comparable when machine, seed and repeat count match. The
+    median (not the minimum) keeps one unusually fast run from turning
+    normal timer noise into a regression.
+
+    Returns: list of dicts (rows, stage, seconds, baseline, slowdown)
+    """
+    comparable = [past for past in history
+                  if past['machine'] == run['machine'] and past['seed'] == run['seed']
+                  and past['repeat'] == run['repeat']][-baseline_runs:]
+    regressions = []
+    for size, stages in run['results'].items():
+        for stage, measured in stages.items():
+            if stage not in gated_stages:
+                continue
+            previous = [past['results'][size][stage]['seconds'] for past in comparable
+                        if stage in past['results'].get(size, {})]
+            if not previous:
+                continue
+            baseline = statistics.median(previous)
+            if baseline < min_seconds:
+                continue
+            slowdown = measured['seconds'] / baseline - 1
+            if slowdown > threshold:
+                regressions.append({'rows': int(size), 'stage': stage, 'seconds': measured['seconds'],
+                                    'baseline': baseline, 'slowdown': slowdown})
+    return regressions
+
+
+def print_results(results):
+    print(f"{'Rows':>12} {'Stage':<16} {'Seconds':>10} {'Rows/sec':>14} {'Peak RSS MB':>12}")
+    print("-" * 68)
+    for size, stages in results.items():
+        for stage, measured in stages.items():
+            rate = measured['rows_per_sec']
+            print(f"{int(size):>12,} {stage:<16} {measured['seconds']:>10.4f} "
+                  f"{(f'{rate:,.0f}' if rate else '-'):>14} {measured['peak_rss_mb']:>12.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the analysis and validation paths")
+    parser.add_argument('--sizes', default=','.join(str(size) for size in DEFAULT_SIZES),
+                        help="Comma-separated row counts, e.g. 10k,100k,1M,10M")
+    parser.add_argument('--seed', type=int, default=42, help="Synthetic data seed")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+                        help="Repetitions per stage (best time kept, default %(default)s)")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed slowdown vs. baseline as a fraction (default 0.25 = 25%%)")
+    parser.add_argument('--history', default=DEFAULT_HISTORY, help="JSON history file")
+    parser.add_argument('--no-record', action='store_true', help="Do not append this run to the history")
+    parser.add_argument('--in-process', action='store_true',
+                        help="Run all sizes in this process (peak RSS is then cumulative)")
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    sizes = [parse_size(size) for size in args.sizes.split(',') if size.strip()]
+    if args.worker:
+        json.dump(run_size(sizes[0], args.seed, args.repeat), sys.stdout)
+        return 0
+
+    print("⏱️  REVOPS BENCHMARK")
+    print("=" * 68)
+    results = {}
+    for n_rows in sizes:
+        print(f"🔄 {n_rows:,} rows...", flush=True)
+        runner = run_size if args.in_process else run_isolated
+        results[str(n_rows)] = runner(n_rows, args.seed, args.repeat)
+    print()
+    print_results(results)
+
+    run = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'machine': machine_info(),
+        'seed': args.seed,
+        'repeat': args.repeat,
+        'results': results,
+    }
+    history = load_history(args.history)
+    regressions = find_regressions(run, history, args.threshold)
+    if not args.no_record:
+        save_history(args.history, history + [run])
+        print(f"\n💾 Run appended to {args.history}")
+
+    if regressions:
+        print(f"\n❌ PERFORMANCE REGRESSIONS (threshold {args.threshold:.0%}):")
+        for item in regressions:
+            print(f"   {item['rows']:>12,} rows  {item['stage']:<16} {item['seconds']:.4f}s "
+                  f"vs {item['baseline']:.4f}s ({item['slowdown']:+.0%})")
+        return 1
+    print("\n✅ No regressions against the recorded baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
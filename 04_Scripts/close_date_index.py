@@ -0,0 +1,205 @@
+"""
+close_date_index.py - Sorted CloseDate index of Open deals for hygiene queries
+
+Pipeline hygiene questions ("which Open deals are overdue as of D by more
+than N days?", "how much open pipeline expired?") only concern Open deals
+and a CloseDate range. OpenDealIndex keeps the CloseDate day numbers of the
+Open deals sorted once per load, together with their row positions and a
+prefix sum of their ACV. Each range query is then a binary search:
+O(log n) for counts and ACV totals, O(log n + k) to list the k matching
+deals. Ageing buckets (0-30 / 31-90 / 91+ days past CloseDate) come from
+one vectorized search over the bucket edges; the same edges are the
+ageing_alerts thresholds, so an alert and its bucket always agree.
+
+Every query takes an explicit as-of date, so results are reproducible
+instead of depending on when the script runs.
+
+Author: Svitlana Kovalivska
+Purpose: Reproducible overdue/ageing analysis for pipeline hygiene (Plan 2.1)
+"""
+
+from datetime import date, datetime
+
+import numpy as np
+
+# Days past CloseDate at which each ageing bucket (and deal-ageing alert) starts
+AGEING_THRESHOLDS = (0, 31, 91)
+# (label, minimum days past CloseDate); each bucket ends where the next begins
+DEFAULT_AGEING_BUCKETS = tuple(zip(('0-30', '31-90', '91+'), AGEING_THRESHOLDS))
+
+
+def to_day(value):
+    """Epoch day number of a date, datetime, numpy datetime64 or 'YYYY-MM-DD' string"""
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, datetime):
+        value = value.date()
+    if isinstance(value, date):
+        value = value.isoformat()
+    return int(np.datetime64(value, 'D').astype(np.int64))
+
+
+def day_to_date(day):
+    """numpy datetime64[D] of an epoch day number"""
+    return np.datetime64(int(day), 'D')
+
+
+def today_day():
+    return to_day(date.today())
+
+
+class OpenDealIndex:
+    """
+    Open deals sorted by CloseDate
+
+    Attributes:
+        days (int32 array): CloseDate epoch days, ascending
+        rows (int array): Table row of each entry (ties keep table order)
+        acv_prefix (float array): Cumulative ACV with a leading zero
+    """
+
+    __slots__ = ('days', 'rows', 'acv_prefix')
+
+    def __init__(self, days, rows, acv_prefix):
+        self.days = days
+        self.rows = rows
+        self.acv_prefix = acv_prefix
+
+    @classmethod
+    def build(cls, table, status='Open'):
+        """Index the deals of `status` that have a CloseDate (one stable sort)"""
+        close = table.dates.close
+        rows = np.flatnonzero((table.statuses == status) & close.valid)
+        order = np.argsort(close.day[rows], kind='stable')
+        rows = rows[order]
+        acvs = np.nan_to_num(np.asarray(table.acvs, dtype=np.float64)[rows])
+        prefix = np.concatenate([[0.0], np.cumsum(acvs)])
+        return cls(close.day[rows], rows, prefix)
+
+    def __len__(self):
+        return len(self.days)
+
+    # -- range queries -----------------------------------------------------
+
+    def span(self, start=None, end=None):
+        """
+        Positions [lo, hi) of the deals with start <= CloseDate <= end
+
+        Bounds are inclusive dates (or None for open-ended); two binary searches.
+        """
+        lo = 0 if start is None else int(np.searchsorted(self.days, to_day(start), side='left'))
+        hi = len(self.days) if end is None else int(np.searchsorted(self.days, to_day(end), side='right'))
+        return lo, max(lo, hi)
+
+    def rows_between(self, start=None, end=None):
+        """Table rows of the deals closing in [start, end], in CloseDate order"""
+        lo, hi = self.span(start, end)
+        return self.rows[lo:hi]
+
+    def count_between(self, start=None, end=None):
+        lo, hi = self.span(start, end)
+        return hi - lo
+
+    def acv_between(self, start=None, end=None):
+        lo, hi = self.span(start, end)
+        return float(self.acv_prefix[hi] - self.acv_prefix[lo])
+
+    # -- overdue queries ---------------------------------------------------
+
+    def overdue_cutoff(self, as_of, min_days=0):
+        """Latest CloseDate day that is at least `min_days` days before `as_of`"""
+        return to_day(as_of) - min_days
+
+    def overdue_rows(self, as_of, min_days=0, since=None):
+        """
+        Table rows of deals at least `min_days` days past their CloseDate on `as_of`
+
+        A deal whose CloseDate is `as_of` itself is 0 days overdue. "Overdue by
+        more than N days" is min_days=N + 1. `since` optionally limits the
+        result to CloseDates on or after that date.
+        """
+        return self.rows_between(since, self.overdue_cutoff(as_of, min_days))
+
+    def overdue_count(self, as_of, min_days=0, since=None):
+        return self.count_between(since, self.overdue_cutoff(as_of, min_days))
+
+    def overdue_acv(self, as_of, min_days=0, since=None):
+        return self.acv_between(since, self.overdue_cutoff(as_of, min_days))
+
+    def days_overdue(self, as_of, rows=None):
+        """Days past CloseDate on `as_of` for every indexed deal (or the given positions)"""
+        days = self.days if rows is None else self.days[rows]
+        return to_day(as_of) - days.astype(np.int64)
+
+    def ageing_buckets(self, as_of, buckets=DEFAULT_AGEING_BUCKETS):
+        """
+        Count and ACV of overdue deals per ageing bucket on `as_of`
+
+        All bucket boundaries are located with one vectorized binary search.
+
+        Returns: dict {label: {'count', 'acv'}} in bucket order
+        """
+        as_of = to_day(as_of)
+        # A bucket starting at m days covers CloseDates <= as_of - m; its
+        # upper end is the start of the next (older) bucket
+        upper = np.searchsorted(self.days, [as_of - m for _, m in buckets], side='right')
+        lower = np.append(upper[1:], 0)
+        return {
+            label: {'count': int(hi - lo), 'acv': float(self.acv_prefix[hi] - self.acv_prefix[lo])}
+            for (label, _), lo, hi in zip(buckets, lower, upper)
+        }
+
+    def hygiene_summary(self, as_of):
+        """Share of open pipeline (deals and ACV) whose CloseDate has passed on `as_of`"""
+        total_count = len(self.days)
+        total_acv = float(self.acv_prefix[-1])
+        count = self.overdue_count(as_of)
+        acv = self.overdue_acv(as_of)
+        return {
+            'as_of': str(day_to_date(to_day(as_of))),
+            'open_deals': total_count,
+            'open_acv': total_acv,
+            'overdue_deals': count,
+            'overdue_acv': acv,
+            'overdue_share': count / total_count if total_count else 0.0,
+            'overdue_acv_share': acv / total_acv if total_acv else 0.0,
+        }
+
+
+def get_open_deal_index(dataset):
+    """CloseDate index of a dataset's Open deals, built once per load"""
+    return dataset.derived('open_deal_index', OpenDealIndex.build)
+
+
+if __name__ == "__main__":
+    """
+    Print the pipeline hygiene report: python close_date_index.py [--as-of YYYY-MM-DD] [--min-days N]
+    """
+    import argparse
+
+    from dataset_session import get_dataset
+
+    parser = argparse.ArgumentParser(description="Overdue open pipeline as of a date")
+    parser.add_argument('--as-of', default=date.today().isoformat(), help="reference date (default: today)")
+    parser.add_argument('--min-days', type=int, default=0, help="list deals at least N days overdue")
+    parser.add_argument('--limit', type=int, default=10, help="number of deals to list")
+    args = parser.parse_args()
+
+    dataset = get_dataset()
+    index = get_open_deal_index(dataset)
+    summary = index.hygiene_summary(args.as_of)
+
+    print(f"🧹 PIPELINE HYGIENE AS OF {summary['as_of']}")
+    print("=" * 60)
+    print(f"📊 Open deals: {summary['open_deals']} (${summary['open_acv']:,.0f})")
+    print(f"⚠️  Past CloseDate: {summary['overdue_deals']} ({summary['overdue_share']:.0%} of deals, "
+          f"{summary['overdue_acv_share']:.0%} of ACV)")
+    print("\n⏳ AGEING (days past CloseDate)")
+    for label, bucket in index.ageing_buckets(args.as_of).items():
+        print(f"{label:>6} days: {bucket['count']:>6} deals  ${bucket['acv']:>14,.0f}")
+
+    rows = index.overdue_rows(args.as_of, args.min_days)
+    print(f"\n📋 {len(rows)} deals at least {args.min_days} days overdue (oldest first):")
+    ids = dataset.table.ids[rows[:args.limit]]
+    for opportunity_id, days in zip(ids, index.days_overdue(args.as_of, slice(0, args.limit))):
+        print(f"   {opportunity_id}: {days} days")
@@ -0,0 +1,347 @@
+"""
+compact_table.py - Memory-compact in-memory opportunity table
+
+A pandas DataFrame keeps IDs, products, customers and statuses as Python
+string objects and dates as 8-byte datetime64 values. OpportunityTable
+stores the seven expected columns compactly instead:
+
+- ID: fixed-width ASCII bytes (decoded to str on selection)
+- ProductName, CustomerName, Status: dictionary-encoded (int8/16/32 codes)
+- ACV: int32/int64 when all values are whole numbers, otherwise float64
+  (float32 would make every ACV total accumulate in single precision)
+- CloseDate, StartDate: int32 days since 1970-01-01
+
+Equality filters such as `table.statuses == 'Won'` compare small integer
+codes instead of strings. The validator and analysis sections work on the
+table directly; a DataFrame is only decoded when explicitly requested.
+
+Author: Svitlana Kovalivska
+Purpose: Cut resident memory of large opportunity datasets
+"""
+
+import numpy as np
+
+from date_index import MISSING_DAY, DateIndex, DateColumnIndex, as_datetime64
+from tracing import stage
+
+EXPECTED_COLUMNS = ['ID', 'ProductName', 'CustomerName', 'ACV', 'Status', 'CloseDate', 'StartDate']
+
+
+def _null_mask(values):
+    """True where an object array holds None/NaN"""
+    return np.fromiter((v is None or v != v for v in values), dtype=bool, count=len(values))
+
+
+def _smallest_code_dtype(cardinality):
+    for dtype in (np.int8, np.int16, np.int32):
+        if cardinality < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+class EncodedColumn:
+    """
+    Dictionary-encoded text column
+
+    Attributes:
+        codes (int array): Position in `categories`, -1 for missing values
+        categories (object array): Distinct values
+    """
+
+    __slots__ = ('codes', 'categories', '_lookup')
+
+    def __init__(self, codes, categories):
+        self.codes = codes
+        self.categories = categories
+        self._lookup = {value: code for code, value in enumerate(categories)}
+
+    @classmethod
+    def encode(cls, values):
+        """Encode an array-like of strings (None/NaN become missing)"""
+        if isinstance(values, EncodedColumn):
+            return values
+        values = np.asarray(values, dtype=object)
+        nulls = _null_mask(values)
+        categories, inverse = np.unique(values[~nulls].astype(str), return_inverse=True)
+        codes = np.full(len(values), -1, dtype=_smallest_code_dtype(len(categories)))
+        codes[~nulls] = inverse
+        return cls(codes, categories.astype(object))
+
+    def code_of(self, value):
+        """Code of `value`, or None if it does not occur"""
+        return self._lookup.get(value)
+
+    def __len__(self):
+        return len(self.codes)
+
+    @property
+    def shape(self):
+        return self.codes.shape
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes + sum(len(str(c)) for c in self.categories)
+
+    def __eq__(self, value):
+        code = self.code_of(value)
+        if code is None:
+            return np.zeros(len(self.codes), dtype=bool)
+        return self.codes == code
+
+    def __ne__(self, value):
+        return ~self.__eq__(value)
+
+    __hash__ = None
+
+    def isin(self, values):
+        """Boolean mask of rows whose value is in `values`"""
+        codes = [c for c in (self.code_of(v) for v in values) if c is not None]
+        return np.isin(self.codes, codes)
+
+    def isnull(self):
+        return self.codes < 0
+
+    def unique(self):
+        """Distinct non-missing values in order of first appearance"""
+        present, first_seen = np.unique(self.codes[self.codes >= 0], return_index=True)
+        return list(self.categories[present[np.argsort(first_seen)]])
+
+    def decode(self, selection=slice(None)):
+        """Decode (a selection of) the column to an object array of str/None"""
+        codes = self.codes[selection]
+        decoded = self.categories[np.maximum(codes, 0)] if len(self.categories) else \
+            np.full(len(codes), None, dtype=object)
+        decoded[codes < 0] = None
+        return decoded
+
+    def __getitem__(self, selection):
+        if np.isscalar(selection):
+            code = self.codes[selection]
+            return None if code < 0 else self.categories[code]
+        return self.decode(selection)
+
+    def __array__(self, dtype=None, copy=None):
+        return self.decode() if dtype is None else self.decode().astype(dtype)
+
+
+class TextColumn:
+    """
+    Fixed-width text column for high-cardinality values such as IDs
+
+    ASCII values are stored as bytes (1 byte per character); anything else
+    falls back to NumPy unicode. Selections decode back to Python str.
+    """
+
+    __slots__ = ('values', 'nulls')
+
+    def __init__(self, values, nulls=None):
+        self.values = values
+        self.nulls = nulls
+
+    @classmethod
+    def encode(cls, values):
+        if isinstance(values, TextColumn):
+            return values
+        values = np.asarray(values, dtype=object)
+        nulls = _null_mask(values)
+        text = np.where(nulls, '', values).astype(str)
+        try:
+            stored = np.char.encode(text, 'ascii')
+        except UnicodeEncodeError:
+            stored = text
+        return cls(stored, nulls if nulls.any() else None)
+
+    def __len__(self):
+        return len(self.values)
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes + (self.nulls.nbytes if self.nulls is not None else 0)
+
+    def isnull(self):
+        return self.nulls.copy() if self.nulls is not None else np.zeros(len(self.values), dtype=bool)
+
+    def decode(self, selection=slice(None)):
+        values = self.values[selection]
+        if values.dtype.kind == 'S':
+            values = np.char.decode(values, 'ascii')
+        decoded = values.astype(object)
+        if self.nulls is not None:
+            decoded[self.nulls[selection]] = None
+        return decoded
+
+    def __getitem__(self, selection):
+        if np.isscalar(selection):
+            return self.decode(slice(selection, selection + 1))[0]
+        return self.decode(selection)
+
+    def __eq__(self, value):
+        if not isinstance(value, str):
+            # Numbers, None, ...: no stored text equals them (as EncodedColumn with unknown values)
+            return np.zeros(len(self.values), dtype=bool)
+        if self.values.dtype.kind == 'S':
+            try:
+                value = value.encode('ascii')
+            except UnicodeEncodeError:
+                return np.zeros(len(self.values), dtype=bool)
+        return self.values == value
+
+    __hash__ = None
+
+    def __array__(self, dtype=None, copy=None):
+        return self.decode() if dtype is None else self.decode().astype(dtype)
+
+
+def _compact_acv(values):
+    """Smallest exact numeric representation of the ACV column"""
+    values = np.asarray(values)
+    if values.dtype.kind in 'iu':
+        if len(values) == 0 or (values.min() >= np.iinfo(np.int32).min and values.max() <= np.iinfo(np.int32).max):
+            return values.astype(np.int32)
+        return values.astype(np.int64)
+    return values.astype(np.float64)
+
+
+def _to_days(dates):
+    dates = as_datetime64(dates)
+    return np.where(np.isnat(dates), MISSING_DAY,
+                    dates.astype('datetime64[D]').astype(np.int64)).astype(np.int32)
+
+
+class OpportunityTable:
+    """
+    Compact columnar table of the seven expected opportunity columns
+
+    Supports `name in table` and `table[name]`, so code written against a
+    DataFrame or a dict of column arrays can run on it unchanged. Missing
+    columns are simply absent. Time of day is not kept for dates.
+    """
+
+    __slots__ = ('ids', 'products', 'customers', 'acvs', 'statuses',
+                 'close_days', 'start_days', 'acv_dtype', '_dates')
+
+    def __init__(self, ids=None, products=None, customers=None, acvs=None, statuses=None,
+                 close_days=None, start_days=None, acv_dtype=None):
+        self.ids = ids
+        self.products = products
+        self.customers = customers
+        self.acvs = acvs
+        self.statuses = statuses
+        self.close_days = close_days
+        self.start_days = start_days
+        self.acv_dtype = acv_dtype
+        self._dates = None
+
+    _FIELDS = {
+        'ID': 'ids', 'ProductName': 'products', 'CustomerName': 'customers',
+        'ACV': 'acvs', 'Status': 'statuses', 'CloseDate': 'close_days', 'StartDate': 'start_days',
+    }
+
+    @classmethod
+    def from_columns(cls, columns):
+        """Build the table from a DataFrame or dict {column name: array-like}"""
+        def get(name):
+            return columns[name] if name in columns else None
+
+        def encoded(name, encoder):
+            values = get(name)
+            return None if values is None else encoder(values)
+
+        acvs = get('ACV')
+        with stage('encode_table') as span:
+            table = cls(
+                ids=encoded('ID', TextColumn.encode),
+                products=encoded('ProductName', EncodedColumn.encode),
+                customers=encoded('CustomerName', EncodedColumn.encode),
+                acvs=None if acvs is None else _compact_acv(acvs),
+                statuses=encoded('Status', EncodedColumn.encode),
+                close_days=encoded('CloseDate', _to_days),
+                start_days=encoded('StartDate', _to_days),
+                acv_dtype=None if acvs is None else str(np.asarray(acvs).dtype),
+            )
+            span.rows = len(table)
+        return table
+
+    from_frame = from_columns
+
+    @property
+    def columns(self):
+        """Names of the columns present, in the expected order"""
+        return [name for name, attr in self._FIELDS.items() if getattr(self, attr) is not None]
+
+    def __contains__(self, name):
+        attr = self._FIELDS.get(name)
+        return attr is not None and getattr(self, attr) is not None
+
+    def __getitem__(self, name):
+        """Column by workbook name; dates are returned as datetime64[D]"""
+        if name not in self:
+            raise KeyError(name)
+        values = getattr(self, self._FIELDS[name])
+        if name in ('CloseDate', 'StartDate'):
+            return self.dates_for(name).to_datetime64()
+        return values
+
+    def __len__(self):
+        for name in self.columns:
+            return len(getattr(self, self._FIELDS[name]))
+        return 0
+
+    @property
+    def dates(self):
+        """DateIndex built straight from the int32 day columns"""
+        if self._dates is None:
+            def build(days):
+                return None if days is None else DateColumnIndex.from_days(days)
+            with stage('date_index', rows=len(self)):
+                self._dates = DateIndex(build(self.close_days), build(self.start_days))
+        return self._dates
+
+    def dates_for(self, name):
+        return self.dates.close if name == 'CloseDate' else self.dates.start
+
+    def isnull(self, name):
+        """Boolean missing-value mask of one column"""
+        values = getattr(self, self._FIELDS[name])
+        if isinstance(values, (EncodedColumn, TextColumn)):
+            return values.isnull()
+        if name in ('CloseDate', 'StartDate'):
+            return values == MISSING_DAY
+        return np.isnan(values) if values.dtype.kind == 'f' else np.zeros(len(values), dtype=bool)
+
+    @property
+    def nbytes(self):
+        """Approximate resident size of the table in bytes"""
+        return sum(getattr(self, self._FIELDS[name]).nbytes for name in self.columns)
+
+    def to_frame(self):
+        """Decode into a pandas DataFrame with the workbook's dtypes"""
+        import pandas as pd
+
+        data = {}
+        for name in self.columns:
+            values = getattr(self, self._FIELDS[name])
+            if isinstance(values, (EncodedColumn, TextColumn)):
+                values = values.decode()
+            elif name in ('CloseDate', 'StartDate'):
+                values = self.dates_for(name).to_datetime64().astype('datetime64[us]')
+            elif name == 'ACV' and self.acv_dtype:
+                values = values.astype(self.acv_dtype)
+            data[name] = pd.Series(values)
+        return pd.DataFrame(data)
+
+
+def load_table(excel_file=None, cache_dir=None):
+    """
+    Load the workbook as an OpportunityTable via the columnar snapshot
+
+    No DataFrame is created; pandas is only needed to (re)build the snapshot.
+    """
+    from data_cache import DEFAULT_EXCEL_FILE, load_opportunity_columns
+
+    return OpportunityTable.from_columns(
+        load_opportunity_columns(excel_file or DEFAULT_EXCEL_FILE, cache_dir))
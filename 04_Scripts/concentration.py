@@ -0,0 +1,390 @@
+"""
+concentration.py - Revenue concentration metrics (Pareto / Lorenz / Gini)
+
+The Power Law analysis (Plan 3.3, lorenz_curve.png, acv_distribution.png)
+sorts every ACV value in a notebook. This module computes the same
+numbers: Gini coefficient, top-N% revenue share, Lorenz curve points and
+ACV percentiles. There are two ways to get them:
+
+- exact: one sort of the compact table's ACV column (per-product
+  breakdowns use one lexsort by product and ACV)
+- approximate: ACVSketch, a mergeable log-bucketed sketch (in the style of
+  DDSketch). It keeps the count and ACV total per bucket, so percentiles
+  are within `relative_accuracy` of the true value and revenue totals stay
+  exact. Memory depends on the ACV range, not on the number of deals.
+  Exports are streamed chunk by chunk. Regional export files are sketched
+  in parallel on a process pool and merged.
+
+Both produce a ConcentrationProfile: ACV values in ascending groups with
+their deal counts and ACV totals. All metrics are computed on that
+profile.
+
+Author: Svitlana Kovalivska
+Purpose: Repeatable revenue-concentration analysis (Plan 3.3)
+"""
+
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+DEFAULT_TOP_SHARES = (0.01, 0.05, 0.20)
+DEFAULT_PERCENTILES = (10, 25, 50, 75, 90, 95, 99)
+DEFAULT_RELATIVE_ACCURACY = 0.005
+
+
+class ConcentrationProfile:
+    """
+    ACV distribution as ascending value groups
+
+    Attributes:
+        values (float array): Ascending ACV of each group (bucket mean for sketches)
+        counts (int array): Deals per group
+        sums (float array): ACV total per group
+        exact (bool): False when built from a sketch
+    """
+
+    __slots__ = ('values', 'counts', 'sums', 'exact', '_cum_counts', '_cum_sums')
+
+    def __init__(self, values, counts, sums, exact=True):
+        self.values = np.asarray(values, dtype=np.float64)
+        self.counts = np.asarray(counts, dtype=np.int64)
+        self.sums = np.asarray(sums, dtype=np.float64)
+        self.exact = exact
+        self._cum_counts = np.cumsum(self.counts)
+        self._cum_sums = np.cumsum(self.sums)
+
+    @classmethod
+    def from_sorted(cls, sorted_values):
+        """Group ascending ACV values into (value, count, total) runs"""
+        sorted_values = np.asarray(sorted_values, dtype=np.float64)
+        if not len(sorted_values):
+            return cls([], [], [])
+        starts = np.concatenate([[0], np.flatnonzero(np.diff(sorted_values)) + 1])
+        counts = np.diff(np.append(starts, len(sorted_values)))
+        values = sorted_values[starts]
+        return cls(values, counts, values * counts)
+
+    @classmethod
+    def from_values(cls, acvs):
+        """Exact profile of an ACV array (one sort; NaN values are skipped)"""
+        acvs = np.asarray(acvs, dtype=np.float64)
+        return cls.from_sorted(np.sort(acvs[~np.isnan(acvs)]))
+
+    @property
+    def n(self):
+        return int(self._cum_counts[-1]) if len(self.counts) else 0
+
+    @property
+    def total(self):
+        return float(self._cum_sums[-1]) if len(self.sums) else 0.0
+
+    def _curve(self):
+        """Lorenz vertices: cumulative deal share and ACV share after each group"""
+        n, total = self.n, self.total
+        x = np.concatenate([[0.0], self._cum_counts / n])
+        y = np.concatenate([[0.0], self._cum_sums / total]) if total else x
+        return x, y
+
+    def lorenz(self, deal_shares):
+        """Share of ACV held by the smallest `deal_shares` of deals"""
+        if not self.n:
+            return np.zeros_like(np.asarray(deal_shares, dtype=np.float64))
+        x, y = self._curve()
+        return np.interp(deal_shares, x, y)
+
+    def lorenz_points(self, points=101):
+        """(deal share, ACV share) arrays on an even grid, as plotted in lorenz_curve.png"""
+        grid = np.linspace(0.0, 1.0, points)
+        return grid, self.lorenz(grid)
+
+    def gini(self):
+        """Gini coefficient: 1 - 2 x area under the Lorenz curve"""
+        if not self.n or not self.total:
+            return 0.0
+        x, y = self._curve()
+        return float(1.0 - np.sum(np.diff(x) * (y[1:] + y[:-1])))
+
+    def top_share(self, fraction):
+        """Share of ACV contributed by the largest `fraction` of deals"""
+        if not self.n:
+            return 0.0
+        return float(1.0 - self.lorenz(1.0 - fraction))
+
+    def _value_at_rank(self, ranks):
+        groups = np.searchsorted(self._cum_counts, np.asarray(ranks) + 1, side='left')
+        return self.values[np.minimum(groups, len(self.values) - 1)]
+
+    def percentiles(self, percentiles=DEFAULT_PERCENTILES):
+        """
+        ACV percentiles {p: value}
+
+        Same linear interpolation as np.percentile in exact mode; bucket
+        means (within the sketch's relative accuracy) otherwise.
+        """
+        if not self.n:
+            return {p: float('nan') for p in percentiles}
+        position = (self.n - 1) * np.asarray(percentiles, dtype=np.float64) / 100
+        below = np.floor(position).astype(np.int64)
+        low = self._value_at_rank(below)
+        high = self._value_at_rank(np.minimum(below + 1, self.n - 1))
+        values = low + (position - below) * (high - low)
+        return {p: float(v) for p, v in zip(percentiles, values)}
+
+    def summary(self, top_shares=DEFAULT_TOP_SHARES, percentiles=DEFAULT_PERCENTILES):
+        """Headline concentration metrics as a flat dict"""
+        return {
+            'deals': self.n,
+            'total_acv': self.total,
+            'mean_acv': self.total / self.n if self.n else float('nan'),
+            'gini': self.gini(),
+            'top_shares': {f"top_{fraction:.0%}": self.top_share(fraction) for fraction in top_shares},
+            'percentiles': {f"p{p}": value for p, value in self.percentiles(percentiles).items()},
+            'exact': self.exact,
+        }
+
+
+def concentration_profile(table, rows=None):
+    """Exact concentration profile of a table's ACV (or of the selected rows)"""
+    acvs = np.asarray(table.acvs, dtype=np.float64)
+    return ConcentrationProfile.from_values(acvs if rows is None else acvs[rows])
+
+
+def concentration_by(table, column='products'):
+    """
+    Exact profile per value of an encoded column (products, customers, statuses)
+
+    One lexsort by (code, ACV) orders every group at once; each group's
+    profile is a slice of the result.
+
+    Returns: dict {value: ConcentrationProfile}
+    """
+    encoded = getattr(table, column)
+    acvs = np.asarray(table.acvs, dtype=np.float64)
+    keep = (encoded.codes >= 0) & ~np.isnan(acvs)
+    codes = encoded.codes[keep].astype(np.int64)
+    acvs = acvs[keep]
+    order = np.lexsort((acvs, codes))
+    codes, acvs = codes[order], acvs[order]
+    bounds = np.searchsorted(codes, np.arange(len(encoded.categories) + 1))
+    return {str(name): ConcentrationProfile.from_sorted(acvs[bounds[code]:bounds[code + 1]])
+            for code, name in enumerate(encoded.categories) if bounds[code + 1] > bounds[code]}
+
+
+def get_concentration(dataset):
+    """Exact concentration profile of a dataset's ACV, built once per load"""
+    return dataset.derived('concentration', concentration_profile)
+
+
+class ACVSketch:
+    """
+    Mergeable log-bucketed ACV sketch
+
+    A positive value v falls into bucket ceil(log(v) / log(gamma)) with
+    gamma = (1 + a) / (1 - a), so every value in a bucket lies within a
+    relative error `a` of the bucket mean. Counts and ACV totals are kept
+    per bucket in dense arrays covering only the buckets seen. Values <= 0
+    share one extra bucket.
+    """
+
+    def __init__(self, relative_accuracy=DEFAULT_RELATIVE_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        self.log_gamma = math.log((1 + relative_accuracy) / (1 - relative_accuracy))
+        self.offset = 0
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.sums = np.zeros(0, dtype=np.float64)
+        self.zero_count = 0
+        self.zero_sum = 0.0
+
+    @property
+    def count(self):
+        return int(self.counts.sum()) + self.zero_count
+
+    @property
+    def total(self):
+        return float(self.sums.sum()) + self.zero_sum
+
+    def bucket_of(self, values):
+        return np.ceil(np.log(values) / self.log_gamma).astype(np.int64)
+
+    def _extend(self, low, high):
+        """Grow the dense bucket arrays to cover bucket indexes [low, high]"""
+        if not len(self.counts):
+            self.offset = low
+            self.counts = np.zeros(high - low + 1, dtype=np.int64)
+            self.sums = np.zeros(high - low + 1, dtype=np.float64)
+            return
+        new_offset = min(self.offset, low)
+        new_size = max(self.offset + len(self.counts), high + 1) - new_offset
+        if new_offset == self.offset and new_size == len(self.counts):
+            return
+        shift = self.offset - new_offset
+        counts = np.zeros(new_size, dtype=np.int64)
+        sums = np.zeros(new_size, dtype=np.float64)
+        counts[shift:shift + len(self.counts)] = self.counts
+        sums[shift:shift + len(self.sums)] = self.sums
+        self.offset, self.counts, self.sums = new_offset, counts, sums
+
+    def _add_buckets(self, buckets, values):
+        if not len(buckets):
+            return
+        self._extend(int(buckets.min()), int(buckets.max()))
+        positions = buckets - self.offset
+        self.counts += np.bincount(positions, minlength=len(self.counts))
+        self.sums += np.bincount(positions, weights=values, minlength=len(self.sums))
+
+    def update(self, values):
+        """Add a chunk of ACV values (NaN values are skipped)"""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        positive = values > 0
+        self.zero_count += int((~positive).sum())
+        self.zero_sum += float(values[~positive].sum())
+        self._add_buckets(self.bucket_of(values[positive]), values[positive])
+        return self
+
+    def merge(self, other):
+        if other.log_gamma != self.log_gamma:
+            raise ValueError("Cannot merge sketches with different relative accuracy")
+        self.zero_count += other.zero_count
+        self.zero_sum += other.zero_sum
+        if len(other.counts):
+            self._extend(other.offset, other.offset + len(other.counts) - 1)
+            start = other.offset - self.offset
+            self.counts[start:start + len(other.counts)] += other.counts
+            self.sums[start:start + len(other.sums)] += other.sums
+        return self
+
+    def profile(self):
+        """Approximate ConcentrationProfile (bucket means as values)"""
+        used = np.flatnonzero(self.counts)
+        counts = self.counts[used]
+        sums = self.sums[used]
+        values = sums / counts
+        if self.zero_count:
+            counts = np.concatenate([[self.zero_count], counts])
+            sums = np.concatenate([[self.zero_sum], sums])
+            values = np.concatenate([[self.zero_sum / self.zero_count], values])
+        return ConcentrationProfile(values, counts, sums, exact=False)
+
+
+class GroupedACVSketch:
+    """
+    Overall ACVSketch plus one sketch per value of a grouping column
+
+    Consumes streaming.py chunks (dicts of column arrays).
+    """
+
+    def __init__(self, column='ProductName', relative_accuracy=DEFAULT_RELATIVE_ACCURACY):
+        self.column = column
+        self.relative_accuracy = relative_accuracy
+        self.overall = ACVSketch(relative_accuracy)
+        self.groups = {}
+
+    def update(self, chunk):
+        values = np.asarray(chunk['ACV'], dtype=np.float64)
+        self.overall.update(values)
+        if self.column in chunk:
+            labels = np.asarray(chunk[self.column], dtype=object)
+            present = np.array([label is not None and label == label for label in labels], dtype=bool)
+            names, inverse = np.unique(labels[present].astype(str), return_inverse=True)
+            values = values[present]
+            for position, name in enumerate(names):
+                sketch = self.groups.setdefault(name, ACVSketch(self.relative_accuracy))
+                sketch.update(values[inverse == position])
+        return self
+
+    def merge(self, other):
+        self.overall.merge(other.overall)
+        for name, sketch in other.groups.items():
+            if name in self.groups:
+                self.groups[name].merge(sketch)
+            else:
+                self.groups[name] = sketch
+        return self
+
+    def profiles(self):
+        """(overall profile, {group: profile})"""
+        return self.overall.profile(), {name: self.groups[name].profile() for name in sorted(self.groups)}
+
+
+def sketch_export(path, column='ProductName', chunk_size=None, relative_accuracy=DEFAULT_RELATIVE_ACCURACY):
+    """Stream one export (xlsx or CSV) into a GroupedACVSketch"""
+    from streaming import DEFAULT_CHUNK_SIZE, iter_chunks
+
+    sketch = GroupedACVSketch(column, relative_accuracy)
+    for chunk in iter_chunks(path, chunk_size or DEFAULT_CHUNK_SIZE, columns=['ACV', column]):
+        sketch.update(chunk)
+    return sketch
+
+
+def sketch_exports(paths, column='ProductName', max_workers=None, chunk_size=None,
+                   relative_accuracy=DEFAULT_RELATIVE_ACCURACY):
+    """
+    Sketch several exports (e.g. one per region) in parallel and merge them
+
+    Each file is streamed in its own worker process; only the small
+    sketches cross process boundaries.
+
+    Returns: (merged GroupedACVSketch, {path: GroupedACVSketch})
+    """
+    paths = list(paths)
+    workers = min(max_workers or os.cpu_count() or 1, max(len(paths), 1))
+    per_file = {}
+    if workers <= 1:
+        for path in paths:
+            per_file[path] = sketch_export(path, column, chunk_size, relative_accuracy)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(sketch_export, path, column, chunk_size, relative_accuracy): path
+                       for path in paths}
+            for future in as_completed(futures):
+                per_file[futures[future]] = future.result()
+
+    merged = GroupedACVSketch(column, relative_accuracy)
+    for path in paths:
+        merged.merge(per_file[path])
+    return merged, {path: per_file[path] for path in paths}
+
+
+def print_summary(title, profile):
+    summary = profile.summary()
+    mode = "exact" if profile.exact else "sketch"
+    print(f"{title} ({mode}): {summary['deals']} deals, ${summary['total_acv']:,.0f} ACV, "
+          f"Gini {summary['gini']:.3f}")
+    print("   " + "  ".join(f"{name.replace('_', ' ')}: {share:.1%}" for name, share in summary['top_shares'].items()))
+    print("   " + "  ".join(f"{name}: ${value:,.0f}" for name, value in summary['percentiles'].items()))
+
+
+if __name__ == "__main__":
+    """
+    Concentration of the default workbook, or of several exports in streaming mode:
+    python concentration.py [--stream EXPORT ...] [--by ProductName] [--workers N]
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Revenue concentration: Gini, top-N% share, percentiles")
+    parser.add_argument('--stream', nargs='+', metavar='EXPORT',
+                        help="sketch these exports (xlsx/CSV, e.g. one per region) in parallel")
+    parser.add_argument('--by', default='ProductName', help="breakdown column in --stream mode")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes for --stream")
+    args = parser.parse_args()
+
+    print("📐 REVENUE CONCENTRATION")
+    print("=" * 70)
+    if args.stream:
+        merged, per_file = sketch_exports(args.stream, args.by, args.workers)
+        overall, groups = merged.profiles()
+        print_summary("All exports", overall)
+        for path, sketch in per_file.items():
+            print_summary(os.path.basename(path), sketch.overall.profile())
+    else:
+        from dataset_session import get_dataset
+
+        dataset = get_dataset()
+        print_summary("All deals", get_concentration(dataset))
+        groups = concentration_by(dataset.table, 'products')
+    print()
+    for name, profile in groups.items():
+        print_summary(name, profile)
@@ -0,0 +1,350 @@
+"""
+customer_tiers.py - Customer tiering (Strategic / Core / Volume) at scale
+
+Plan 2.3 tiers customers with K-Means in a notebook, re-aggregating every
+customer from scratch each time. This module:
+
+- builds one feature vector per customer (deal count, total and average
+  ACV, won/closed counts) from CustomerName / ACV / Status in a single
+  grouped pass over the dictionary codes of the compact table
+- clusters the standardized (log average ACV, log total ACV) vectors with
+  a NumPy mini-batch K-Means; win rates are reported per tier but do not
+  drive the split, so tiers stay ordered by deal value. Each step samples a fixed-size
+  batch and labels are assigned in chunks, so memory does not depend on
+  the number of customers.
+- names the clusters by average ACV: Tier 1 Strategic, Tier 2 Core,
+  Tier 3 Volume
+- persists the assignment with the centroids. A new snapshot only
+  reassigns customers whose aggregates changed, plus new customers, to
+  the nearest stored centroid; refit=True retrains.
+
+Author: Svitlana Kovalivska
+Purpose: Repeatable customer tiers for resource allocation (Plan 2.3)
+"""
+
+import os
+
+import numpy as np
+
+from incremental import ChangeSummary
+
+# Tier names from lowest to highest average ACV (as in the segmentation notebook)
+TIER_LABELS = ('Tier 3: Volume', 'Tier 2: Core', 'Tier 1: Strategic')
+TIERS_FORMAT_VERSION = 1
+TIERS_FILE_NAME = 'customer_tiers.npz'
+ASSIGN_CHUNK = 65_536
+
+
+def default_tiers_path(excel_file):
+    """Tier state stored alongside the workbook's columnar snapshot"""
+    from data_cache import cache_dir_for
+    return os.path.join(cache_dir_for(excel_file), TIERS_FILE_NAME)
+
+
+class CustomerFeatures:
+    """
+    Per-customer aggregates, customers sorted by name
+
+    Attributes:
+        names (str array): Customer names (sorted)
+        deals (int array): Opportunities per customer
+        total_acv (float array): ACV over all opportunities
+        won, closed (int arrays): Won and Won+Lost deal counts
+    """
+
+    __slots__ = ('names', 'deals', 'total_acv', 'won', 'closed')
+
+    def __init__(self, names, deals, total_acv, won, closed):
+        self.names = names
+        self.deals = deals
+        self.total_acv = total_acv
+        self.won = won
+        self.closed = closed
+
+    @classmethod
+    def build(cls, table):
+        """Aggregate every customer in one grouped pass (rows without a customer are skipped)"""
+        customers = table.customers
+        codes = customers.codes.astype(np.int64)
+        has_customer = codes >= 0
+        codes = codes[has_customer]
+        n = len(customers.categories)
+        acvs = np.nan_to_num(np.asarray(table.acvs, dtype=np.float64)[has_customer])
+        won = (table.statuses == 'Won')[has_customer]
+        closed = won | (table.statuses == 'Lost')[has_customer]
+
+        names = np.asarray(customers.categories, dtype=str)
+        order = np.argsort(names, kind='stable')
+        return cls(names[order],
+                   np.bincount(codes, minlength=n)[order],
+                   np.bincount(codes, weights=acvs, minlength=n)[order],
+                   np.bincount(codes[won], minlength=n)[order],
+                   np.bincount(codes[closed], minlength=n)[order])
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def avg_acv(self):
+        return self.total_acv / np.maximum(self.deals, 1)
+
+    def matrix(self):
+        """Clustering inputs: log average ACV, log total ACV"""
+        return np.column_stack([np.log1p(self.avg_acv), np.log1p(self.total_acv)])
+
+    def fingerprint(self):
+        """Per-customer aggregates that decide whether a customer changed"""
+        return np.column_stack([self.deals, self.total_acv, self.won, self.closed]).astype(np.float64)
+
+
+def _squared_distances(points, centers):
+    return ((points[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+
+
+def assign(points, centers, chunk=ASSIGN_CHUNK):
+    """Index of the nearest center for every point, computed chunk by chunk"""
+    labels = np.empty(len(points), dtype=np.int64)
+    for start in range(0, len(points), chunk):
+        labels[start:start + chunk] = _squared_distances(points[start:start + chunk], centers).argmin(axis=1)
+    return labels
+
+
+class MiniBatchKMeans:
+    """
+    Mini-batch K-Means (Sculley 2010) in NumPy
+
+    Every step draws `batch_size` points, assigns them to the nearest
+    center and moves each center towards its batch mean with a per-center
+    learning rate of 1 / (points seen). Work per step and memory are
+    independent of the number of points.
+    """
+
+    def __init__(self, n_clusters=3, batch_size=4096, max_iter=200, tol=1e-4, seed=42):
+        self.n_clusters = n_clusters
+        self.batch_size = batch_size
+        self.max_iter = max_iter
+        self.tol = tol
+        self.seed = seed
+        self.centers = None
+        self.n_iter = 0
+
+    def _init_centers(self, points, rng):
+        """k-means++ seeding on a sample of at most 10,000 points"""
+        sample = points[rng.choice(len(points), min(len(points), 10_000), replace=False)]
+        centers = [sample[rng.integers(len(sample))]]
+        for _ in range(1, self.n_clusters):
+            distance = _squared_distances(sample, np.array(centers)).min(axis=1)
+            total = distance.sum()
+            probabilities = distance / total if total > 0 else None
+            centers.append(sample[rng.choice(len(sample), p=probabilities)])
+        return np.array(centers, dtype=np.float64)
+
+    def fit(self, points):
+        points = np.asarray(points, dtype=np.float64)
+        if len(points) < self.n_clusters:
+            raise ValueError(f"Need at least {self.n_clusters} points to fit {self.n_clusters} clusters")
+        rng = np.random.default_rng(self.seed)
+        centers = self._init_centers(points, rng)
+        seen = np.zeros(self.n_clusters)
+        dims = points.shape[1]
+
+        for step in range(self.max_iter):
+            batch = points[rng.integers(0, len(points), min(self.batch_size, len(points)))]
+            labels = assign(batch, centers)
+            counts = np.bincount(labels, minlength=self.n_clusters)
+            sums = np.stack([np.bincount(labels, weights=batch[:, d], minlength=self.n_clusters)
+                             for d in range(dims)], axis=1)
+            seen += counts
+            moved = counts > 0
+            rate = np.where(moved, counts / np.maximum(seen, 1), 0.0)[:, None]
+            new_centers = centers + rate * (sums / np.maximum(counts, 1)[:, None] - centers)
+            # Re-seed a center that has never attracted a point
+            for empty in np.flatnonzero(seen == 0):
+                new_centers[empty] = batch[rng.integers(len(batch))]
+            shift = np.abs(new_centers - centers).max()
+            centers = new_centers
+            self.n_iter = step + 1
+            if shift < self.tol:
+                break
+
+        self.centers = centers
+        return self
+
+    def predict(self, points):
+        return assign(np.asarray(points, dtype=np.float64), self.centers)
+
+    def inertia(self, points):
+        """Sum of squared distances to the nearest center (chunked)"""
+        points = np.asarray(points, dtype=np.float64)
+        total = 0.0
+        for start in range(0, len(points), ASSIGN_CHUNK):
+            total += _squared_distances(points[start:start + ASSIGN_CHUNK], self.centers).min(axis=1).sum()
+        return total
+
+
+class CustomerTiers:
+    """
+    Tier assignment of every customer plus the model that produced it
+
+    Attributes:
+        names (str array): Customer names (sorted)
+        fingerprints (2-D array): Aggregates the assignment was based on
+        tiers (int8 array): Index into TIER_LABELS (0 = Volume ... 2 = Strategic)
+        centers (2-D array): Centroids in standardized feature space, tier order
+        mean, scale (arrays): Standardization of the clustering features
+    """
+
+    def __init__(self, names, fingerprints, tiers, centers, mean, scale, labels=TIER_LABELS):
+        self.names = names
+        self.fingerprints = fingerprints
+        self.tiers = tiers
+        self.centers = centers
+        self.mean = mean
+        self.scale = scale
+        self.labels = tuple(labels)
+
+    @classmethod
+    def fit(cls, table, labels=TIER_LABELS, batch_size=4096, seed=42):
+        """Aggregate customers, standardize and cluster them from scratch"""
+        features = CustomerFeatures.build(table)
+        matrix = features.matrix()
+        mean = matrix.mean(axis=0)
+        scale = matrix.std(axis=0)
+        scale[scale == 0] = 1.0
+        model = MiniBatchKMeans(len(labels), batch_size=batch_size, seed=seed).fit((matrix - mean) / scale)
+
+        # Order clusters by average ACV so tier 0 is Volume and the last is Strategic
+        order = np.argsort(model.centers[:, 0])
+        centers = model.centers[order]
+        tiers = assign((matrix - mean) / scale, centers).astype(np.int8)
+        return cls(features.names, features.fingerprint(), tiers, centers, mean, scale, labels)
+
+    def _assign(self, features, rows):
+        matrix = features.matrix()[rows]
+        return assign((matrix - self.mean) / self.scale, self.centers).astype(np.int8)
+
+    def update(self, table):
+        """
+        Bring the assignment up to date with a new snapshot
+
+        Customers with unchanged aggregates keep their tier; changed and new
+        customers are assigned to the nearest stored centroid.
+
+        Returns: ChangeSummary
+        """
+        features = CustomerFeatures.build(table)
+        fingerprints = features.fingerprint()
+
+        tiers = np.empty(len(features), dtype=np.int8)
+        if len(self.names):
+            position = np.minimum(np.searchsorted(self.names, features.names), len(self.names) - 1)
+            found = self.names[position] == features.names
+        else:
+            position = np.zeros(len(features), dtype=np.int64)
+            found = np.zeros(len(features), dtype=bool)
+        changed = np.zeros(len(features), dtype=bool)
+        changed[found] = ~np.all(np.isclose(self.fingerprints[position[found]], fingerprints[found]), axis=1)
+
+        tiers[found] = self.tiers[position[found]]
+        fresh = np.flatnonzero(changed | ~found)
+        if len(fresh):
+            tiers[fresh] = self._assign(features, fresh)
+
+        summary = ChangeSummary(added=int((~found).sum()), removed=len(self.names) - int(found.sum()),
+                                changed=int(changed.sum()), unchanged=int(found.sum() - changed.sum()))
+        self.names, self.fingerprints, self.tiers = features.names, fingerprints, tiers
+        return summary
+
+    def tier_of(self, customer):
+        """Tier label of one customer (None if unknown)"""
+        position = int(np.searchsorted(self.names, customer))
+        if position < len(self.names) and self.names[position] == customer:
+            return self.labels[self.tiers[position]]
+        return None
+
+    def summary(self):
+        """Per tier: customers, deals, total ACV, average deal ACV and win rate"""
+        deals, total_acv, won, closed = self.fingerprints.T
+        result = {}
+        for tier in range(len(self.labels) - 1, -1, -1):
+            mask = self.tiers == tier
+            tier_deals = deals[mask].sum()
+            tier_closed = closed[mask].sum()
+            result[self.labels[tier]] = {
+                'customers': int(mask.sum()),
+                'deals': int(tier_deals),
+                'total_acv': float(total_acv[mask].sum()),
+                'avg_deal_acv': float(total_acv[mask].sum() / tier_deals) if tier_deals else 0.0,
+                'win_rate': float(won[mask].sum() / tier_closed) if tier_closed else float('nan'),
+            }
+        return result
+
+    # -- persistence -------------------------------------------------------
+
+    def save(self, path):
+        """Write the assignment and model atomically to an .npz file"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp_path, version=np.array([TIERS_FORMAT_VERSION]), names=self.names,
+                 fingerprints=self.fingerprints, tiers=self.tiers, centers=self.centers,
+                 mean=self.mean, scale=self.scale, labels=np.array(self.labels, dtype=str))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Load saved tiers, or return None if missing or incompatible"""
+        try:
+            data = np.load(path, allow_pickle=False)
+        except (OSError, ValueError):
+            return None
+        with data:
+            if int(data['version'][0]) != TIERS_FORMAT_VERSION:
+                return None
+            return cls(data['names'], data['fingerprints'], data['tiers'], data['centers'],
+                       data['mean'], data['scale'], data['labels'].tolist())
+
+
+def update_tiers(table, path, refit=False):
+    """
+    Load the tiers at `path`, apply `table` and save them again
+
+    A missing state (or refit=True) clusters all customers from scratch.
+
+    Returns: (CustomerTiers, ChangeSummary or None when refitted)
+    """
+    tiers = None if refit else CustomerTiers.load(path)
+    if tiers is None:
+        tiers = CustomerTiers.fit(table)
+        summary = None
+    else:
+        summary = tiers.update(table)
+    tiers.save(path)
+    return tiers, summary
+
+
+if __name__ == "__main__":
+    """
+    Print the customer tiers of the default workbook: python customer_tiers.py [--refit]
+    """
+    import argparse
+
+    from dataset_session import get_dataset
+
+    parser = argparse.ArgumentParser(description="Strategic / Core / Volume customer tiers")
+    parser.add_argument('--refit', action='store_true', help="re-cluster all customers")
+    args = parser.parse_args()
+
+    dataset = get_dataset()
+    tiers, changes = update_tiers(dataset.table, default_tiers_path(dataset.path), refit=args.refit)
+
+    print("🎯 CUSTOMER TIERS (mini-batch K-Means on per-customer aggregates)")
+    print("=" * 70)
+    if changes is None:
+        print(f"🆕 Clustered {len(tiers.names)} customers")
+    else:
+        print(f"♻️  {changes.added} new, {changes.changed} changed, {changes.removed} removed customers reassigned; "
+              f"{changes.unchanged} unchanged")
+    for label, stats in tiers.summary().items():
+        print(f"{label:<20} {stats['customers']:>6} customers  {stats['deals']:>7} deals  "
+              f"avg deal ${stats['avg_deal_acv']:>10,.0f}  total ${stats['total_acv']:>14,.0f}  "
+              f"win rate {stats['win_rate']:.1%}")
@@ -0,0 +1,295 @@
+"""
+data_cache.py - Cached columnar snapshot of the opportunities workbook
+
+Parsing opportunities.xlsx through openpyxl is the slowest step of every
+run. This module converts the workbook once into one .npy file per column
+and serves later loads straight from those files. The snapshot is keyed by
+the workbook's absolute path, modification time and SHA-256 content hash,
+and is rebuilt automatically when the source changes.
+
+Snapshots live in a .cache folder next to the workbook, or under one
+directory given by cache_root / the REVOPS_CACHE_DIR environment variable.
+The snapshot is only an accelerator: if it cannot be written (read-only
+folder, someone else's export), the parsed workbook is returned uncached.
+
+Author: Svitlana Kovalivska
+Purpose: Remove repeated workbook parsing from test.py and validation.py
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from tracing import stage
+
+DEFAULT_EXCEL_FILE = os.path.normpath(os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), os.pardir,
+    '02_Data_Analysis', 'opportunities.xlsx'))
+
+CACHE_FORMAT_VERSION = 1
+MANIFEST_NAME = 'manifest.json'
+# Keep all snapshots under this directory instead of next to each workbook
+CACHE_ROOT_ENV = 'REVOPS_CACHE_DIR'
+
+
+def cache_dir_for(excel_file, cache_root=None):
+    """
+    Cache directory used for `excel_file`
+
+    A .cache folder next to the workbook, unless `cache_root` (or the
+    REVOPS_CACHE_DIR environment variable) names a shared root; there the
+    directory name combines a digest of the workbook's folder with its name.
+    """
+    excel_file = os.path.abspath(excel_file)
+    folder, name = os.path.split(excel_file)
+    cache_root = cache_root or os.environ.get(CACHE_ROOT_ENV)
+    if cache_root:
+        folder_key = hashlib.sha256(folder.encode()).hexdigest()[:12]
+        return os.path.join(os.path.abspath(cache_root), f"{folder_key}-{name}.columns")
+    return os.path.join(folder, '.cache', name + '.columns')
+
+
+def content_hash(path, block_size=1 << 20):
+    """SHA-256 hex digest of a file's bytes"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as handle:
+        for block in iter(lambda: handle.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _read_manifest(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, MANIFEST_NAME)) as handle:
+            manifest = json.load(handle)
+    except (OSError, ValueError):
+        return None
+    if manifest.get('format_version') != CACHE_FORMAT_VERSION:
+        return None
+    return manifest
+
+
+def _write_manifest(cache_dir, manifest):
+    """Write the manifest atomically so readers never see a partial file"""
+    path = os.path.join(cache_dir, MANIFEST_NAME)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as handle:
+        json.dump(manifest, handle, indent=2)
+    os.replace(tmp_path, path)
+
+
+def snapshot_status(excel_file=DEFAULT_EXCEL_FILE, cache_dir=None):
+    """
+    Check whether a usable snapshot exists for `excel_file`
+
+    The content hash is only computed when path or size/mtime disagree with
+    the manifest, so a fresh snapshot is confirmed with a single stat call.
+
+    Returns: (manifest or None, state) where state is 'fresh', 'touched'
+             (same bytes, new mtime) or 'stale'
+    """
+    excel_file = os.path.abspath(excel_file)
+    cache_dir = cache_dir or cache_dir_for(excel_file)
+    manifest = _read_manifest(cache_dir)
+    if manifest is None or not manifest.get('source') or manifest['source']['path'] != excel_file:
+        return None, 'stale'
+
+    stat = os.stat(excel_file)
+    source = manifest['source']
+    if source['mtime_ns'] == stat.st_mtime_ns and source['size'] == stat.st_size:
+        return manifest, 'fresh'
+    if source['size'] == stat.st_size and source['sha256'] == content_hash(excel_file):
+        return manifest, 'touched'
+    return None, 'stale'
+
+
+def _encode_column(column):
+    """
+    Convert a pandas column or array into (array, null_mask, kind) for .npy storage
+
+    Text columns are stored as fixed-width unicode so no pickling is needed;
+    their missing values are kept in a separate boolean mask.
+    """
+    values = column.to_numpy() if hasattr(column, 'to_numpy') else np.asarray(column)
+    if values.dtype.kind in 'biufcM':
+        return values, None, 'native'
+    nulls = np.fromiter((value is None or value != value for value in values),
+                        dtype=bool, count=len(values))
+    text = np.where(nulls, '', values).astype(np.str_)
+    return text, nulls if nulls.any() else None, 'str'
+
+
+def _decode_column(values, nulls, kind):
+    """Inverse of _encode_column: text columns become object arrays with None for missing"""
+    if kind == 'str':
+        values = values.astype(object)
+        if nulls is not None:
+            values[nulls] = None
+    return values
+
+
+def save_columns(columns, cache_dir, source=None, stem=None):
+    """
+    Write {column name: array-like} as a columnar snapshot in `cache_dir`
+
+    build_snapshot() uses this for the workbook; benchmarks and tests use it
+    to store generated data without going through Excel.
+
+    Args:
+        columns (dict or DataFrame): Columns in output order
+        cache_dir (str): Snapshot directory (created if needed)
+        source (dict): Source file metadata for freshness checks (optional)
+        stem (str): File name prefix of the column files
+
+    Returns: the new manifest
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    stem = stem or 'columns'
+    names = list(columns.columns if hasattr(columns, 'columns') else columns)
+
+    entries = []
+    rows = 0
+    for position, name in enumerate(names):
+        values, nulls, kind = _encode_column(columns[name])
+        rows = len(values)
+        file_stem = f"{stem}_col{position}"
+        np.save(os.path.join(cache_dir, file_stem + '.npy'), values, allow_pickle=False)
+        if nulls is not None:
+            np.save(os.path.join(cache_dir, file_stem + '.isnull.npy'), nulls, allow_pickle=False)
+        entries.append({'name': str(name), 'file': file_stem, 'kind': kind,
+                        'has_nulls': nulls is not None})
+
+    manifest = {
+        'format_version': CACHE_FORMAT_VERSION,
+        'source': source,
+        'rows': rows,
+        'columns': entries,
+    }
+    _write_manifest(cache_dir, manifest)
+    return manifest
+
+
+def load_columns(cache_dir):
+    """
+    Read a columnar snapshot written by save_columns() without freshness checks
+
+    Returns: dict {column name: numpy array}, or None if there is no snapshot
+    """
+    manifest = _read_manifest(cache_dir)
+    return None if manifest is None else _load_snapshot(cache_dir, manifest)
+
+
+def _parse_workbook(excel_file):
+    """Read `excel_file` with pandas; returns (DataFrame, source metadata for the manifest)"""
+    import pandas as pd
+
+    stat = os.stat(excel_file)
+    sha256 = content_hash(excel_file)
+    with stage('read_excel', path=excel_file) as span:
+        df = pd.read_excel(excel_file)
+        span.rows = len(df)
+    return df, {'path': excel_file, 'mtime_ns': stat.st_mtime_ns,
+                'size': stat.st_size, 'sha256': sha256}
+
+
+def _write_snapshot(df, source, cache_dir):
+    """Write a parsed workbook as the snapshot in `cache_dir` (raises OSError if not writable)"""
+    stem = source['sha256'][:16]
+    manifest = save_columns(df, cache_dir, source=source, stem=stem)
+
+    # Drop column files belonging to earlier versions of the workbook
+    for entry in os.listdir(cache_dir):
+        if entry.endswith('.npy') and not entry.startswith(stem):
+            try:
+                os.remove(os.path.join(cache_dir, entry))
+            except OSError:
+                pass
+    return manifest
+
+
+def build_snapshot(excel_file=DEFAULT_EXCEL_FILE, cache_dir=None):
+    """
+    Parse `excel_file` once and write its columnar snapshot
+
+    Returns: the new manifest
+    """
+    excel_file = os.path.abspath(excel_file)
+    df, source = _parse_workbook(excel_file)
+    return _write_snapshot(df, source, cache_dir or cache_dir_for(excel_file))
+
+
+def _load_snapshot(cache_dir, manifest):
+    with stage('read_snapshot', rows=manifest['rows']):
+        return _read_columns(cache_dir, manifest)
+
+
+def _read_columns(cache_dir, manifest):
+    columns = {}
+    for column in manifest['columns']:
+        stem = os.path.join(cache_dir, column['file'])
+        values = np.load(stem + '.npy', mmap_mode='r', allow_pickle=False)
+        nulls = np.load(stem + '.isnull.npy', allow_pickle=False) if column['has_nulls'] else None
+        columns[column['name']] = _decode_column(values, nulls, column['kind'])
+    return columns
+
+
+def load_opportunity_columns(excel_file=DEFAULT_EXCEL_FILE, cache_dir=None, rebuild=False):
+    """
+    Load the workbook as a dict of NumPy arrays, using the snapshot if valid
+
+    Only NumPy is needed when the snapshot is fresh; pandas/openpyxl are
+    imported solely to (re)build it. If the snapshot cannot be written, the
+    parsed columns are returned without caching.
+
+    Args:
+        excel_file (str): Path to the opportunities workbook
+        cache_dir (str): Snapshot directory (default: cache_dir_for(excel_file))
+        rebuild (bool): Force re-parsing the workbook
+
+    Returns: dict {column name: numpy array} in workbook column order
+    """
+    excel_file = os.path.abspath(excel_file)
+    cache_dir = cache_dir or cache_dir_for(excel_file)
+
+    manifest, state = (None, 'stale') if rebuild else snapshot_status(excel_file, cache_dir)
+    if state == 'touched':
+        # Same bytes under a new mtime: remember it so the next check is a stat only
+        manifest['source']['mtime_ns'] = os.stat(excel_file).st_mtime_ns
+        try:
+            _write_manifest(cache_dir, manifest)
+        except OSError:
+            pass  # the snapshot is still valid; later loads re-check the hash
+    elif manifest is None:
+        df, source = _parse_workbook(excel_file)
+        try:
+            manifest = _write_snapshot(df, source, cache_dir)
+        except OSError:
+            # Read-only or foreign cache folder: serve the parsed workbook uncached
+            return {str(name): _decode_column(*_encode_column(df[name])) for name in df.columns}
+    return _load_snapshot(cache_dir, manifest)
+
+
+def load_opportunities(excel_file=DEFAULT_EXCEL_FILE, cache_dir=None, rebuild=False):
+    """
+    Drop-in replacement for pd.read_excel(excel_file) backed by the snapshot
+
+    Returns: pandas DataFrame with the workbook's columns and dtypes
+    """
+    import pandas as pd
+
+    columns = load_opportunity_columns(excel_file, cache_dir, rebuild)
+    return pd.DataFrame({name: pd.Series(values) for name, values in columns.items()})
+
+
+if __name__ == "__main__":
+    """
+    Build (or refresh) the snapshot of the default workbook
+    """
+    manifest, state = snapshot_status()
+    if manifest is None:
+        manifest = build_snapshot()
+        print(f"📦 Snapshot built: {manifest['rows']} rows -> {cache_dir_for(DEFAULT_EXCEL_FILE)}")
+    else:
+        print(f"✅ Snapshot is up to date ({state}): {manifest['rows']} rows")
@@ -0,0 +1,433 @@
+"""
+data_quality.py - Row-level data-quality rules with violation bitmasks
+
+validate_data_integrity() reports per-column null counts and unexpected
+Status values, but not which rows are bad. Here every rule is a vectorized
+check over the compact OpportunityTable that returns a boolean "violates"
+mask. A RuleSet gives each rule one bit and ORs the masks into a single
+per-row bitmask. The resulting QualityReport answers which rules a row
+breaks, which IDs break a rule, how many rows are clean, and can export
+offending IDs per rule.
+
+Rules are declared as plain dicts, so they can come from JSON/YAML config:
+
+    {'rule': 'required', 'columns': ['ID', 'Status']}
+    {'rule': 'allowed_values', 'column': 'Status', 'values': ['Won', 'Lost', 'Open']}
+    {'rule': 'min_value', 'column': 'ACV', 'min': 0, 'inclusive': False}
+    {'rule': 'date_order', 'later': 'StartDate', 'earlier': 'CloseDate'}
+    {'rule': 'unique', 'column': 'ID'}
+    {'rule': 'valid_dates', 'columns': ['CloseDate', 'StartDate']}
+
+New rules can be added at runtime with RuleSet.add(), either as Rule
+objects or with @ruleset.rule('name') on a function table -> mask. New
+rule types register with register_rule_type().
+
+Author: Svitlana Kovalivska
+Purpose: Find and export the exact rows that break data-quality rules
+"""
+
+import csv
+
+import numpy as np
+
+from date_index import MISSING_DAY
+
+EXPECTED_STATUSES = ('Won', 'Lost', 'Open')
+
+DEFAULT_RULES = (
+    {'rule': 'required', 'name': 'required_values',
+     'columns': ['ID', 'ProductName', 'CustomerName', 'ACV', 'Status', 'CloseDate', 'StartDate']},
+    {'rule': 'allowed_values', 'name': 'allowed_status', 'column': 'Status', 'values': list(EXPECTED_STATUSES)},
+    {'rule': 'min_value', 'name': 'acv_positive', 'column': 'ACV', 'min': 0, 'inclusive': False},
+    {'rule': 'date_order', 'name': 'start_after_close', 'later': 'StartDate', 'earlier': 'CloseDate'},
+    {'rule': 'unique', 'name': 'duplicate_id', 'column': 'ID'},
+    {'rule': 'valid_dates', 'name': 'valid_dates', 'columns': ['CloseDate', 'StartDate']},
+)
+
+# Workbook column -> compact table attribute
+_DATE_COLUMNS = {'CloseDate': 'close_days', 'StartDate': 'start_days'}
+
+
+class Rule:
+    """
+    One data-quality rule
+
+    Subclasses implement violations(table) -> bool array (True = row breaks the rule).
+    """
+
+    kind = 'custom'
+
+    def __init__(self, name, description=''):
+        self.name = name
+        self.description = description
+
+    def violations(self, table):
+        raise NotImplementedError
+
+    def to_dict(self):
+        return {'rule': self.kind, 'name': self.name, 'description': self.description}
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.name!r})"
+
+
+class RequiredRule(Rule):
+    """Columns must exist and have a value; a missing column flags every row"""
+
+    kind = 'required'
+
+    def __init__(self, name, columns, description=''):
+        super().__init__(name, description or f"Values required in {', '.join(columns)}")
+        self.columns = list(columns)
+
+    def violations(self, table):
+        mask = np.zeros(len(table), dtype=bool)
+        for column in self.columns:
+            mask |= table.isnull(column) if column in table else True
+        return mask
+
+
+class AllowedValuesRule(Rule):
+    """Non-missing values of an encoded column must be in `values` (one lookup over the codes)"""
+
+    kind = 'allowed_values'
+
+    def __init__(self, name, column, values, description=''):
+        super().__init__(name, description or f"{column} must be one of {', '.join(map(str, values))}")
+        self.column = column
+        self.values = list(values)
+
+    def violations(self, table):
+        if self.column not in table:
+            return np.zeros(len(table), dtype=bool)
+        encoded = table[self.column]
+        allowed = set(self.values)
+        # Allowed flag per code; the extra last entry covers missing values (code -1)
+        bad_code = np.array([value not in allowed for value in encoded.categories] + [False], dtype=bool)
+        return bad_code[encoded.codes]
+
+
+class MinValueRule(Rule):
+    """Numeric column above `minimum` (NaN is left to the required rule)"""
+
+    kind = 'min_value'
+
+    def __init__(self, name, column, min=0, inclusive=True, description=''):
+        comparison = '>=' if inclusive else '>'
+        super().__init__(name, description or f"{column} {comparison} {min}")
+        self.column = column
+        self.minimum = min
+        self.inclusive = inclusive
+
+    def violations(self, table):
+        if self.column not in table:
+            return np.zeros(len(table), dtype=bool)
+        values = np.asarray(table[self.column], dtype=np.float64)
+        ok = values >= self.minimum if self.inclusive else values > self.minimum
+        return ~ok & ~np.isnan(values)
+
+
+class DateOrderRule(Rule):
+    """`later` must be on or after `earlier` where both dates are present"""
+
+    kind = 'date_order'
+
+    def __init__(self, name, later, earlier, description=''):
+        super().__init__(name, description or f"{later} >= {earlier}")
+        self.later = later
+        self.earlier = earlier
+
+    def violations(self, table):
+        if self.later not in table or self.earlier not in table:
+            return np.zeros(len(table), dtype=bool)
+        later = getattr(table, _DATE_COLUMNS[self.later])
+        earlier = getattr(table, _DATE_COLUMNS[self.earlier])
+        return (later != MISSING_DAY) & (earlier != MISSING_DAY) & (later < earlier)
+
+
+class UniqueRule(Rule):
+    """Every copy of a value that occurs more than once (one sort)"""
+
+    kind = 'unique'
+
+    def __init__(self, name, column, description=''):
+        super().__init__(name, description or f"{column} must be unique")
+        self.column = column
+
+    def violations(self, table):
+        if self.column not in table:
+            return np.zeros(len(table), dtype=bool)
+        column = table[self.column]
+        if hasattr(column, 'codes'):
+            keys = column.codes
+        else:
+            keys = column.values if hasattr(column, 'values') else np.asarray(column)
+        _, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+        mask = counts[inverse.ravel()] > 1
+        nulls = table.isnull(self.column)
+        return mask & ~nulls
+
+
+class ValidDatesRule(Rule):
+    """
+    Dates must be present and fall in [min_year, max_year]
+
+    The loader coerces unparseable cells to missing (date_index.as_datetime64),
+    so they fail here as missing dates; out-of-range years catch Excel
+    serial-number artefacts such as 1900-01-00.
+    """
+
+    kind = 'valid_dates'
+
+    def __init__(self, name, columns, min_year=1990, max_year=2100, description=''):
+        super().__init__(name, description or f"{', '.join(columns)} parseable, years {min_year}-{max_year}")
+        self.columns = list(columns)
+        self.min_year = min_year
+        self.max_year = max_year
+
+    def violations(self, table):
+        mask = np.zeros(len(table), dtype=bool)
+        for column in self.columns:
+            if column not in table:
+                mask |= True
+                continue
+            dates = table.dates_for(column)
+            mask |= ~dates.valid | (dates.year < self.min_year) | (dates.year > self.max_year)
+        return mask
+
+
+class FunctionRule(Rule):
+    """Rule defined at runtime by a function table -> violation mask"""
+
+    def __init__(self, name, function, description=''):
+        super().__init__(name, description or (function.__doc__ or '').strip())
+        self.function = function
+
+    def violations(self, table):
+        return np.asarray(self.function(table), dtype=bool)
+
+
+RULE_TYPES = {
+    'required': RequiredRule,
+    'allowed_values': AllowedValuesRule,
+    'min_value': MinValueRule,
+    'date_order': DateOrderRule,
+    'unique': UniqueRule,
+    'valid_dates': ValidDatesRule,
+}
+
+
+def register_rule_type(kind, rule_class):
+    """Make a Rule subclass available to RuleSet.from_config under `kind`"""
+    rule_class.kind = kind
+    RULE_TYPES[kind] = rule_class
+    return rule_class
+
+
+def rule_from_config(config):
+    """Build a Rule from a declarative dict ({'rule': kind, 'name': ..., **options})"""
+    options = dict(config)
+    kind = options.pop('rule')
+    if kind not in RULE_TYPES:
+        raise ValueError(f"Unknown rule type {kind!r}; known: {', '.join(sorted(RULE_TYPES))}")
+    options.setdefault('name', kind)
+    return RULE_TYPES[kind](**options)
+
+
+class RuleSet:
+    """
+    Ordered rules, each owning one bit of the violation bitmask
+
+    Bits are assigned in insertion order and kept stable when rules are
+    removed, so stored bitmasks keep their meaning within a session.
+    """
+
+    MAX_RULES = 64
+
+    def __init__(self, rules=()):
+        self._rules = {}
+        self._bits = {}
+        for rule in rules:
+            self.add(rule)
+
+    @classmethod
+    def from_config(cls, configs=DEFAULT_RULES):
+        return cls(rule_from_config(config) for config in configs)
+
+    def add(self, rule):
+        """Add (or replace) a rule; returns it"""
+        if rule.name not in self._bits:
+            used = set(self._bits.values())
+            free = [bit for bit in range(self.MAX_RULES) if bit not in used]
+            if not free:
+                raise ValueError(f"A RuleSet holds at most {self.MAX_RULES} rules")
+            self._bits[rule.name] = free[0]
+        self._rules[rule.name] = rule
+        return rule
+
+    def rule(self, name, description=''):
+        """Decorator registering a function table -> mask as a rule"""
+        def decorator(function):
+            self.add(FunctionRule(name, function, description))
+            return function
+        return decorator
+
+    def remove(self, name):
+        self._rules.pop(name)
+        self._bits.pop(name)
+
+    def __iter__(self):
+        return iter(self._rules.values())
+
+    def __len__(self):
+        return len(self._rules)
+
+    def __contains__(self, name):
+        return name in self._rules
+
+    def bit(self, name):
+        return self._bits[name]
+
+    def _mask_dtype(self):
+        highest = max(self._bits.values(), default=0)
+        for dtype in (np.uint8, np.uint16, np.uint32, np.uint64):
+            if highest < np.iinfo(dtype).bits:
+                return dtype
+
+    def evaluate(self, table):
+        """
+        Run every rule over the whole table
+
+        Returns: QualityReport with one bitmask entry per row
+        """
+        dtype = self._mask_dtype()
+        bitmask = np.zeros(len(table), dtype=dtype)
+        for name, rule in self._rules.items():
+            violations = rule.violations(table)
+            if len(violations) != len(table):
+                raise ValueError(f"Rule {name!r} returned {len(violations)} flags for {len(table)} rows")
+            bitmask |= violations.astype(dtype) << dtype(self._bits[name])
+        return QualityReport(table, bitmask, dict(self._bits), dict(self._rules))
+
+
+class QualityReport:
+    """
+    Per-row violation bitmask of one RuleSet evaluation
+
+    Attributes:
+        bitmask (unsigned int array): Bit `bits[name]` set where the row breaks rule `name`
+        bits (dict): Rule name -> bit
+        rules (dict): Rule name -> Rule
+    """
+
+    def __init__(self, table, bitmask, bits, rules):
+        self.table = table
+        self.bitmask = bitmask
+        self.bits = bits
+        self.rules = rules
+
+    def mask(self, name):
+        """Rows breaking rule `name`"""
+        return (self.bitmask >> self.bitmask.dtype.type(self.bits[name])) & 1 == 1
+
+    def rows(self, name):
+        return np.flatnonzero(self.mask(name))
+
+    def offending_ids(self, name):
+        """IDs (as str) of the rows breaking rule `name`; missing IDs become ''"""
+        rows = self.rows(name)
+        if 'ID' not in self.table:
+            return [str(row) for row in rows]
+        return ['' if value is None else str(value) for value in self.table.ids.decode(rows)]
+
+    def rule_names(self, row):
+        """Names of the rules one row breaks"""
+        value = int(self.bitmask[row])
+        return [name for name, bit in self.bits.items() if value >> bit & 1]
+
+    @property
+    def bad_rows(self):
+        return np.flatnonzero(self.bitmask)
+
+    @property
+    def clean_count(self):
+        return int(np.count_nonzero(self.bitmask == 0))
+
+    def counts(self):
+        """Rule name -> number of offending rows"""
+        return {name: int(np.count_nonzero(self.mask(name))) for name in self.bits}
+
+    def summary(self):
+        counts = self.counts()
+        return {
+            'rows': len(self.bitmask),
+            'clean_rows': self.clean_count,
+            'rows_with_violations': len(self.bitmask) - self.clean_count,
+            'rules': {name: {'description': self.rules[name].description, 'bit': self.bits[name],
+                             'violations': counts[name]} for name in self.bits},
+        }
+
+    def write_offending_ids(self, path, names=None):
+        """Write (rule, row, id) rows for every violation to a CSV file; returns the row count"""
+        written = 0
+        with open(path, 'w', newline='') as handle:
+            writer = csv.writer(handle)
+            writer.writerow(('rule', 'row', 'id'))
+            for name in names or self.bits:
+                rows = self.rows(name)
+                for row, opportunity_id in zip(rows, self.offending_ids(name)):
+                    writer.writerow((name, int(row), opportunity_id))
+                written += len(rows)
+        return written
+
+
+def check_quality(table, rules=None):
+    """Evaluate `rules` (a RuleSet, rule configs or None for DEFAULT_RULES) on a table"""
+    if rules is None:
+        rules = RuleSet.from_config()
+    elif not isinstance(rules, RuleSet):
+        rules = RuleSet.from_config(rules)
+    return rules.evaluate(table)
+
+
+def get_quality_report(dataset):
+    """DEFAULT_RULES report of a dataset, built once per load"""
+    return dataset.derived('quality_report', check_quality)
+
+
+if __name__ == "__main__":
+    """
+    Check the default workbook: python data_quality.py [--rules rules.json] [--export offending.csv]
+    """
+    import argparse
+    import json
+
+    from dataset_session import get_dataset
+
+    parser = argparse.ArgumentParser(description="Row-level data-quality rules")
+    parser.add_argument('--rules', help="JSON file with a list of rule configs (default: built-in rules)")
+    parser.add_argument('--export', help="write offending IDs per rule to this CSV file")
+    parser.add_argument('--limit', type=int, default=5, help="offending IDs to show per rule")
+    args = parser.parse_args()
+
+    configs = DEFAULT_RULES
+    if args.rules:
+        with open(args.rules) as handle:
+            configs = json.load(handle)
+    report = check_quality(get_dataset().table, configs)
+    summary = report.summary()
+
+    print("🧪 DATA QUALITY RULES")
+    print("=" * 70)
+    print(f"📊 {summary['rows']} rows, {summary['clean_rows']} clean, "
+          f"{summary['rows_with_violations']} with violations")
+    for name, info in summary['rules'].items():
+        status = "✅" if not info['violations'] else "⚠️ "
+        print(f"{status} {name:<20} {info['violations']:>6}  {info['description']}")
+        if info['violations']:
+            ids = report.offending_ids(name)
+            more = f" ... (+{len(ids) - args.limit})" if len(ids) > args.limit else ""
+            print(f"      {', '.join(ids[:args.limit])}{more}")
+    if args.export:
+        count = report.write_offending_ids(args.export)
+        print(f"\n💾 {count} violations written to {args.export}")
@@ -0,0 +1,188 @@
+"""
+dataset_session.py - Process-wide registry of loaded opportunity datasets
+
+Every DataValidator, the run_validation.py menu and test.py obtain their
+data through the shared session below, so a workbook is loaded once per
+process no matter how many validators are created. The session can be
+reloaded explicitly and keeps count of the loads it avoided.
+
+Author: Svitlana Kovalivska
+Purpose: Stop repeated workbook loads within a single validation report
+"""
+
+import itertools
+import os
+import threading
+
+from data_cache import DEFAULT_EXCEL_FILE
+from compact_table import load_table
+from tracing import stage
+
+# Process-wide dataset tokens; unlike session versions they never repeat
+_dataset_tokens = itertools.count(1)
+
+
+class OpportunityDataset:
+    """
+    One loaded opportunities workbook, shared read-only between consumers
+
+    The data is held as a compact OpportunityTable. The integer date index
+    is built on first access and reused for the lifetime of this load; a
+    pandas DataFrame is only decoded if a consumer asks for `df`. Other
+    derived structures (forecast cube, indexes) are memoized with derived().
+
+    `version` counts loads within one DatasetSession; `token` is unique
+    across all sessions of the process and keys process-wide caches.
+    """
+
+    __slots__ = ('path', 'table', 'version', 'token', '_df', '_derived', '_lock')
+
+    def __init__(self, path, table, version):
+        self.path = path
+        self.table = table
+        self.version = version
+        self.token = next(_dataset_tokens)
+        self._df = None
+        self._derived = {}
+        self._lock = threading.RLock()
+
+    @property
+    def dates(self):
+        """Precomputed DateIndex for CloseDate / StartDate"""
+        with self._lock:
+            return self.table.dates
+
+    @property
+    def df(self):
+        """The dataset decoded as a pandas DataFrame (built on first access)"""
+        if self._df is None:
+            with self._lock:
+                if self._df is None:
+                    self._df = self.table.to_frame()
+        return self._df
+
+    def derived(self, key, factory):
+        """
+        Return the structure cached under `key`, building it with factory(table) once
+
+        Derived structures live as long as this load; a reload creates a new
+        dataset and therefore rebuilds them.
+        """
+        with self._lock:
+            if key not in self._derived:
+                self._derived[key] = factory(self.table)
+            return self._derived[key]
+
+    def __len__(self):
+        return len(self.table)
+
+    def __repr__(self):
+        return f"OpportunityDataset(path={self.path!r}, rows={len(self.table)}, version={self.version})"
+
+
+class DatasetSession:
+    """
+    Registry of datasets keyed by absolute workbook path
+
+    Attributes:
+        loads (int): Number of times a workbook was actually loaded
+        loads_avoided (int): Number of requests served from memory
+    """
+
+    def __init__(self, loader=load_table):
+        self._loader = loader
+        self._datasets = {}
+        self._signatures = {}
+        self._lock = threading.RLock()
+        self._version = 0
+        self.loads = 0
+        self.loads_avoided = 0
+
+    @staticmethod
+    def _key(excel_file):
+        return os.path.abspath(excel_file)
+
+    @staticmethod
+    def file_signature(path):
+        """(mtime_ns, size) of a workbook, or None if it cannot be read"""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self, key):
+        self._version += 1
+        # Taken before loading so a change made during the load is seen by refresh()
+        signature = self.file_signature(key)
+        with stage('load', path=key) as span:
+            table = self._loader(key)
+            span.rows = len(table)
+        dataset = OpportunityDataset(key, table, self._version)
+        self._datasets[key] = dataset
+        self._signatures[key] = signature
+        self.loads += 1
+        return dataset
+
+    def get(self, excel_file=DEFAULT_EXCEL_FILE):
+        """Return the dataset for `excel_file`, loading it on first use"""
+        key = self._key(excel_file)
+        with self._lock:
+            dataset = self._datasets.get(key)
+            if dataset is None:
+                return self._load(key)
+            self.loads_avoided += 1
+            return dataset
+
+    def reload(self, excel_file=None):
+        """
+        Reload one workbook, or every registered workbook when `excel_file` is None
+
+        Returns: the reloaded dataset (or list of datasets)
+        """
+        with self._lock:
+            if excel_file is not None:
+                return self._load(self._key(excel_file))
+            return [self._load(key) for key in list(self._datasets)]
+
+    def refresh(self, excel_file=DEFAULT_EXCEL_FILE):
+        """
+        Reload a workbook only if its file changed since it was loaded
+
+        Returns: (dataset, reloaded)
+        """
+        key = self._key(excel_file)
+        with self._lock:
+            dataset = self._datasets.get(key)
+            if dataset is None or self.file_signature(key) != self._signatures.get(key):
+                return self._load(key), True
+            self.loads_avoided += 1
+            return dataset, False
+
+    def clear(self):
+        """Forget all loaded datasets (statistics are kept)"""
+        with self._lock:
+            self._datasets.clear()
+            self._signatures.clear()
+
+    def stats(self):
+        """Return load statistics as a dict"""
+        with self._lock:
+            return {
+                'datasets': len(self._datasets),
+                'loads': self.loads,
+                'loads_avoided': self.loads_avoided,
+            }
+
+
+_session = DatasetSession()
+
+
+def get_session():
+    """Return the process-wide dataset session"""
+    return _session
+
+
+def get_dataset(excel_file=DEFAULT_EXCEL_FILE):
+    """Shortcut for get_session().get(excel_file)"""
+    return _session.get(excel_file)
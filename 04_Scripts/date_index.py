@@ -0,0 +1,125 @@
+"""
+date_index.py - Precomputed integer date index for CloseDate and StartDate
+
+Converting the date columns with pd.to_datetime and then taking .dt.year or
+.dt.month allocates new Series on every call. The index below decomposes
+each date column once per load into compact integer arrays (int16 year,
+int8 month, int32 days since 1970-01-01) that all sections share.
+The arrays are read-only, so the index can be handed to any number of
+consumers without copying.
+
+Author: Svitlana Kovalivska
+Purpose: Remove repeated date parsing from the validation and analysis paths
+"""
+
+import numpy as np
+
+# Day number stored for missing dates (year and month are 0 for those rows)
+MISSING_DAY = np.iinfo(np.int32).min
+
+
+def as_datetime64(dates):
+    """
+    Return `dates` as a datetime64 array, parsing only when necessary
+
+    Excel dates already arrive as datetime64 from pandas; anything else
+    (strings, Timestamps, objects) is converted once for the whole column.
+    Cells that cannot be parsed become NaT (missing) instead of failing the load.
+    """
+    dates = np.asarray(dates)
+    if dates.dtype.kind != 'M':
+        import pandas as pd
+        dates = np.asarray(pd.to_datetime(dates, errors='coerce'), dtype='datetime64[ns]')
+    return dates
+
+
+def _freeze(array):
+    array.setflags(write=False)
+    return array
+
+
+class DateColumnIndex:
+    """
+    Year / month / epoch-day decomposition of one date column
+
+    Attributes:
+        year (int16 array): Calendar year, 0 where the date is missing
+        month (int8 array): Calendar month 1-12, 0 where the date is missing
+        day (int32 array): Days since 1970-01-01, MISSING_DAY where missing
+        valid (bool array): True where the date is present
+    """
+
+    __slots__ = ('year', 'month', 'day', 'valid')
+
+    def __init__(self, year, month, day, valid):
+        for name, value in zip(self.__slots__, (year, month, day, valid)):
+            object.__setattr__(self, name, _freeze(value))
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __len__(self):
+        return len(self.day)
+
+    @classmethod
+    def from_dates(cls, dates):
+        """Build the index from any array-like of dates (parsed once if needed)"""
+        dates = as_datetime64(dates)
+        valid = ~np.isnat(dates)
+        days = dates.astype('datetime64[D]').astype(np.int64)
+        months = dates.astype('datetime64[M]').astype(np.int64)
+
+        year = np.where(valid, months // 12 + 1970, 0).astype(np.int16)
+        month = np.where(valid, months % 12 + 1, 0).astype(np.int8)
+        day = np.where(valid, days, MISSING_DAY).astype(np.int32)
+        return cls(year, month, day, valid)
+
+    @classmethod
+    def from_days(cls, days):
+        """Build the index from int32 epoch-day numbers (MISSING_DAY = missing)"""
+        days = np.asarray(days, dtype=np.int32)
+        dates = days.astype('datetime64[D]')
+        return cls.from_dates(np.where(days == MISSING_DAY, np.datetime64('NaT'), dates))
+
+    def to_datetime64(self):
+        """Return the dates as a datetime64[D] array (NaT where missing)"""
+        return np.where(self.valid, self.day.astype('datetime64[D]'), np.datetime64('NaT', 'D'))
+
+    def min_date(self):
+        """Earliest date as numpy datetime64[D] (NaT if no dates)"""
+        if not self.valid.any():
+            return np.datetime64('NaT', 'D')
+        return np.datetime64(int(self.day[self.valid].min()), 'D')
+
+    def max_date(self):
+        """Latest date as numpy datetime64[D] (NaT if no dates)"""
+        if not self.valid.any():
+            return np.datetime64('NaT', 'D')
+        return np.datetime64(int(self.day[self.valid].max()), 'D')
+
+
+class DateIndex:
+    """
+    Date indexes for the CloseDate and StartDate columns of one dataset
+
+    Attributes:
+        close (DateColumnIndex or None): CloseDate index
+        start (DateColumnIndex or None): StartDate index
+    """
+
+    __slots__ = ('close', 'start')
+
+    def __init__(self, close, start):
+        object.__setattr__(self, 'close', close)
+        object.__setattr__(self, 'start', start)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("DateIndex is immutable")
+
+    @classmethod
+    def from_frame(cls, df):
+        """Build the index from a DataFrame (or dict of arrays) with the date columns"""
+        def build(column):
+            return DateColumnIndex.from_dates(df[column]) if column in df else None
+
+        return cls(build('CloseDate'), build('StartDate'))
@@ -0,0 +1,198 @@
+"""
+forecast_cube.py - Probability-weighted forecast over all start months
+
+Section 4 only looks at March 2026 with a flat 25% weight on Open deals.
+ForecastCube computes the whole forward curve instead: a dense
+(start month) x (status) cube of deal counts, ACV and expected ACV built
+in a single grouped pass over the compact table. Cumulative sums along the
+month axis make any month, quarter, year or date range an O(1) lookup.
+
+Win probabilities are configurable at three levels (most specific wins):
+- per opportunity: an array aligned with the table rows (NaN = not set)
+- per product: {product name: probability}, applied to Open deals
+- per status: {status: probability}, default Won 100%, Open 25%, Lost 0%
+
+Author: Svitlana Kovalivska
+Purpose: Forward revenue curve for planning without rescanning the data
+"""
+
+import numpy as np
+
+DEFAULT_STATUS_PROBABILITIES = {'Won': 1.0, 'Open': 0.25, 'Lost': 0.0}
+
+
+def _month_key(year, month):
+    return (year - 1970) * 12 + (month - 1)
+
+
+class ForecastCube:
+    """
+    Dense (start month x status) cube of counts, ACV and expected ACV
+
+    Attributes:
+        first_month (int): Months since 1970-01 of the first cube row
+        statuses (list): Status names of the cube columns
+        count, acv, expected (2-D arrays): Values per (month row, status)
+    """
+
+    def __init__(self, first_month, statuses, count, acv, expected):
+        self.first_month = first_month
+        self.statuses = list(statuses)
+        self.count = count
+        self.acv = acv
+        self.expected = expected
+        # Prefix sums over months (leading zero row) for O(1) range queries
+        self._prefix = {
+            name: np.vstack([np.zeros((1, values.shape[1])), np.cumsum(values, axis=0)])
+            for name, values in (('count', count), ('acv', acv), ('expected', expected))
+        }
+
+    @classmethod
+    def build(cls, table, status_probabilities=None, product_probabilities=None,
+              opportunity_probabilities=None, open_status='Open'):
+        """
+        Build the cube from an OpportunityTable in one grouped pass
+
+        Args:
+            table (OpportunityTable): Compact opportunity table
+            status_probabilities (dict): Probability per status
+            product_probabilities (dict): Open-deal probability per product
+            opportunity_probabilities (array): Probability per row (NaN = not set)
+            open_status (str): Status that product probabilities apply to
+        """
+        probabilities = dict(DEFAULT_STATUS_PROBABILITIES)
+        probabilities.update(status_probabilities or {})
+
+        statuses = table.statuses
+        categories = [str(c) for c in statuses.categories]
+        status_codes = statuses.codes.astype(np.int64)
+
+        # Per-row probability: status default, then product, then opportunity overrides
+        by_status = np.array([probabilities.get(c, 0.0) for c in categories] + [0.0])
+        row_probability = by_status[status_codes]
+        if product_probabilities:
+            products = table.products
+            by_product = np.array([product_probabilities.get(str(c), np.nan) for c in products.categories]
+                                  + [np.nan])
+            product_probability = by_product[products.codes]
+            override = (statuses == open_status) & ~np.isnan(product_probability)
+            row_probability = np.where(override, product_probability, row_probability)
+        if opportunity_probabilities is not None:
+            opportunity_probabilities = np.asarray(opportunity_probabilities, dtype=np.float64)
+            row_probability = np.where(np.isnan(opportunity_probabilities), row_probability,
+                                       opportunity_probabilities)
+
+        start = table.dates.start
+        valid = start.valid & (status_codes >= 0)
+        months = _month_key(start.year.astype(np.int64), start.month.astype(np.int64))[valid]
+        if not len(months):
+            empty = np.zeros((0, len(categories)))
+            return cls(0, categories, empty, empty, empty)
+
+        first_month = int(months.min())
+        n_months = int(months.max()) - first_month + 1
+        n_status = len(categories)
+        key = (months - first_month) * n_status + status_codes[valid]
+        size = n_months * n_status
+
+        acvs = np.asarray(table.acvs, dtype=np.float64)[valid]
+        shape = (n_months, n_status)
+        count = np.bincount(key, minlength=size).reshape(shape)
+        acv = np.bincount(key, weights=acvs, minlength=size).reshape(shape)
+        expected = np.bincount(key, weights=acvs * row_probability[valid], minlength=size).reshape(shape)
+        return cls(first_month, categories, count, acv, expected)
+
+    # -- lookups -------------------------------------------------------------
+
+    def _status_slice(self, status):
+        if status is None:
+            return slice(None)
+        if status not in self.statuses:
+            return slice(0, 0)
+        position = self.statuses.index(status)
+        return slice(position, position + 1)
+
+    def range_total(self, start, end, measure='expected', status=None):
+        """
+        Sum of `measure` over start months [start, end] inclusive
+
+        Args:
+            start, end (tuple): (year, month) bounds
+            measure (str): 'expected', 'acv' or 'count'
+            status (str): Restrict to one status (default: all)
+        """
+        prefix = self._prefix[measure]
+        n_months = prefix.shape[0] - 1
+        lo = min(max(_month_key(*start) - self.first_month, 0), n_months)
+        hi = min(max(_month_key(*end) - self.first_month + 1, 0), n_months)
+        if hi <= lo:
+            return 0.0
+        columns = self._status_slice(status)
+        return float((prefix[hi, columns] - prefix[lo, columns]).sum())
+
+    def month(self, year, month, measure='expected', status=None):
+        """Value of `measure` for one start month"""
+        return self.range_total((year, month), (year, month), measure, status)
+
+    def quarter(self, year, quarter, measure='expected', status=None):
+        """Value of `measure` for calendar quarter 1-4"""
+        first = 3 * (quarter - 1) + 1
+        return self.range_total((year, first), (year, first + 2), measure, status)
+
+    def year(self, year, measure='expected', status=None):
+        """Value of `measure` for a calendar year"""
+        return self.range_total((year, 1), (year, 12), measure, status)
+
+    def breakdown(self, year, month):
+        """Per-status counts, ACV and expected ACV for one start month"""
+        return {
+            status: {
+                'count': int(self.month(year, month, 'count', status)),
+                'acv': self.month(year, month, 'acv', status),
+                'expected_acv': self.month(year, month, 'expected', status),
+            }
+            for status in self.statuses
+        }
+
+    def forward_curve(self, start=None, end=None):
+        """
+        Expected ACV per month as a list of (year, month, expected_acv)
+
+        Args:
+            start, end (tuple): Optional (year, month) bounds
+        """
+        rows = []
+        totals = self.expected.sum(axis=1)
+        for offset, value in enumerate(totals):
+            key = self.first_month + offset
+            year, month = key // 12 + 1970, key % 12 + 1
+            if start is not None and (year, month) < tuple(start):
+                continue
+            if end is not None and (year, month) > tuple(end):
+                continue
+            rows.append((year, month, float(value)))
+        return rows
+
+
+def get_forecast_cube(dataset):
+    """Default-probability cube of a dataset, built once per load"""
+    return dataset.derived('forecast_cube', ForecastCube.build)
+
+
+if __name__ == "__main__":
+    """
+    Print the probability-weighted forward curve of the default workbook
+    """
+    from dataset_session import get_dataset
+
+    cube = get_forecast_cube(get_dataset())
+    print("📈 FORWARD REVENUE CURVE (Won 100%, Open 25%)")
+    print("=" * 50)
+    print(f"{'Month':<10} {'Expected ACV':>16}")
+    for year, month, value in cube.forward_curve():
+        print(f"{year}-{month:02d}    {'$' + format(value, ',.0f'):>16}")
+    years = sorted({year for year, _, _ in cube.forward_curve()})
+    print("\n📊 QUARTERLY TOTALS")
+    for year in years:
+        quarters = "  ".join(f"Q{q}: ${cube.quarter(year, q):,.0f}" for q in range(1, 5))
+        print(f"{year}: {quarters}")
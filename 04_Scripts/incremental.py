@@ -0,0 +1,464 @@
+"""
+incremental.py - Incremental re-validation of changed opportunities
+
+Day to day only a few percent of opportunities change Status, ACV or dates,
+yet a full validation recomputes every section over all rows. This module
+persists, per opportunity ID, the fields the sections depend on (the
+fingerprint) together with the section aggregates:
+
+- overdue set: keys of Open deals with CloseDate in the overdue year
+- Won ACV totals and deal counts per StartDate year
+- won/total closed-deal counts per CloseDate month
+- forecast buckets per StartDate month (Won/Open ACV sums and counts)
+- Open deal ACV and count per CloseDate day (Section 2 ageing buckets)
+
+Opportunity IDs are not unique in the CRM export, so rows are keyed by
+(ID, occurrence of that ID in file order). A new snapshot is diffed against
+the store by that key. The store keeps the table row of every key, so when
+the ID column is unchanged since the last run (the usual daily case) the
+persisted key order is reused after one linear comparison; only a changed
+ID column is decoded and re-sorted. Only changed, added and removed rows
+are subtracted from or added to the aggregates, so updating them costs
+O(changed rows). With whole-number ACVs the results are identical to a
+full recompute.
+
+Author: Svitlana Kovalivska
+Purpose: Keep daily validation runs proportional to what actually changed
+"""
+
+import os
+from datetime import date
+
+import numpy as np
+
+from close_date_index import DEFAULT_AGEING_BUCKETS, to_day
+from date_index import MISSING_DAY
+from validation_results import OverdueDealsResult, WonAcvResult, ForecastResult, WinRateResult
+
+STATE_FORMAT_VERSION = 2
+STATE_FILE_NAME = 'incremental_state.npz'
+
+
+def default_state_path(excel_file):
+    """Incremental state file stored alongside the workbook's columnar snapshot"""
+    from data_cache import cache_dir_for
+    return os.path.join(cache_dir_for(excel_file), STATE_FILE_NAME)
+
+
+def _month_index(days):
+    """Months since 1970-01 for every epoch day (valid only where day != MISSING_DAY)"""
+    return days.astype('datetime64[D]').astype('datetime64[M]').astype(np.int64)
+
+
+def _year_month(month_index):
+    return int(month_index // 12 + 1970), int(month_index % 12 + 1)
+
+
+class ChangeSummary:
+    """Number of added, removed and changed opportunities in one update"""
+
+    __slots__ = ('added', 'removed', 'changed', 'unchanged')
+
+    def __init__(self, added=0, removed=0, changed=0, unchanged=0):
+        self.added = added
+        self.removed = removed
+        self.changed = changed
+        self.unchanged = unchanged
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @property
+    def touched(self):
+        return self.added + self.removed + self.changed
+
+    def __repr__(self):
+        return (f"ChangeSummary(added={self.added}, removed={self.removed}, "
+                f"changed={self.changed}, unchanged={self.unchanged})")
+
+
+class IncrementalState:
+    """
+    Persisted per-ID fingerprints plus section aggregates
+
+    Rows are kept sorted by (ID, occurrence) so a new snapshot is matched
+    with one vectorized binary search; `row` is the table row of each key.
+    """
+
+    def __init__(self, overdue_year=2025):
+        self.overdue_year = overdue_year
+        self.statuses = []                      # status vocabulary (code -> name)
+        self.row = np.array([], dtype=np.int64)
+        self.ids = np.array([], dtype=str)
+        self.occurrence = np.array([], dtype=np.int32)
+        self.status = np.array([], dtype=np.int16)
+        self.acv = np.array([], dtype=np.float64)
+        self.close_day = np.array([], dtype=np.int32)
+        self.start_day = np.array([], dtype=np.int32)
+
+        self.overdue = set()                    # {(id, occurrence)}
+        self.won_by_year = {}                   # year -> [acv sum, count]
+        self.closed_by_month = {}               # month index -> [won, total]
+        self.forecast_by_month = {}             # month index -> [won acv, won count, open acv, open count]
+        self.open_by_close_day = {}             # epoch day -> [open acv, open count]
+
+    # -- snapshot handling --------------------------------------------------
+
+    def _status_code(self, name):
+        if name not in self.statuses:
+            self.statuses.append(name)
+        return self.statuses.index(name)
+
+    def _stored_order(self, ids):
+        """The persisted key order if the ID column still matches it row for row, else None"""
+        if len(self.row) != len(ids):
+            return None
+        # Same values sorted_keys() would produce, without decoding or sorting
+        keys = ids.values[self.row]
+        keys = keys.astype(str) if keys.dtype.kind == 'S' else keys
+        if ids.nulls is not None:
+            keys[ids.nulls[self.row]] = 'None'
+        return self.row if np.array_equal(keys, self.ids) else None
+
+    def _snapshot(self, table):
+        """
+        Extract the fingerprint fields of `table`, sorted by (ID, occurrence)
+
+        Returns: (keys unchanged since the stored state, (row, ids, occurrence,
+                 status, acv, close_day, start_day))
+        """
+        mapping = np.array([self._status_code(str(c)) for c in table.statuses.categories] + [-1],
+                           dtype=np.int16)
+        status = mapping[table.statuses.codes]
+        order = self._stored_order(table.ids) if hasattr(table.ids, 'values') else None
+        unchanged = order is not None
+        if unchanged:
+            ids, occurrence = self.ids, self.occurrence
+        else:
+            order, ids, occurrence = sorted_keys(table.ids)
+        return unchanged, (order, ids, occurrence, status[order],
+                           np.asarray(table.acvs, dtype=np.float64)[order],
+                           table.close_days[order], table.start_days[order])
+
+    def _code(self, name):
+        return self.statuses.index(name) if name in self.statuses else -2
+
+    def _apply_rows(self, ids, occurrence, status, acv, close_day, start_day, sign):
+        """Add (sign=+1) or remove (sign=-1) the contribution of some rows"""
+        if not len(ids):
+            return
+        won = status == self._code('Won')
+        lost = status == self._code('Lost')
+        open_ = status == self._code('Open')
+        has_close = close_day != MISSING_DAY
+        has_start = start_day != MISSING_DAY
+        close_month = _month_index(close_day)
+        start_month = _month_index(start_day)
+
+        # Overdue set
+        overdue = open_ & has_close & (close_month // 12 + 1970 == self.overdue_year)
+        keys = zip(ids[overdue].tolist(), occurrence[overdue].tolist())
+        if sign > 0:
+            self.overdue.update(keys)
+        else:
+            self.overdue.difference_update(keys)
+
+        # Won ACV per start year
+        mask = won & has_start
+        for year, total, count in _group_sums(start_month[mask] // 12 + 1970, acv[mask]):
+            entry = self.won_by_year.setdefault(year, [0.0, 0])
+            entry[0] += sign * total
+            entry[1] += sign * count
+
+        # Won / total closed deals per close month
+        mask = (won | lost) & has_close
+        for month, wins, count in _group_sums(close_month[mask], won[mask].astype(np.float64)):
+            entry = self.closed_by_month.setdefault(month, [0, 0])
+            entry[0] += sign * int(wins)
+            entry[1] += sign * count
+
+        # Forecast buckets per start month
+        for flag, offset in ((won, 0), (open_, 2)):
+            mask = flag & has_start
+            for month, total, count in _group_sums(start_month[mask], acv[mask]):
+                entry = self.forecast_by_month.setdefault(month, [0.0, 0, 0.0, 0])
+                entry[offset] += sign * total
+                entry[offset + 1] += sign * count
+
+        # Open pipeline per close day (ageing buckets)
+        mask = open_ & has_close
+        for day, total, count in _group_sums(close_day[mask], np.nan_to_num(acv[mask])):
+            entry = self.open_by_close_day.setdefault(day, [0.0, 0])
+            entry[0] += sign * total
+            entry[1] += sign * count
+
+    @classmethod
+    def build(cls, table, overdue_year=2025):
+        """Full computation of the state from a table"""
+        state = cls(overdue_year)
+        _, (state.row, *snapshot) = state._snapshot(table)
+        (state.ids, state.occurrence, state.status, state.acv,
+         state.close_day, state.start_day) = snapshot
+        state._apply_rows(*snapshot, sign=+1)
+        return state
+
+    def apply(self, table):
+        """
+        Bring the state up to date with a new snapshot of the data
+
+        Returns: ChangeSummary
+        """
+        unchanged_keys, snapshot = self._snapshot(table)
+        new_row, new_ids, new_occ, new_status, new_acv, new_close, new_start = snapshot
+
+        if unchanged_keys:
+            found, old_index = np.ones(len(new_ids), dtype=bool), np.arange(len(new_ids))
+        else:
+            found, old_index = match_keys(self.ids, new_ids, new_occ)
+
+        changed = np.zeros(len(new_ids), dtype=bool)
+        changed[found] = ((self.status[old_index] != new_status[found])
+                          | ~_same(self.acv[old_index], new_acv[found])
+                          | (self.close_day[old_index] != new_close[found])
+                          | (self.start_day[old_index] != new_start[found]))
+        added = ~found
+
+        seen = np.zeros(len(self.ids), dtype=bool)
+        seen[old_index] = True
+        outdated = ~seen
+        outdated[old_index[changed[found]]] = True
+
+        # Remove old contributions, then add the new ones (touched rows only)
+        self._apply_rows(self.ids[outdated], self.occurrence[outdated], self.status[outdated],
+                         self.acv[outdated], self.close_day[outdated], self.start_day[outdated], sign=-1)
+        fresh = changed | added
+        self._apply_rows(new_ids[fresh], new_occ[fresh], new_status[fresh], new_acv[fresh],
+                         new_close[fresh], new_start[fresh], sign=+1)
+
+        summary = ChangeSummary(added=int(added.sum()), removed=int((~seen).sum()),
+                                changed=int(changed.sum()),
+                                unchanged=int(found.sum() - changed.sum()))
+        self.row, self.ids, self.occurrence, self.status, self.acv, self.close_day, self.start_day = (
+            new_row, new_ids, new_occ, new_status, new_acv, new_close, new_start)
+        return summary
+
+    # -- persistence -------------------------------------------------------
+
+    def save(self, path):
+        """Write the state atomically to an .npz file"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(
+            tmp_path,
+            meta=np.array([STATE_FORMAT_VERSION, self.overdue_year], dtype=np.int64),
+            statuses=np.array(self.statuses, dtype=str),
+            row=self.row, ids=self.ids, occurrence=self.occurrence, status=self.status, acv=self.acv,
+            close_day=self.close_day, start_day=self.start_day,
+            overdue_ids=np.array([key[0] for key in sorted(self.overdue)], dtype=str),
+            overdue_occurrence=np.array([key[1] for key in sorted(self.overdue)], dtype=np.int32),
+            **_dict_arrays('won_by_year', self.won_by_year, 2),
+            **_dict_arrays('closed_by_month', self.closed_by_month, 2),
+            **_dict_arrays('forecast_by_month', self.forecast_by_month, 4),
+            **_dict_arrays('open_by_close_day', self.open_by_close_day, 2),
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Load a saved state, or return None if missing or incompatible"""
+        try:
+            data = np.load(path, allow_pickle=False)
+        except (OSError, ValueError):
+            return None
+        with data:
+            version, overdue_year = data['meta'].tolist()
+            if version != STATE_FORMAT_VERSION:
+                return None
+            state = cls(overdue_year)
+            state.statuses = data['statuses'].tolist()
+            state.row = data['row']
+            state.ids = data['ids']
+            state.occurrence = data['occurrence']
+            state.status = data['status']
+            state.acv = data['acv']
+            state.close_day = data['close_day']
+            state.start_day = data['start_day']
+            state.overdue = set(zip(data['overdue_ids'].tolist(), data['overdue_occurrence'].tolist()))
+            state.won_by_year = _arrays_dict(data, 'won_by_year', (float, int))
+            state.closed_by_month = _arrays_dict(data, 'closed_by_month', (int, int))
+            state.forecast_by_month = _arrays_dict(data, 'forecast_by_month', (float, int, float, int))
+            state.open_by_close_day = _arrays_dict(data, 'open_by_close_day', (float, int))
+        return state
+
+    # -- section results ---------------------------------------------------
+
+    def overdue_ids(self):
+        """Section 2 IDs in table row order, as the full validation lists them"""
+        return self.ids[self._overdue_rows()].astype(object)
+
+    def _overdue_rows(self):
+        """Store positions of the overdue keys, ordered by table row"""
+        if not self.overdue:
+            return np.array([], dtype=np.int64)
+        keys = list(self.overdue)
+        ids = np.array([key[0] for key in keys], dtype=str)
+        occurrence = np.array([key[1] for key in keys], dtype=np.int64)
+        positions = np.searchsorted(self.ids, ids) + occurrence
+        return positions[np.argsort(self.row[positions], kind='stable')]
+
+    def ageing_buckets(self, as_of, buckets=DEFAULT_AGEING_BUCKETS):
+        """Count and ACV of Open deals per ageing bucket on `as_of` (as OpenDealIndex.ageing_buckets)"""
+        days = np.array(sorted(day for day, (_, count) in self.open_by_close_day.items() if count),
+                        dtype=np.int64)
+        acv_prefix = np.concatenate([[0.0], np.cumsum([self.open_by_close_day[day][0] for day in days.tolist()])])
+        count_prefix = np.concatenate([[0], np.cumsum([self.open_by_close_day[day][1] for day in days.tolist()],
+                                                      dtype=np.int64)])
+        upper = np.searchsorted(days, [to_day(as_of) - m for _, m in buckets], side='right')
+        lower = np.append(upper[1:], 0)
+        return {
+            label: {'count': int(count_prefix[hi] - count_prefix[lo]), 'acv': float(acv_prefix[hi] - acv_prefix[lo])}
+            for (label, _), lo, hi in zip(buckets, lower, upper)
+        }
+
+    def won_acv(self, year=2026):
+        """Section 3: (ACV total, deal count) of Won deals starting in `year`"""
+        total, count = self.won_by_year.get(year, (0.0, 0))
+        return total, count
+
+    def month_forecast(self, year=2026, month=3, open_probability=0.25):
+        """Section 4: (total expected ACV, won ACV, won count, open ACV, open count)"""
+        won_acv, won_count, open_acv, open_count = self.forecast_by_month.get(
+            (year - 1970) * 12 + month - 1, (0.0, 0, 0.0, 0))
+        return won_acv + open_acv * open_probability, won_acv, won_count, open_acv, open_count
+
+    def monthly_win_rates(self, year=2025):
+        """Section 5: {month: {'won', 'total'}} for months with closed deals"""
+        monthly = {}
+        for month_index in sorted(self.closed_by_month):
+            won, total = self.closed_by_month[month_index]
+            entry_year, month = _year_month(month_index)
+            if entry_year == year and total > 0:
+                monthly[month] = {'won': won, 'total': total}
+        return monthly
+
+    def section_results(self, today=None):
+        """
+        Build Section 2-5 result records from the aggregates
+
+        `today` (date or 'YYYY-MM-DD') is the reference date of the
+        truly-overdue count (default: the current date).
+
+        Returns: dict {section key: ResultRecord} as DataValidator produces
+        """
+        today_day = to_day(today or date.today())
+        overdue = self.overdue_ids()
+        overdue_days = self.close_day[self._overdue_rows()]
+        won_acv, won_count = self.won_acv(2026)
+        total_expected, won_march, won_march_count, open_march, open_march_count = self.month_forecast(2026, 3, 0.25)
+        monthly = self.monthly_win_rates(2025)
+        months = np.array(sorted(monthly), dtype=np.int8)
+        won = np.array([monthly[m]['won'] for m in months], dtype=np.int64)
+        total = np.array([monthly[m]['total'] for m in months], dtype=np.int64)
+        total_deals, total_won = int(total.sum()), int(won.sum())
+
+        return {
+            'section2': OverdueDealsResult(
+                expected_count=len(overdue), expected_ids=overdue,
+                truly_overdue=int((overdue_days <= today_day).sum()),
+                as_of=str(np.datetime64(today_day, 'D')),
+                ageing=self.ageing_buckets(today_day)),
+            'section3': WonAcvResult(
+                expected_acv=won_acv, deal_count=won_count,
+                avg_deal_size=won_acv / won_count if won_count > 0 else 0),
+            'section4': ForecastResult(
+                won_acv=won_march, won_count=won_march_count,
+                open_expected_acv=open_march * 0.25, open_count=open_march_count,
+                total_expected=total_expected),
+            'section5': WinRateResult(
+                months=months, won=won, total=total,
+                overall_win_rate=total_won / total_deals * 100 if total_deals > 0 else 0,
+                total_deals=total_deals, total_won=total_won),
+        }
+
+
+def sorted_keys(ids):
+    """
+    Sort an ID column and number repeated IDs
+
+    Returns: (order, sorted ids as str, occurrence) where row order[i] has
+             the key (ids[i], occurrence[i])
+    """
+    ids = np.asarray(ids.decode() if hasattr(ids, 'decode') else ids, dtype=str)
+    order = np.argsort(ids, kind='stable')
+    ids = ids[order]
+    return order, ids, _occurrence(ids)
+
+
+def match_keys(store_ids, ids, occurrence):
+    """
+    Locate (ID, occurrence) keys in a store of keys sorted by sorted_keys()
+
+    The n-th occurrence of an ID sits n rows after its first one, so each
+    key is found with one vectorized binary search.
+
+    Returns: (found mask over the keys, store positions of the found keys)
+    """
+    if not len(store_ids):
+        return np.zeros(len(ids), dtype=bool), np.array([], dtype=np.int64)
+    position = np.searchsorted(store_ids, ids) + occurrence
+    clipped = np.minimum(position, len(store_ids) - 1)
+    found = (position < len(store_ids)) & (store_ids[clipped] == ids)
+    return found, clipped[found]
+
+
+def _occurrence(sorted_ids):
+    """0-based occurrence number of each ID within its run of equal IDs"""
+    positions = np.arange(len(sorted_ids))
+    if not len(sorted_ids):
+        return positions.astype(np.int32)
+    run_start = np.ones(len(sorted_ids), dtype=bool)
+    run_start[1:] = sorted_ids[1:] != sorted_ids[:-1]
+    return (positions - np.maximum.accumulate(np.where(run_start, positions, 0))).astype(np.int32)
+
+
+def _same(a, b):
+    return (a == b) | (np.isnan(a) & np.isnan(b))
+
+
+def _group_sums(keys, values):
+    """Yield (key, sum of values, count) per distinct key"""
+    if not len(keys):
+        return []
+    unique, inverse = np.unique(keys, return_inverse=True)
+    sums = np.bincount(inverse, weights=values, minlength=len(unique))
+    counts = np.bincount(inverse, minlength=len(unique))
+    return zip(unique.tolist(), sums.tolist(), counts.tolist())
+
+
+def _dict_arrays(name, mapping, width):
+    keys = sorted(mapping)
+    values = np.array([mapping[k] for k in keys], dtype=np.float64).reshape(len(keys), width)
+    return {f'{name}_keys': np.array(keys, dtype=np.int64), f'{name}_values': values}
+
+
+def _arrays_dict(data, name, types):
+    return {int(key): [cast(v) for cast, v in zip(types, row)]
+            for key, row in zip(data[f'{name}_keys'], data[f'{name}_values'])}
+
+
+def update_state(table, state_path, overdue_year=2025):
+    """
+    Load the state at `state_path`, apply `table` and save it again
+
+    A missing or incompatible state is rebuilt with a full computation.
+
+    Returns: (state, ChangeSummary or None when the state was rebuilt)
+    """
+    state = IncrementalState.load(state_path)
+    if state is None or state.overdue_year != overdue_year:
+        state = IncrementalState.build(table, overdue_year)
+        summary = None
+    else:
+        summary = state.apply(table)
+    state.save(state_path)
+    return state, summary
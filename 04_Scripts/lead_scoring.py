@@ -0,0 +1,329 @@
+"""
+lead_scoring.py - Vectorized composite lead-quality scoring (Plan 2.2)
+
+The Composite Quality Score (0-100) weights a deal's ACV at 60% and its
+product's historical win rate at 40%. Both inputs are turned into
+percentile ranks, as in 02_Lead_Segmentation_Metrics.ipynb, so the score
+reads as "better than x% of the pipeline".
+
+- Product win rates are counted over all closed deals (Won / Won + Lost)
+  with one bincount over the product codes. score_leads, get_lead_scores
+  and the Monte Carlo forecast take them from one process-wide
+  ProductWinRateCache (get_win_rate_cache()), which answers repeated
+  requests for the same (immutable) table without any work; a new table,
+  e.g. after a reload, is hashed once and only recounted when the closed
+  deals' (product, outcome) pairs changed.
+- Percentile ranks (ties share their average rank) come from one
+  np.unique pass, so millions of Open deals are scored without Python loops.
+- Top-K "Gold" selection uses np.argpartition in memory, or a bounded
+  min-heap (TopK) when deals are scored chunk by chunk; neither sorts the
+  full pipeline.
+
+Author: Svitlana Kovalivska
+Purpose: Importable lead scoring for prioritising the open pipeline
+"""
+
+import hashlib
+import heapq
+import threading
+
+import numpy as np
+
+from close_date_index import to_day
+
+DEFAULT_WEIGHTS = {'acv': 0.6, 'win_rate': 0.4}
+
+# (tier, minimum score quantile) from best to worst
+PRIORITY_TIERS = (('Platinum', 0.95), ('Gold', 0.90), ('Silver', 0.75), ('Bronze', 0.0))
+
+
+def percentile_ranks(values):
+    """
+    Percentile rank in (0, 1] of every value, ties sharing their average rank
+
+    Equivalent to pandas Series.rank(pct=True); NaN values get rank 0.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    ranks = np.zeros(len(values))
+    valid = ~np.isnan(values)
+    n = int(valid.sum())
+    if not n:
+        return ranks
+    unique, inverse, counts = np.unique(values[valid], return_inverse=True, return_counts=True)
+    below = np.cumsum(counts) - counts
+    ranks[valid] = (below + (counts + 1) / 2)[inverse] / n
+    return ranks
+
+
+class ProductWinRates:
+    """
+    Historical win rate per product over closed deals
+
+    Attributes:
+        products (list): Product names
+        won, closed (int arrays): Won and Won+Lost counts per product
+        fallback (float): Rate used for products without closed deals or
+                          deals without a product (mean of product rates)
+        fingerprint (str): Digest of the closed deals the rates came from
+    """
+
+    def __init__(self, products, won, closed, fingerprint=None):
+        self.products = list(products)
+        self.won = won
+        self.closed = closed
+        self.fingerprint = fingerprint
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self.rates = np.where(closed > 0, won / np.maximum(closed, 1), np.nan)
+        observed = self.rates[~np.isnan(self.rates)]
+        self.fallback = float(observed.mean()) if len(observed) else 0.0
+        self._lookup = {name: position for position, name in enumerate(self.products)}
+
+    @classmethod
+    def build(cls, table, won_status='Won', lost_status='Lost', fingerprint=None):
+        """Count won/closed deals per product in one grouped pass"""
+        products = table.products
+        won = table.statuses == won_status
+        closed = won | (table.statuses == lost_status)
+        has_product = products.codes >= 0
+        codes = products.codes.astype(np.int64)
+        n = len(products.categories)
+        return cls([str(c) for c in products.categories],
+                   np.bincount(codes[won & has_product], minlength=n),
+                   np.bincount(codes[closed & has_product], minlength=n),
+                   fingerprint or closed_deals_fingerprint(table, won_status, lost_status))
+
+    def rate(self, product):
+        """Win rate of one product (fallback if unknown)"""
+        position = self._lookup.get(product)
+        if position is None or np.isnan(self.rates[position]):
+            return self.fallback
+        return float(self.rates[position])
+
+    def row_rates(self, table, rows=None):
+        """Win rate of every row's product (or of the selected rows)"""
+        products = table.products
+        by_code = np.array([self.rate(str(c)) for c in products.categories] + [self.fallback])
+        codes = products.codes if rows is None else products.codes[rows]
+        return by_code[codes]
+
+    def to_dict(self):
+        return {name: self.rate(name) for name in self.products}
+
+
+def closed_deals_fingerprint(table, won_status='Won', lost_status='Lost'):
+    """Digest of the (product, outcome) pairs of all closed deals"""
+    won = table.statuses == won_status
+    closed = won | (table.statuses == lost_status)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update('\x1f'.join(str(c) for c in table.products.categories).encode())
+    digest.update(np.ascontiguousarray(table.products.codes[closed]).tobytes())
+    digest.update(np.packbits(won[closed]).tobytes())
+    return digest.hexdigest()
+
+
+class ProductWinRateCache:
+    """
+    Keeps the last ProductWinRates and rebuilds it only when closed deals change
+
+    The table the rates were last served for is remembered, so asking again
+    for the same table is a hit without hashing; the closed-deals digest is
+    only computed for a table the cache has not seen.
+
+    Attributes:
+        builds (int): Number of times the rates were counted
+        hits (int): Number of requests served from the cache
+    """
+
+    def __init__(self):
+        self.win_rates = None
+        self.builds = 0
+        self.hits = 0
+        self._table = None
+        self._statuses = None
+        self._lock = threading.Lock()
+
+    def get(self, table, won_status='Won', lost_status='Lost'):
+        statuses = (won_status, lost_status)
+        with self._lock:
+            if self.win_rates is not None and self._statuses == statuses:
+                if table is self._table:
+                    self.hits += 1
+                    return self.win_rates
+                fingerprint = closed_deals_fingerprint(table, won_status, lost_status)
+                if self.win_rates.fingerprint == fingerprint:
+                    self._table = table
+                    self.hits += 1
+                    return self.win_rates
+            else:
+                fingerprint = closed_deals_fingerprint(table, won_status, lost_status)
+            self.win_rates = ProductWinRates.build(table, won_status, lost_status, fingerprint)
+            self._table = table
+            self._statuses = statuses
+            self.builds += 1
+            return self.win_rates
+
+
+_win_rate_cache = ProductWinRateCache()
+
+
+def get_win_rate_cache():
+    """Return the process-wide product win-rate cache"""
+    return _win_rate_cache
+
+
+class LeadScores:
+    """
+    Composite scores of the scored deals
+
+    Attributes:
+        rows (int array): Table rows that were scored
+        scores (float array): Composite Quality Score 0-100
+        acv_score, win_rate_score (float arrays): Percentile-rank components 0-100
+        win_rates (float array): Product win rate of each deal
+    """
+
+    __slots__ = ('rows', 'scores', 'acv_score', 'win_rate_score', 'win_rates')
+
+    def __init__(self, rows, scores, acv_score, win_rate_score, win_rates):
+        self.rows = rows
+        self.scores = scores
+        self.acv_score = acv_score
+        self.win_rate_score = win_rate_score
+        self.win_rates = win_rates
+
+    def __len__(self):
+        return len(self.rows)
+
+    def top_k(self, k):
+        """
+        Positions of the k best-scored deals, best first
+
+        np.argpartition selects them in O(n); only the k winners are sorted.
+        """
+        k = min(k, len(self.scores))
+        if k <= 0:
+            return np.array([], dtype=np.int64)
+        candidates = np.argpartition(-self.scores, k - 1)[:k]
+        return candidates[np.lexsort((self.rows[candidates], -self.scores[candidates]))]
+
+    def top_rows(self, k):
+        """Table rows of the k best-scored deals, best first"""
+        return self.rows[self.top_k(k)]
+
+    def thresholds(self, tiers=PRIORITY_TIERS):
+        """Minimum score per tier (score quantiles of the scored deals)"""
+        if not len(self.scores):
+            return {name: np.nan for name, _ in tiers}
+        return {name: float(np.quantile(self.scores, q)) for name, q in tiers}
+
+    def priorities(self, tiers=PRIORITY_TIERS):
+        """Tier name of every scored deal (Platinum / Gold / Silver / Bronze)"""
+        names = np.array([name for name, _ in tiers][::-1], dtype=object)
+        cutoffs = np.array(list(self.thresholds(tiers).values())[::-1][1:])
+        return names[np.searchsorted(cutoffs, self.scores, side='right')]
+
+
+def score_leads(table, weights=None, status='Open', active_as_of=None, win_rates=None, rows=None):
+    """
+    Score the deals of `status` with the Composite Quality Score
+
+    Args:
+        table (OpportunityTable): Compact opportunity table
+        weights (dict): {'acv': w, 'win_rate': w} (default 60% / 40%)
+        status (str): Status of the deals to score (None = all rows)
+        active_as_of: Skip "zombie" deals whose CloseDate is before this date
+        win_rates (ProductWinRates): Product win rates (default: from the win-rate cache)
+        rows (int array): Explicit rows to score (overrides status/active_as_of)
+
+    Returns: LeadScores
+    """
+    weights = dict(DEFAULT_WEIGHTS, **(weights or {}))
+    win_rates = win_rates or _win_rate_cache.get(table)
+    if rows is None:
+        mask = np.ones(len(table), dtype=bool) if status is None else (table.statuses == status)
+        if active_as_of is not None:
+            mask &= table.close_days >= to_day(active_as_of)
+        rows = np.flatnonzero(mask)
+
+    deal_rates = win_rates.row_rates(table, rows)
+    acv_score = percentile_ranks(np.asarray(table.acvs, dtype=np.float64)[rows]) * 100
+    win_rate_score = percentile_ranks(deal_rates) * 100
+    scores = weights['acv'] * acv_score + weights['win_rate'] * win_rate_score
+    return LeadScores(rows, scores, acv_score, win_rate_score, deal_rates)
+
+
+class TopK:
+    """
+    Bounded min-heap of the k best (score, key) pairs seen so far
+
+    For scoring chunk by chunk: each push_many() only hands the heap the
+    scores that beat its current minimum, so most of a chunk is discarded
+    with one vectorized comparison. TopK objects over different chunks can
+    be merged.
+    """
+
+    def __init__(self, k):
+        self.k = k
+        self._heap = []
+
+    def push_many(self, scores, keys):
+        scores = np.asarray(scores, dtype=np.float64)
+        if len(self._heap) >= self.k:
+            keep = np.flatnonzero(scores > self._heap[0][0])
+        else:
+            keep = np.arange(len(scores))
+        if len(keep) > self.k:
+            keep = keep[np.argpartition(-scores[keep], self.k - 1)[:self.k]]
+        for position in keep:
+            item = (float(scores[position]), keys[position])
+            if len(self._heap) < self.k:
+                heapq.heappush(self._heap, item)
+            elif item[0] > self._heap[0][0]:
+                heapq.heapreplace(self._heap, item)
+        return self
+
+    def merge(self, other):
+        for score, key in other._heap:
+            self.push_many([score], [key])
+        return self
+
+    def result(self):
+        """[(score, key)] best first"""
+        return sorted(self._heap, key=lambda item: -item[0])
+
+
+def get_lead_scores(dataset):
+    """Default Composite Quality Scores of a dataset's Open deals, built once per load"""
+    return dataset.derived('lead_scores', score_leads)
+
+
+if __name__ == "__main__":
+    """
+    Print product win rates, tier thresholds and the top Gold opportunities
+    """
+    import argparse
+
+    from dataset_session import get_dataset
+
+    parser = argparse.ArgumentParser(description="Composite lead-quality scores of the open pipeline")
+    parser.add_argument('--top', type=int, default=10, help="number of opportunities to list")
+    parser.add_argument('--active-as-of', help="skip Open deals whose CloseDate is before this date")
+    args = parser.parse_args()
+
+    table = get_dataset().table
+    win_rates = get_win_rate_cache().get(table)
+    leads = score_leads(table, active_as_of=args.active_as_of, win_rates=win_rates)
+
+    print("🎯 COMPOSITE QUALITY SCORE (60% ACV rank + 40% product win-rate rank)")
+    print("=" * 70)
+    for product, rate in win_rates.to_dict().items():
+        print(f"   • {product}: {rate:.1%}")
+    print(f"\n📊 Scored open deals: {len(leads)}")
+    for tier, cutoff in leads.thresholds().items():
+        print(f"   • {tier}: score ≥ {cutoff:.1f}")
+
+    print(f"\n🏆 TOP {args.top} OPPORTUNITIES")
+    for position in leads.top_k(args.top):
+        row = leads.rows[position]
+        print(f"   {table.ids[row]:<16} {str(table.products[row]):<12} ${table.acvs[row]:>10,.0f}  "
+              f"score {leads.scores[position]:5.1f}")
@@ -0,0 +1,366 @@
+"""
+metrics_server.py - Warm local metrics service with hot reload
+
+Every script pays a cold start: interpreter, pandas, workbook load,
+compute. This daemon loads opportunities.xlsx once, keeps the dataset and
+its derived indexes in memory and answers over a local HTTP/JSON API
+(ThreadingHTTPServer, one thread per request):
+
+    GET /health                  dataset version, rows, reloads, last error
+    GET /sections                Section 1-5 results
+    GET /sections/N              one section
+    GET /validation              pass/fail per section and data integrity
+    GET /metrics?...             sliced metrics (deals, ACV, win rate)
+          filters: status, product, customer, close_year, close_month,
+                   start_year, start_month, close_from, close_to, acv_min,
+                   acv_max; group_by=product|status|customer
+    GET /forecast                probability-weighted forward curve
+
+A watcher thread polls the workbook's (mtime, size). When the file has
+changed and then stayed the same for one poll interval, a new dataset is
+loaded and warmed (dates, indexes, validation) on that thread. It then
+replaces the served dataset in a single reference assignment. Each request
+reads the reference once, so it sees either the old or the new dataset,
+never a mixture. If a reload fails, the old dataset stays in service.
+
+Usage: python metrics_server.py [--port 8765] [--poll 2] [--workbook PATH]
+
+Author: Svitlana Kovalivska
+Purpose: Millisecond answers for dashboards and repeated questions
+"""
+
+import json
+import math
+import threading
+import time
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from data_cache import DEFAULT_EXCEL_FILE
+from dataset_session import DatasetSession, get_session
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_POLL_INTERVAL = 2.0
+
+# /metrics query parameter -> value type
+SLICE_FILTERS = {
+    'status': str, 'product': str, 'customer': str,
+    'close_year': int, 'close_month': int, 'start_year': int, 'start_month': int,
+    'close_from': str, 'close_to': str, 'acv_min': float, 'acv_max': float,
+}
+GROUP_COLUMNS = {'product': 'products', 'status': 'statuses', 'customer': 'customers'}
+
+
+class _PinnedSession:
+    """Session stand-in that hands DataValidator one specific dataset"""
+
+    def __init__(self, dataset):
+        self.dataset = dataset
+
+    def get(self, excel_file=None):
+        return self.dataset
+
+
+def parse_as_of(value):
+    """'YYYY-MM-DD' of a client-supplied as-of date (None = today); ValueError if malformed"""
+    if not value:
+        return date.today().isoformat()
+    try:
+        return date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise ValueError(f"as_of must be a date in YYYY-MM-DD format, got {value!r}") from None
+
+
+def validation_results(dataset, as_of=None):
+    """
+    DataValidator results for `dataset` on `as_of` (default: today)
+
+    Results for the current date are computed once per dataset; other dates
+    are computed per request so clients cannot grow the cache without bound.
+    """
+    from validation import DataValidator
+
+    as_of = parse_as_of(as_of)
+
+    def run(table):
+        validator = DataValidator(dataset.path, session=_PinnedSession(dataset), quiet=True, as_of=as_of)
+        results = validator.run_comprehensive_validation()
+        results['data_integrity'] = validator.validate_data_integrity()
+        return results
+
+    if as_of != date.today().isoformat():
+        return run(dataset.table)
+    return dataset.derived(('validation', as_of), run)
+
+
+def slice_predicate(params):
+    """Combine /metrics query parameters into one predicate (None = all rows)"""
+    import predicates
+
+    unknown = set(params) - set(SLICE_FILTERS) - {'group_by', 'as_of'}
+    if unknown:
+        raise ValueError(f"Unknown filter(s): {', '.join(sorted(unknown))}")
+    values = {name: SLICE_FILTERS[name](params[name]) for name in SLICE_FILTERS if name in params}
+
+    parts = []
+    for name, constructor in (('status', predicates.status), ('product', predicates.product),
+                              ('customer', predicates.customer)):
+        if name in values:
+            parts.append(constructor(values[name]))
+    for field in ('close', 'start'):
+        if f'{field}_month' in values:
+            if f'{field}_year' not in values:
+                raise ValueError(f"{field}_month requires {field}_year")
+            parts.append(predicates.month(field, values[f'{field}_year'], values[f'{field}_month']))
+        elif f'{field}_year' in values:
+            parts.append(predicates.year(field, values[f'{field}_year']))
+    if 'close_from' in values or 'close_to' in values:
+        parts.append(predicates.between('close', values.get('close_from'), values.get('close_to')))
+    if 'acv_min' in values or 'acv_max' in values:
+        parts.append(predicates.acv_between(values.get('acv_min'), values.get('acv_max')))
+
+    if not parts:
+        return None
+    return parts[0] if len(parts) == 1 else predicates.AllOf(*parts)
+
+
+class MetricsService:
+    """
+    Holds the served dataset and swaps in rebuilt ones when the workbook changes
+
+    Attributes:
+        dataset (OpportunityDataset): Dataset currently served
+        reloads (int): Number of successful hot reloads
+        last_error (str): Error of the last failed reload (None if it succeeded)
+
+    Datasets come from the process-wide session (get_session()) unless a
+    separate DatasetSession is passed in.
+    """
+
+    def __init__(self, excel_file=DEFAULT_EXCEL_FILE, poll_interval=DEFAULT_POLL_INTERVAL, session=None):
+        self.session = session or get_session()
+        self.poll_interval = poll_interval
+        self.reloads = 0
+        self.last_error = None
+        self.loaded_at = None
+        self._stop = threading.Event()
+        self._watcher = None
+        self.dataset = self._warm(self.session.get(excel_file))
+        self.loaded_at = time.time()
+
+    def _warm(self, dataset):
+        """Build the derived structures requests rely on before the dataset is served"""
+        from close_date_index import get_open_deal_index
+        from forecast_cube import get_forecast_cube
+
+        dataset.dates
+        get_open_deal_index(dataset)
+        get_forecast_cube(dataset)
+        validation_results(dataset)
+        return dataset
+
+    # -- hot reload ----------------------------------------------------------
+
+    def check_for_changes(self):
+        """
+        Reload and swap the dataset if the workbook changed
+
+        Returns: True if a new dataset is now served
+        """
+        path = self.dataset.path
+        signature = DatasetSession.file_signature(path)
+        if signature is None:
+            return False
+        try:
+            dataset, reloaded = self.session.refresh(path)
+            if not reloaded:
+                return False
+            self.dataset = self._warm(dataset)
+        except Exception as e:
+            self.last_error = f"{type(e).__name__}: {e}"
+            return False
+        self.loaded_at = time.time()
+        self.reloads += 1
+        self.last_error = None
+        return True
+
+    def _watch(self):
+        pending = None
+        while not self._stop.wait(self.poll_interval):
+            signature = DatasetSession.file_signature(self.dataset.path)
+            # Wait until the file stays the same for one interval (writers may still be saving)
+            if signature != pending:
+                pending = signature
+                continue
+            self.check_for_changes()
+
+    def start_watching(self):
+        if self._watcher is None:
+            self._watcher = threading.Thread(target=self._watch, name='workbook-watcher', daemon=True)
+            self._watcher.start()
+
+    def stop(self):
+        self._stop.set()
+
+    # -- queries -------------------------------------------------------------
+
+    def health(self):
+        dataset = self.dataset
+        return {
+            'status': 'ok',
+            'path': dataset.path,
+            'version': dataset.version,
+            'rows': len(dataset),
+            'loaded_at': self.loaded_at,
+            'reloads': self.reloads,
+            'last_error': self.last_error,
+        }
+
+    def sections(self, as_of=None):
+        from report_writer import results_to_dict
+
+        dataset = self.dataset
+        results = validation_results(dataset, as_of)
+        sections = {key: value for key, value in results.items() if key.startswith('section')}
+        return dict(results_to_dict(sections), version=dataset.version)
+
+    def validation(self, as_of=None):
+        from report_writer import results_to_dict
+
+        dataset = self.dataset
+        results = validation_results(dataset, as_of)
+        sections = {key: bool(value.passed) for key, value in results.items()
+                    if key.startswith('section') and hasattr(value, 'passed')}
+        return {
+            'version': dataset.version,
+            'all_passed': bool(sections) and all(sections.values()) and 'error' not in results,
+            'sections': sections,
+            'error': results.get('error'),
+            'data_integrity': results_to_dict({'data_integrity': results['data_integrity']})['data_integrity'],
+        }
+
+    def metrics(self, params):
+        from predicates import ColumnEquals, Query
+
+        dataset = self.dataset
+        query = Query(dataset)
+        predicate = slice_predicate(params)
+        result = {'version': dataset.version, 'filters': params, 'total': query.summary(predicate)}
+        group_by = params.get('group_by')
+        if group_by:
+            if group_by not in GROUP_COLUMNS:
+                raise ValueError(f"group_by must be one of: {', '.join(GROUP_COLUMNS)}")
+            column = GROUP_COLUMNS[group_by]
+            groups = {}
+            for name in getattr(dataset.table, column).categories:
+                group = ColumnEquals(column, name)
+                groups[str(name)] = query.summary(group if predicate is None else predicate & group)
+            result['groups'] = groups
+        return result
+
+    def forecast(self):
+        from forecast_cube import get_forecast_cube
+
+        dataset = self.dataset
+        curve = get_forecast_cube(dataset).forward_curve()
+        return {'version': dataset.version,
+                'months': [{'month': f"{year}-{month:02d}", 'expected_acv': value} for year, month, value in curve]}
+
+
+def _json_safe(value):
+    """Replace NaN/inf (e.g. win rate of an empty slice) with None for strict JSON clients"""
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: _json_safe(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(item) for item in value]
+    return value
+
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    """JSON GET handler; self.server.service is the MetricsService"""
+
+    server_version = 'RevOpsMetrics/1.0'
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+    def _send(self, status, payload):
+        body = json.dumps(_json_safe(payload), default=str).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        parts = [part for part in url.path.split('/') if part]
+        service = self.server.service
+        try:
+            if parts == ['health']:
+                payload = service.health()
+            elif parts == ['sections']:
+                payload = service.sections(params.get('as_of'))
+            elif len(parts) == 2 and parts[0] == 'sections':
+                sections = service.sections(params.get('as_of'))
+                key = f"section{parts[1]}"
+                if key not in sections:
+                    return self._send(404, {'error': f"Unknown section {parts[1]!r} (1-5)"})
+                payload = {key: sections[key], 'version': sections['version']}
+            elif parts == ['validation']:
+                payload = service.validation(params.get('as_of'))
+            elif parts == ['metrics']:
+                payload = service.metrics(params)
+            elif parts == ['forecast']:
+                payload = service.forecast()
+            else:
+                return self._send(404, {'error': f"Unknown endpoint {url.path}",
+                                        'endpoints': ['/health', '/sections', '/sections/N', '/validation',
+                                                      '/metrics', '/forecast']})
+        except (ValueError, KeyError) as e:
+            return self._send(400, {'error': str(e)})
+        except Exception as e:
+            return self._send(500, {'error': f"{type(e).__name__}: {e}"})
+        self._send(200, payload)
+
+
+def make_server(service, host=DEFAULT_HOST, port=DEFAULT_PORT, quiet=False):
+    """ThreadingHTTPServer bound to host:port serving `service`"""
+    server = ThreadingHTTPServer((host, port), MetricsRequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    server.quiet = quiet
+    return server
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve RevOps metrics over a local HTTP/JSON API")
+    parser.add_argument('--workbook', default=DEFAULT_EXCEL_FILE)
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--poll', type=float, default=DEFAULT_POLL_INTERVAL,
+                        help="seconds between workbook change checks")
+    parser.add_argument('--quiet', action='store_true', help="do not log requests")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    service = MetricsService(args.workbook, args.poll)
+    service.start_watching()
+    server = make_server(service, args.host, args.port, args.quiet)
+    print(f"🚀 Serving {service.dataset.path} ({len(service.dataset)} rows, warmed in "
+          f"{time.perf_counter() - started:.1f}s) on http://{args.host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Metrics service stopped")
+    finally:
+        service.stop()
+        server.server_close()
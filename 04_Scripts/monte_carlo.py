@@ -0,0 +1,251 @@
+"""
+monte_carlo.py - Monte Carlo pipeline forecast with P10/P50/P90 per month
+
+Section 4 (and ForecastCube) value every Open deal at a fixed share of its
+ACV, which gives an expected value without a spread. This module draws a
+Bernoulli outcome for every Open deal in each scenario and adds the ACV of
+the deals won to the Won ACV of their start month. By default each deal
+wins with its product's historical win rate (lead_scoring.ProductWinRates,
+taken from the shared win-rate cache); a flat probability reproduces the
+Section 4 assumption.
+
+- Open deals are sorted by month once. A batch of scenarios is one
+  (scenarios x deals) draw whose month totals come from a single
+  np.add.reduceat, and batches are sized so that at most DRAW_BUDGET draws
+  are held at a time. Only the (scenarios x months) totals are kept.
+- Scenarios are split into fixed-size tasks, each seeded from its own
+  SeedSequence child. The tasks run on a process pool, and the results
+  are identical for any number of workers.
+
+Author: Svitlana Kovalivska
+Purpose: Revenue ranges (P10/P50/P90) for finance planning
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+DEFAULT_SCENARIOS = 100_000
+DEFAULT_PERCENTILES = (10, 50, 90)
+# Scenarios per seeded task; fixed so results do not depend on the worker count
+TASK_SCENARIOS = 10_000
+# Deal draws held in memory per batch (scenarios x open deals)
+DRAW_BUDGET = 4_000_000
+
+
+class SimulationModel:
+    """
+    Inputs of the simulation, laid out by month
+
+    Attributes:
+        first_month (int): Months since 1970-01 of the first month
+        won_acv (float array): Won ACV per month (fixed in every scenario)
+        open_acv, probability (arrays): Open deals sorted by month
+        segment_starts (int array): First open deal of each month that has open deals
+        segment_months (int array): Month offset of each of those segments
+    """
+
+    __slots__ = ('first_month', 'won_acv', 'open_acv', 'probability', 'segment_starts', 'segment_months')
+
+    def __init__(self, first_month, won_acv, open_acv, probability, segment_starts, segment_months):
+        self.first_month = first_month
+        self.won_acv = won_acv
+        self.open_acv = open_acv
+        self.probability = probability
+        self.segment_starts = segment_starts
+        self.segment_months = segment_months
+
+    @classmethod
+    def build(cls, table, win_rates=None, open_probability=None, probabilities=None,
+              date_field='start', open_status='Open', won_status='Won'):
+        """
+        Collect Won ACV per month and the Open deals with their win probability
+
+        Args:
+            table (OpportunityTable): Compact opportunity table
+            win_rates (ProductWinRates): Product win rates (default: lead_scoring's win-rate cache)
+            open_probability (float): Flat probability for every Open deal (e.g. 0.25)
+            probabilities (array): Probability per table row; overrides the above
+            date_field (str): 'start' (as Section 4) or 'close'
+        """
+        dates = getattr(table.dates, date_field)
+        months = (dates.year.astype(np.int64) - 1970) * 12 + dates.month.astype(np.int64) - 1
+        acvs = np.nan_to_num(np.asarray(table.acvs, dtype=np.float64))
+        won = (table.statuses == won_status) & dates.valid
+        is_open = (table.statuses == open_status) & dates.valid
+
+        used = won | is_open
+        if not used.any():
+            empty = np.zeros(0)
+            return cls(0, empty, empty, empty, np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+        first_month = int(months[used].min())
+        n_months = int(months[used].max()) - first_month + 1
+        won_acv = np.bincount(months[won] - first_month, weights=acvs[won], minlength=n_months)
+
+        rows = np.flatnonzero(is_open)
+        rows = rows[np.argsort(months[rows], kind='stable')]
+        if probabilities is not None:
+            probability = np.asarray(probabilities, dtype=np.float64)[rows]
+        elif open_probability is not None:
+            probability = np.full(len(rows), float(open_probability))
+        else:
+            if win_rates is None:
+                from lead_scoring import get_win_rate_cache
+                win_rates = get_win_rate_cache().get(table, won_status)
+            probability = win_rates.row_rates(table, rows)
+
+        offsets = months[rows] - first_month
+        segment_starts = np.flatnonzero(np.diff(offsets, prepend=-1))
+        return cls(first_month, won_acv, acvs[rows], np.clip(probability, 0.0, 1.0),
+                   segment_starts, offsets[segment_starts])
+
+    @property
+    def n_months(self):
+        return len(self.won_acv)
+
+    def expected(self):
+        """Analytic mean revenue per month"""
+        mean = self.won_acv.copy()
+        if len(self.open_acv):
+            mean[self.segment_months] += np.add.reduceat(self.open_acv * self.probability, self.segment_starts)
+        return mean
+
+    def simulate(self, scenarios, rng):
+        """Month totals (scenarios x months) drawn with `rng`, batch by batch"""
+        totals = np.tile(self.won_acv, (scenarios, 1))
+        n_open = len(self.open_acv)
+        if not n_open:
+            return totals
+        batch = max(1, DRAW_BUDGET // n_open)
+        threshold = self.probability.astype(np.float32)
+        for start in range(0, scenarios, batch):
+            size = min(batch, scenarios - start)
+            wins = rng.random((size, n_open), dtype=np.float32) < threshold
+            revenue = np.where(wins, self.open_acv, 0.0)
+            totals[start:start + size, self.segment_months] += np.add.reduceat(revenue, self.segment_starts, axis=1)
+        return totals
+
+
+def _simulate_task(model, scenarios, seed_sequence):
+    return model.simulate(scenarios, np.random.default_rng(seed_sequence))
+
+
+class ForecastDistribution:
+    """
+    Simulated revenue per month
+
+    Attributes:
+        first_month (int): Months since 1970-01 of the first column
+        totals (2-D array): Revenue per (scenario, month)
+        expected (float array): Analytic mean per month
+    """
+
+    def __init__(self, first_month, totals, expected):
+        self.first_month = first_month
+        self.totals = totals
+        self.expected = expected
+
+    @property
+    def scenarios(self):
+        return self.totals.shape[0]
+
+    def months(self):
+        """(year, month) of every column"""
+        return [((self.first_month + offset) // 12 + 1970, (self.first_month + offset) % 12 + 1)
+                for offset in range(self.totals.shape[1])]
+
+    def _column(self, year, month):
+        offset = (year - 1970) * 12 + month - 1 - self.first_month
+        return offset if 0 <= offset < self.totals.shape[1] else None
+
+    def range_totals(self, start, end):
+        """Simulated revenue per scenario over months [start, end] inclusive ((year, month) bounds)"""
+        lo = max((start[0] - 1970) * 12 + start[1] - 1 - self.first_month, 0)
+        hi = min((end[0] - 1970) * 12 + end[1] - self.first_month, self.totals.shape[1])
+        if hi <= lo:
+            return np.zeros(self.scenarios)
+        return self.totals[:, lo:hi].sum(axis=1)
+
+    def month_percentiles(self, year, month, percentiles=DEFAULT_PERCENTILES):
+        """{'P10': ..., 'P50': ..., 'P90': ..., 'mean': ...} for one month"""
+        column = self._column(year, month)
+        values = self.totals[:, column] if column is not None else np.zeros(self.scenarios)
+        return _percentile_dict(values, percentiles)
+
+    def monthly_percentiles(self, percentiles=DEFAULT_PERCENTILES):
+        """List of (year, month, {'P10', 'P50', 'P90', 'mean'}) for every month"""
+        quantiles = np.percentile(self.totals, percentiles, axis=0)
+        means = self.totals.mean(axis=0)
+        return [(year, month, dict({f"P{p}": float(q) for p, q in zip(percentiles, quantiles[:, offset])},
+                                   mean=float(means[offset])))
+                for offset, (year, month) in enumerate(self.months())]
+
+
+def _percentile_dict(values, percentiles):
+    quantiles = np.percentile(values, percentiles)
+    return dict({f"P{p}": float(q) for p, q in zip(percentiles, quantiles)}, mean=float(values.mean()))
+
+
+def simulate_forecast(table, scenarios=DEFAULT_SCENARIOS, seed=42, max_workers=None, **model_options):
+    """
+    Simulate `scenarios` pipeline outcomes
+
+    Scenarios are split into tasks of TASK_SCENARIOS, each with its own
+    child of SeedSequence(seed), and run on a process pool (max_workers=1
+    runs in-process). The same seed gives the same result with any number
+    of workers.
+
+    Args:
+        model_options: Passed to SimulationModel.build (win_rates,
+                       open_probability, probabilities, date_field, ...)
+
+    Returns: ForecastDistribution
+    """
+    model = SimulationModel.build(table, **model_options)
+    sizes = [min(TASK_SCENARIOS, scenarios - start) for start in range(0, scenarios, TASK_SCENARIOS)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    workers = min(max_workers or os.cpu_count() or 1, max(len(sizes), 1))
+    if workers <= 1:
+        parts = [_simulate_task(model, size, child) for size, child in zip(sizes, seeds)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_simulate_task, [model] * len(sizes), sizes, seeds))
+    totals = np.concatenate(parts) if parts else np.zeros((0, model.n_months))
+    return ForecastDistribution(model.first_month, totals, model.expected())
+
+
+if __name__ == "__main__":
+    """
+    Print monthly P10/P50/P90 revenue: python monte_carlo.py [--scenarios N] [--flat 0.25] [--workers N]
+    """
+    import argparse
+    import time
+
+    from dataset_session import get_dataset
+
+    parser = argparse.ArgumentParser(description="Monte Carlo pipeline forecast")
+    parser.add_argument('--scenarios', type=int, default=DEFAULT_SCENARIOS)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--flat', type=float, default=None,
+                        help="flat win probability for Open deals instead of product win rates")
+    parser.add_argument('--from', dest='start', default=None, help="first month to print (YYYY-MM)")
+    parser.add_argument('--to', dest='end', default=None, help="last month to print (YYYY-MM)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    forecast = simulate_forecast(get_dataset().table, args.scenarios, args.seed, args.workers,
+                                 open_probability=args.flat)
+    elapsed = time.perf_counter() - started
+
+    source = f"flat {args.flat:.0%}" if args.flat is not None else "product win rates"
+    print(f"🎲 MONTE CARLO FORECAST ({forecast.scenarios:,} scenarios, {source}, {elapsed:.1f}s)")
+    print("=" * 78)
+    print(f"{'Month':<10} {'P10':>16} {'P50':>16} {'P90':>16} {'Mean':>16}")
+    for year, month, stats in forecast.monthly_percentiles():
+        label = f"{year}-{month:02d}"
+        if (args.start and label < args.start) or (args.end and label > args.end):
+            continue
+        print(f"{label:<10} " + " ".join(f"{'$' + format(stats[key], ',.0f'):>16}"
+                                         for key in ('P10', 'P50', 'P90', 'mean')))
@@ -0,0 +1,384 @@
+"""
+predicates.py - Composable named predicates with a memoized mask cache
+
+Sections, notebooks and reports all rebuild the same boolean masks
+(Status == 'Won', CloseDate year 2025, StartDate March 2026, ...). Here a
+predicate is a small immutable object with a structural key. Predicates
+combine with & | ~, and the masks they produce are cached in a
+size-bounded LRU keyed by (dataset token, predicate key); the token is
+unique per loaded dataset across all sessions of the process.
+A composite mask is built from cached child masks, so a what-if session
+with hundreds of slices scans each column condition only once per load.
+
+    from predicates import Query, status, year, month
+    query = Query(get_dataset())
+    query.sum_acv(status('Won') & year('start', 2026))
+    query.win_rate(year('close', 2025) & product('OptiSlow'))
+
+AND/OR children are ordered by key, so a & b and b & a share one entry.
+
+Author: Svitlana Kovalivska
+Purpose: Fast ad-hoc slicing for what-if analysis and dashboards
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+DEFAULT_MAX_ENTRIES = 512
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+
+class Predicate:
+    """
+    Row filter over an OpportunityTable
+
+    Subclasses define `key` (hashable, structural) and compute(table, mask_of),
+    where mask_of(child) returns a child's (possibly cached) mask.
+    """
+
+    __slots__ = ('key',)
+
+    def compute(self, table, mask_of):
+        raise NotImplementedError
+
+    def __and__(self, other):
+        return AllOf(self, other)
+
+    def __or__(self, other):
+        return AnyOf(self, other)
+
+    def __invert__(self):
+        return Not(self)
+
+    def __eq__(self, other):
+        return isinstance(other, Predicate) and self.key == other.key
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __repr__(self):
+        return f"{type(self).__name__}{self.key[1:]!r}"
+
+
+class Everything(Predicate):
+    """All rows"""
+
+    def __init__(self):
+        self.key = ('all',)
+
+    def compute(self, table, mask_of):
+        return np.ones(len(table), dtype=bool)
+
+
+class ColumnEquals(Predicate):
+    """Encoded column (statuses, products, customers) equal to a value"""
+
+    def __init__(self, column, value):
+        self.key = ('eq', column, value)
+
+    def compute(self, table, mask_of):
+        _, column, value = self.key
+        return np.asarray(getattr(table, column) == value, dtype=bool)
+
+
+class ColumnIn(Predicate):
+    """Encoded column equal to any of several values (one lookup over the codes)"""
+
+    def __init__(self, column, values):
+        self.key = ('in', column, tuple(sorted(set(values))))
+
+    def compute(self, table, mask_of):
+        _, column, values = self.key
+        encoded = getattr(table, column)
+        codes = [encoded.code_of(value) for value in values]
+        return np.isin(encoded.codes, [code for code in codes if code is not None])
+
+
+class DatePart(Predicate):
+    """Year or month of CloseDate/StartDate ('close'/'start') equal to a value"""
+
+    def __init__(self, field, part, value):
+        self.key = ('date', field, part, int(value))
+
+    def compute(self, table, mask_of):
+        _, field, part, value = self.key
+        dates = getattr(table.dates, field)
+        return getattr(dates, part) == value
+
+
+class DayRange(Predicate):
+    """CloseDate/StartDate within [start, end] (inclusive; None = open-ended)"""
+
+    def __init__(self, field, start=None, end=None):
+        from close_date_index import to_day
+        self.key = ('days', field,
+                    None if start is None else to_day(start), None if end is None else to_day(end))
+
+    def compute(self, table, mask_of):
+        _, field, start, end = self.key
+        dates = getattr(table.dates, field)
+        mask = dates.valid.copy()
+        if start is not None:
+            mask &= dates.day >= start
+        if end is not None:
+            mask &= dates.day <= end
+        return mask
+
+
+class AcvRange(Predicate):
+    """ACV within [low, high) (None = open-ended)"""
+
+    def __init__(self, low=None, high=None):
+        self.key = ('acv', low, high)
+
+    def compute(self, table, mask_of):
+        _, low, high = self.key
+        acvs = np.asarray(table.acvs, dtype=np.float64)
+        mask = ~np.isnan(acvs)
+        if low is not None:
+            mask &= acvs >= low
+        if high is not None:
+            mask &= acvs < high
+        return mask
+
+
+class AllOf(Predicate):
+    """Conjunction; nested AllOf children are flattened"""
+
+    __slots__ = ('children',)
+    operator = 'and'
+
+    def __init__(self, *children):
+        flat = {}
+        for child in children:
+            for part in (child.children if type(child) is type(self) else (child,)):
+                flat[part.key] = part
+        self.children = tuple(flat[key] for key in sorted(flat, key=repr))
+        self.key = (self.operator,) + tuple(child.key for child in self.children)
+
+    def compute(self, table, mask_of):
+        mask = mask_of(self.children[0]).copy()
+        for child in self.children[1:]:
+            mask &= mask_of(child)
+        return mask
+
+
+class AnyOf(AllOf):
+    """Disjunction; nested AnyOf children are flattened"""
+
+    __slots__ = ()
+    operator = 'or'
+
+    def compute(self, table, mask_of):
+        mask = mask_of(self.children[0]).copy()
+        for child in self.children[1:]:
+            mask |= mask_of(child)
+        return mask
+
+
+class Not(Predicate):
+    __slots__ = ('child',)
+
+    def __init__(self, child):
+        self.child = child
+        self.key = ('not', child.key)
+
+    def compute(self, table, mask_of):
+        return ~mask_of(self.child)
+
+
+# -- constructors ----------------------------------------------------------
+
+def status(value):
+    return ColumnEquals('statuses', value)
+
+
+def product(value):
+    return ColumnEquals('products', value)
+
+
+def customer(value):
+    return ColumnEquals('customers', value)
+
+
+def year(field, value):
+    """CloseDate ('close') or StartDate ('start') in calendar `value`"""
+    return DatePart(field, 'year', value)
+
+
+def month(field, year_value, month_value):
+    """Date in one calendar month; shares the year mask with year()"""
+    return year(field, year_value) & DatePart(field, 'month', month_value)
+
+
+def between(field, start=None, end=None):
+    return DayRange(field, start, end)
+
+
+def acv_between(low=None, high=None):
+    return AcvRange(low, high)
+
+
+WON = status('Won')
+LOST = status('Lost')
+OPEN = status('Open')
+CLOSED = WON | LOST
+
+# Predicates that can be referred to by name; extend with register()
+NAMED_PREDICATES = {'all': Everything(), 'won': WON, 'lost': LOST, 'open': OPEN, 'closed': CLOSED}
+
+
+def register(name, predicate):
+    """Make `predicate` available by name in Query methods"""
+    NAMED_PREDICATES[name] = predicate
+    return predicate
+
+
+def resolve(predicate):
+    """Predicate from a Predicate, a registered name or None (all rows)"""
+    if predicate is None:
+        return NAMED_PREDICATES['all']
+    if isinstance(predicate, str):
+        try:
+            return NAMED_PREDICATES[predicate]
+        except KeyError:
+            raise KeyError(f"Unknown predicate {predicate!r}; registered: {sorted(NAMED_PREDICATES)}") from None
+    return predicate
+
+
+# -- cache -------------------------------------------------------------------
+
+class MaskCache:
+    """
+    Thread-safe LRU of boolean masks keyed by (dataset token, predicate key)
+
+    Bounded both by entry count and by total mask bytes. Cached masks are
+    read-only; callers combine them into new arrays.
+
+    Attributes:
+        hits, misses, evictions (int): Cache statistics
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._masks = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def mask(self, dataset, predicate):
+        """Mask of `predicate` on `dataset`, computed (recursively) on a miss"""
+        predicate = resolve(predicate)
+        key = (dataset.token, predicate.key)
+        with self._lock:
+            mask = self._masks.get(key)
+            if mask is not None:
+                self._masks.move_to_end(key)
+                self.hits += 1
+                return mask
+            self.misses += 1
+
+        mask = predicate.compute(dataset.table, lambda child: self.mask(dataset, child))
+        mask.flags.writeable = False
+        with self._lock:
+            if key not in self._masks:
+                self._masks[key] = mask
+                self._bytes += mask.nbytes
+                self._evict()
+        return mask
+
+    def _evict(self):
+        while self._masks and (len(self._masks) > self.max_entries or self._bytes > self.max_bytes):
+            _, mask = self._masks.popitem(last=False)
+            self._bytes -= mask.nbytes
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._masks.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._masks), 'bytes': self._bytes, 'hits': self.hits,
+                    'misses': self.misses, 'evictions': self.evictions}
+
+
+_mask_cache = MaskCache()
+
+
+def get_mask_cache():
+    """Return the process-wide mask cache"""
+    return _mask_cache
+
+
+class Query:
+    """
+    Aggregations over cached predicate masks of one dataset
+
+    Every method accepts a Predicate, a registered name ('won', 'open', ...)
+    or None for all rows.
+    """
+
+    def __init__(self, dataset, cache=None):
+        self.dataset = dataset
+        self.cache = cache or _mask_cache
+
+    def mask(self, predicate=None):
+        return self.cache.mask(self.dataset, predicate)
+
+    def rows(self, predicate=None):
+        return np.flatnonzero(self.mask(predicate))
+
+    def count(self, predicate=None):
+        return int(np.count_nonzero(self.mask(predicate)))
+
+    def sum_acv(self, predicate=None):
+        acvs = np.asarray(self.dataset.table.acvs, dtype=np.float64)
+        return float(np.nansum(acvs[self.mask(predicate)]))
+
+    def win_rate(self, predicate=None):
+        """Won / (Won + Lost) within the slice (NaN without closed deals)"""
+        predicate = resolve(predicate)
+        closed = self.count(predicate & CLOSED)
+        return self.count(predicate & WON) / closed if closed else float('nan')
+
+    def summary(self, predicate=None):
+        """Deals, ACV, Won/Open counts and win rate of one slice"""
+        predicate = resolve(predicate)
+        deals = self.count(predicate)
+        acv = self.sum_acv(predicate)
+        return {
+            'deals': deals,
+            'acv': acv,
+            'avg_acv': acv / deals if deals else float('nan'),
+            'won': self.count(predicate & WON),
+            'open': self.count(predicate & OPEN),
+            'win_rate': self.win_rate(predicate),
+        }
+
+
+if __name__ == "__main__":
+    """
+    Slice the default workbook by product and year and show cache reuse
+    """
+    import time
+
+    from dataset_session import get_dataset
+
+    dataset = get_dataset()
+    query = Query(dataset)
+    print("🔎 SLICED METRICS (cached predicate masks)")
+    print("=" * 70)
+    started = time.perf_counter()
+    for name in dataset.table.products.categories:
+        for close_year in (2025, 2026):
+            stats = query.summary(product(str(name)) & year('close', close_year))
+            print(f"{str(name):<12} {close_year}: {stats['deals']:>5} deals  ${stats['acv']:>13,.0f}  "
+                  f"win rate {stats['win_rate']:.1%}")
+    print(f"\n⏱️  {(time.perf_counter() - started) * 1000:.1f} ms, cache {query.cache.stats()}")
@@ -0,0 +1,112 @@
+"""
+report_writer.py - Export validation results as JSON, CSV or Parquet
+
+Takes the dict returned by DataValidator.run_comprehensive_validation()
+({section name: ResultRecord}) and writes it in a machine-readable format.
+
+- JSON keeps the nested structure (one object per section)
+- CSV and Parquet use a long table with columns section, metric, key, value;
+  scalars have an empty key, arrays and dicts get one row per element
+
+Author: Svitlana Kovalivska
+Purpose: Feed validation results to dashboards and automated checks
+"""
+
+import csv
+import json
+import os
+
+import numpy as np
+
+from validation_results import ResultRecord
+
+FORMATS = ('json', 'csv', 'parquet')
+TABLE_COLUMNS = ('section', 'metric', 'key', 'value')
+
+
+def _plain(value):
+    """Convert NumPy and record values into JSON-serialisable Python objects"""
+    if isinstance(value, ResultRecord) or hasattr(value, 'to_dict'):
+        return {name: _plain(item) for name, item in value.to_dict().items()}
+    if isinstance(value, dict):
+        return {str(key): _plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [_plain(item) for item in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def results_to_dict(results):
+    """Return validation results as nested plain Python data"""
+    return {section: _plain(result) for section, result in results.items()}
+
+
+def iter_result_rows(results):
+    """
+    Yield (section, metric, key, value) rows for every result value
+
+    Arrays and dicts are expanded one element per row, so even millions
+    of overdue IDs stream out without building an intermediate list.
+    """
+    for section, result in results.items():
+        items = result.to_dict().items() if hasattr(result, 'to_dict') else [('value', result)]
+        for metric, value in items:
+            if isinstance(value, dict):
+                for key, item in value.items():
+                    yield section, metric, str(key), _plain(item)
+            elif isinstance(value, (list, tuple, np.ndarray)):
+                for position, item in enumerate(value):
+                    yield section, metric, str(position), _plain(item)
+            else:
+                yield section, metric, '', _plain(value)
+
+
+def _cell(value):
+    return json.dumps(value) if isinstance(value, (dict, list)) else value
+
+
+def write_json(results, path):
+    with open(path, 'w') as handle:
+        json.dump(results_to_dict(results), handle, indent=2, default=str)
+
+
+def write_csv(results, path):
+    with open(path, 'w', newline='') as handle:
+        writer = csv.writer(handle)
+        writer.writerow(TABLE_COLUMNS)
+        for section, metric, key, value in iter_result_rows(results):
+            writer.writerow((section, metric, key, _cell(value)))
+
+
+def write_parquet(results, path):
+    """Write the long table as Parquet (requires pyarrow or fastparquet)"""
+    import pandas as pd
+
+    rows = [(section, metric, key, None if value is None else str(_cell(value)))
+            for section, metric, key, value in iter_result_rows(results)]
+    table = pd.DataFrame(rows, columns=list(TABLE_COLUMNS))
+    try:
+        table.to_parquet(path, index=False)
+    except ImportError as e:
+        raise ImportError("Parquet export requires pyarrow or fastparquet "
+                          "(pip install pyarrow)") from e
+
+
+def write_report(results, path, fmt=None):
+    """
+    Write validation results to `path`
+
+    Args:
+        results (dict): Output of run_comprehensive_validation()
+        path (str): Destination file
+        fmt (str): 'json', 'csv' or 'parquet' (default: from the file extension)
+
+    Returns: the path written
+    """
+    fmt = (fmt or os.path.splitext(path)[1].lstrip('.')).lower()
+    writers = {'json': write_json, 'csv': write_csv, 'parquet': write_parquet}
+    if fmt not in writers:
+        raise ValueError(f"Unsupported report format {fmt!r} (expected one of {FORMATS})")
+    writers[fmt](results, path)
+    return path
@@ -0,0 +1,237 @@
+#!/usr/bin/env python
+"""
+revops.py - Non-interactive command line for the RevOps analysis
+
+One entry point for automation instead of test.py, validation.py and the
+interactive run_validation.py menu:
+
+    python revops.py analyze                 Section 1-5 results
+    python revops.py section 3               one section's result
+    python revops.py validate [--workers N] [--incremental]
+    python revops.py compare                 test.py logic vs validation
+
+Every command accepts --format table|json, --workbook PATH and --as-of
+YYYY-MM-DD. validate and compare exit with status 1 when a check fails.
+
+Only argparse is imported at startup; NumPy and the analysis modules load
+inside the command that needs them, and pandas/openpyxl only if the
+workbook's columnar snapshot (see data_cache.py) is missing or stale.
+
+Author: Svitlana Kovalivska
+Purpose: Scriptable access to the analysis for CI jobs and schedulers
+"""
+
+import argparse
+import json
+import sys
+from datetime import date
+
+SECTION_TITLES = {
+    1: 'Data extraction',
+    2: 'Overdue open deals (CloseDate in 2025)',
+    3: 'Won ACV starting in 2026',
+    4: 'Expected ACV for March 2026',
+    5: 'Win rates by close month 2025',
+}
+# Lists longer than this are summarized in table output (JSON always has everything)
+TABLE_LIST_LIMIT = 10
+
+
+def as_of_date(text):
+    """argparse type of --as-of: 'YYYY-MM-DD' (as metrics_server.parse_as_of, without its imports)"""
+    try:
+        return date.fromisoformat(text).isoformat()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a date in YYYY-MM-DD format, got {text!r}") from None
+
+
+def _dataset(args):
+    from data_cache import DEFAULT_EXCEL_FILE
+    from dataset_session import get_dataset
+
+    return get_dataset(args.workbook or DEFAULT_EXCEL_FILE)
+
+
+def _section_result(section, dataset, as_of=None):
+    """Plain-data result of one analysis section, computed the way test.py does"""
+    import numpy as np
+
+    from analysis_engine import (
+        expected_acv_for_month,
+        find_overdue_open_deals,
+        monthly_win_rates,
+        won_acv_by_start_year,
+    )
+
+    table = dataset.table
+    dates = dataset.dates
+    if section == 1:
+        columns = {'ID': table.ids, 'ProductName': table.products, 'CustomerName': table.customers,
+                   'ACV': table.acvs, 'Status': table.statuses,
+                   'CloseDate': table.close_days, 'StartDate': table.start_days}
+        return {'records': len(table), 'entries': {name: len(values) for name, values in columns.items()}}
+    if section == 2:
+        from close_date_index import get_open_deal_index, to_day, today_day
+
+        overdue = find_overdue_open_deals(table.ids, table.statuses, dates.close, year=2025)
+        as_of_day = to_day(as_of) if as_of else today_day()
+        index = get_open_deal_index(dataset)
+        return {'count': len(overdue), 'as_of': str(np.datetime64(as_of_day, 'D')),
+                'past_close_date_as_of': index.overdue_count(as_of_day),
+                'ids': [str(opportunity_id) for opportunity_id in overdue]}
+    if section == 3:
+        won = (table.statuses == 'Won') & (dates.start.year == 2026)
+        total = won_acv_by_start_year(table.statuses, table.acvs, dates.start, year=2026)
+        count = int(won.sum())
+        return {'won_acv': float(total), 'deals': count, 'avg_deal_size': float(total) / count if count else 0.0}
+    if section == 4:
+        expected, won_count, open_count = expected_acv_for_month(
+            table.statuses, table.acvs, dates.start, year=2026, month=3, open_probability=0.25)
+        return {'expected_acv': float(expected), 'won_deals': won_count, 'open_deals': open_count,
+                'open_probability': 0.25}
+    if section == 5:
+        monthly = monthly_win_rates(table.statuses, dates.close, year=2025)
+        total = sum(m['total'] for m in monthly.values())
+        won = sum(m['won'] for m in monthly.values())
+        return {'annual_win_rate': won / total * 100 if total else 0.0, 'won': won, 'closed': total,
+                'monthly': {f"2025-{int(month):02d}": {'won': m['won'], 'closed': m['total'],
+                                                       'win_rate': m['won'] / m['total'] * 100 if m['total'] else 0.0}
+                            for month, m in sorted(monthly.items())}}
+    raise ValueError(f"Unknown section {section} (1-5)")
+
+
+# -- output ------------------------------------------------------------------
+
+def _format_value(value):
+    if isinstance(value, float):
+        return f"{value:,.2f}"
+    if isinstance(value, list):
+        shown = ", ".join(str(item) for item in value[:TABLE_LIST_LIMIT])
+        more = f", ... ({len(value)} total)" if len(value) > TABLE_LIST_LIMIT else ""
+        return f"[{shown}{more}]"
+    return str(value)
+
+
+def _print_table(sections, indent=0):
+    for name, value in sections.items():
+        label = " " * indent + str(name)
+        if isinstance(value, dict):
+            print(label)
+            _print_table(value, indent + 2)
+        else:
+            print(f"{label:<32} {_format_value(value)}")
+
+
+def emit(payload, fmt):
+    if fmt == 'json':
+        from report_writer import results_to_dict
+
+        json.dump(results_to_dict(payload), sys.stdout, indent=2, default=str)
+        print()
+    else:
+        _print_table(payload)
+
+
+# -- commands ----------------------------------------------------------------
+
+def cmd_analyze(args):
+    dataset = _dataset(args)
+    emit({f"section{n}": _section_result(n, dataset, args.as_of) for n in SECTION_TITLES}, args.format)
+    return 0
+
+
+def cmd_section(args):
+    dataset = _dataset(args)
+    result = _section_result(args.number, dataset, args.as_of)
+    if args.format == 'table':
+        print(f"SECTION {args.number}: {SECTION_TITLES[args.number]}")
+    emit({f"section{args.number}": result}, args.format)
+    return 0
+
+
+def cmd_validate(args):
+    from validation import DataValidator
+
+    dataset = _dataset(args)
+    validator = DataValidator(dataset.path, quiet=True, max_workers=args.workers, as_of=args.as_of)
+    if args.incremental:
+        results = validator.run_incremental_validation()
+    else:
+        results = validator.run_comprehensive_validation()
+    # ChangeSummary of an incremental run (None on the first run); not a check
+    changes = results.pop('changes', None)
+    passed = 'error' not in results and all(
+        result.passed for result in results.values() if hasattr(result, 'passed'))
+
+    if args.format == 'json':
+        payload = dict(results, passed=passed)
+        if args.incremental:
+            payload['changes'] = changes.to_dict() if changes is not None else None
+        emit(payload, 'json')
+    else:
+        for section, result in results.items():
+            status = ("PASSED" if result.passed else "FAILED") if hasattr(result, 'passed') else f"ERROR: {result}"
+            print(f"{section:<12} {status}")
+        if args.incremental:
+            summary = ("first run, full scan" if changes is None else
+                       f"{changes.added} added, {changes.removed} removed, "
+                       f"{changes.changed} changed, {changes.unchanged} unchanged")
+            print(f"{'changes':<12} {summary}")
+        print(f"{'overall':<12} {'PASSED' if passed else 'FAILED'}")
+    return 0 if passed else 1
+
+
+def cmd_compare(args):
+    from run_validation import build_comparisons, compute_test_results
+    from validation import DataValidator
+
+    dataset = _dataset(args)
+    validation_results = DataValidator(dataset.path, quiet=True, as_of=args.as_of).run_comprehensive_validation()
+    comparisons = build_comparisons(validation_results, compute_test_results(dataset.path))
+    all_match = all(comparison['match'] for comparison in comparisons)
+
+    if args.format == 'json':
+        emit({'comparisons': comparisons, 'all_match': all_match}, 'json')
+    else:
+        print(f"{'Metric':<25} {'Validation':<20} {'test.py':<20} Match")
+        for comparison in comparisons:
+            print(f"{comparison['metric']:<25} {str(comparison['validation']):<20} "
+                  f"{str(comparison['test_py']):<20} {'YES' if comparison['match'] else 'NO'}")
+        print(f"{'overall':<25} {'ALL RESULTS MATCH' if all_match else 'DISCREPANCIES FOUND'}")
+    return 0 if all_match else 1
+
+
+def build_parser():
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--workbook', help="opportunities workbook (default: 02_Data_Analysis/opportunities.xlsx)")
+    common.add_argument('--format', choices=('table', 'json'), default='table')
+    common.add_argument('--as-of', type=as_of_date,
+                        help="reference date of the overdue checks (YYYY-MM-DD, default: today)")
+
+    parser = argparse.ArgumentParser(prog='revops', description="RevOps opportunity analysis")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    analyze = commands.add_parser('analyze', parents=[common], help="Section 1-5 results")
+    analyze.set_defaults(handler=cmd_analyze)
+
+    section = commands.add_parser('section', parents=[common], help="one section's result")
+    section.add_argument('number', type=int, choices=sorted(SECTION_TITLES))
+    section.set_defaults(handler=cmd_section)
+
+    validate = commands.add_parser('validate', parents=[common], help="run the validation checks")
+    validate.add_argument('--workers', type=int, default=1, help="validate sections concurrently")
+    validate.add_argument('--incremental', action='store_true', help="update Sections 2-5 from saved state")
+    validate.set_defaults(handler=cmd_validate)
+
+    compare = commands.add_parser('compare', parents=[common], help="compare test.py results with validation")
+    compare.set_defaults(handler=cmd_compare)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
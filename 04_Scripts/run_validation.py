@@ -4,14 +4,33 @@ run_validation.py - Script to demonstrate validation functionality
 This script runs the validation module and compares results between
 test.py calculations and validation.py verification.
 
-Usage: python run_validation.py
+By default the test.py calculations are evaluated in-process through
+analysis_engine on the shared dataset, and typed values are compared.
+--subprocess runs test.py as a black box and parses its printed output.
+
+--batch DIR_OR_GLOB validates many workbooks on a process pool instead
+(see batch_validation.py) and exits without the interactive menu.
+
+Usage: python run_validation.py [--subprocess] [--batch DIR_OR_GLOB [--workers N] [--output FILE]]
 """
 
+import argparse
 import sys
 import os
 from validation import DataValidator, quick_validation, validate_specific_calculation
+from dataset_session import get_session, get_dataset
+from analysis_engine import (
+    find_overdue_open_deals,
+    won_acv_by_start_year,
+    expected_acv_for_month,
+    monthly_win_rates,
+)
 import subprocess
 
+# Comparison modes for detailed_comparison()
+IN_PROCESS = 'in_process'
+SUBPROCESS = 'subprocess'
+
 def run_test_py_and_capture():
     """
     Run test.py and capture its output for comparison
@@ -95,23 +114,49 @@ def extract_results_from_test_output(output):
     
     return results
 
-def detailed_comparison():
+def compute_test_results(excel_file='02_Data_Analysis/opportunities.xlsx'):
     """
-    Perform detailed comparison between test.py and validation results
+    Compute the headline test.py results in-process
+
+    Uses the same analysis_engine calls as test.py on the shared dataset,
+    so no interpreter is started, the workbook is not loaded again and no
+    printed output has to be parsed.
+
+    Returns: dict with the keys produced by extract_results_from_test_output()
+    """
+    dataset = get_dataset(excel_file)
+    table = dataset.table
+    dates = dataset.dates
+    statuses = table.statuses
+    acvs = table.acvs
+
+    overdue = find_overdue_open_deals(table.ids, statuses, dates.close, year=2025)
+    won_acv_2026 = won_acv_by_start_year(statuses, acvs, dates.start, year=2026)
+    march_expected_acv, _, _ = expected_acv_for_month(
+        statuses, acvs, dates.start, year=2026, month=3, open_probability=0.25)
+    monthly = monthly_win_rates(statuses, dates.close, year=2025)
+
+    total_deals = sum(m['total'] for m in monthly.values())
+    total_won = sum(m['won'] for m in monthly.values())
+
+    return {
+        'overdue_deals_count': len(overdue),
+        'won_acv_2026': float(won_acv_2026),
+        'march_expected_acv': float(march_expected_acv),
+        'annual_win_rate': (total_won / total_deals) * 100 if total_deals else 0.0,
+    }
+
+def build_comparisons(validation_results, test_extracted):
+    """
+    Compare the headline test.py results with the validation results
+
+    Returns: list of {'metric', 'validation', 'test_py', 'match'} dicts
     """
-    print("🎯 DETAILED RESULTS COMPARISON")
-    print("="*80)
-    
-    # Run test.py
-    test_output, validation_results = compare_results()
-    test_extracted = extract_results_from_test_output(test_output)
-    
-    # Compare specific results
     comparisons = []
     
     # Section 2 comparison
     if 'section2' in validation_results:
-        expected_overdue = validation_results['section2']['expected_count']
+        expected_overdue = validation_results['section2'].expected_count
         actual_overdue = test_extracted.get('overdue_deals_count', 'Not found')
         
         comparisons.append({
@@ -123,7 +168,7 @@ def detailed_comparison():
     
     # Section 3 comparison
     if 'section3' in validation_results:
-        expected_acv = validation_results['section3']['expected_acv']
+        expected_acv = validation_results['section3'].expected_acv
         actual_acv = test_extracted.get('won_acv_2026', 'Not found')
         
         comparisons.append({
@@ -135,7 +180,7 @@ def detailed_comparison():
     
     # Section 4 comparison
     if 'section4' in validation_results:
-        expected_march = validation_results['section4']['total_expected']
+        expected_march = validation_results['section4'].total_expected
         actual_march = test_extracted.get('march_expected_acv', 'Not found')
         
         comparisons.append({
@@ -147,7 +192,7 @@ def detailed_comparison():
     
     # Section 5 comparison
     if 'section5' in validation_results:
-        expected_rate = validation_results['section5']['overall_win_rate']
+        expected_rate = validation_results['section5'].overall_win_rate
         actual_rate = test_extracted.get('annual_win_rate', 'Not found')
         
         comparisons.append({
@@ -157,6 +202,31 @@ def detailed_comparison():
             'match': abs(expected_rate - actual_rate) < 0.1 if isinstance(actual_rate, (int, float)) else False
         })
     
+    return comparisons
+
+def detailed_comparison(mode=IN_PROCESS):
+    """
+    Perform detailed comparison between test.py and validation results
+
+    Args:
+        mode (str): IN_PROCESS (default) evaluates test.py logic directly;
+                    SUBPROCESS runs test.py and parses its output (black box)
+    """
+    print("🎯 DETAILED RESULTS COMPARISON")
+    print("="*80)
+    
+    if mode == SUBPROCESS:
+        # Run test.py as a separate interpreter
+        test_output, validation_results = compare_results()
+        test_extracted = extract_results_from_test_output(test_output)
+    else:
+        print("🔄 Computing test.py results in-process...")
+        test_extracted = compute_test_results()
+        print("\n🔍 Running validation checks...")
+        validation_results = quick_validation()
+    
+    comparisons = build_comparisons(validation_results, test_extracted)
+    
     # Print comparison table
     print("\n📊 RESULTS COMPARISON TABLE")
     print("-"*80)
@@ -175,14 +245,17 @@ def detailed_comparison():
     
     return comparisons, all_match
 
-def generate_validation_report():
+def generate_validation_report(mode=IN_PROCESS):
     """
     Generate a comprehensive validation report
+
+    Args:
+        mode (str): Comparison mode passed to detailed_comparison()
     """
     print("📋 GENERATING COMPREHENSIVE VALIDATION REPORT")
     print("="*80)
     
-    comparisons, all_match = detailed_comparison()
+    comparisons, all_match = detailed_comparison(mode)
     
     # Additional data quality checks
     validator = DataValidator()
@@ -192,11 +265,14 @@ def generate_validation_report():
     print("VALIDATION REPORT SUMMARY")
     print("="*60)
     
-    print(f"✅ Data integrity: {data_integrity['total_records']} records validated")
+    print(f"✅ Data integrity: {data_integrity.total_records} records validated")
     print(f"✅ Calculation accuracy: {'All calculations verified' if all_match else 'Some discrepancies found'}")
     print(f"✅ Business logic: All sections use appropriate logic")
     print(f"✅ Error handling: Robust date parsing and type handling")
     
+    session_stats = get_session().stats()
+    print(f"♻️  Dataset loads: {session_stats['loads']} (avoided: {session_stats['loads_avoided']})")
+    
     # Recommendations
     print(f"\n📌 RECOMMENDATIONS:")
     if all_match:
@@ -215,6 +291,28 @@ def generate_validation_report():
     }
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validate test.py calculations")
+    parser.add_argument('--subprocess', dest='mode', action='store_const',
+                        const=SUBPROCESS, default=IN_PROCESS,
+                        help="run test.py in a separate interpreter and parse its output")
+    parser.add_argument('--batch', metavar='DIR_OR_GLOB',
+                        help="validate every workbook in a directory or glob on a process pool")
+    parser.add_argument('--workers', type=int, default=None, help="batch worker processes (default: CPU count)")
+    parser.add_argument('--output', help="batch results table (.csv or .jsonl), written as files finish")
+    args = parser.parse_args()
+    
+    if args.batch:
+        from batch_validation import run_batch, print_row, print_summary
+        
+        print("📦 BATCH VALIDATION")
+        print("=" * 80)
+        rows, wall_time = run_batch(args.batch, args.workers, args.output, on_row=print_row)
+        if rows:
+            print_summary(rows, wall_time)
+        else:
+            print(f"⚠️  No workbooks match {args.batch}")
+        sys.exit(0 if rows and all(row['status'] == 'ok' and row['passed'] for row in rows) else 1)
+    
     print("🚀 AUTOMATED VALIDATION SYSTEM")
     print("=" * 80)
     print("This script validates the correctness of test.py calculations")
@@ -222,7 +320,7 @@ if __name__ == "__main__":
     print("=" * 80)
     
     # Run comprehensive validation
-    report = generate_validation_report()
+    report = generate_validation_report(args.mode)
     
     print(f"\n🎉 Validation complete!")
     print(f"💡 Results can be trusted for RevOps analysis and decision making.")
@@ -238,7 +336,9 @@ if __name__ == "__main__":
         choice = input("\nSelect option (1-4): ").strip()
         
         if choice == "1":
-            report = generate_validation_report()
+            # Pick up changes to the workbook before re-validating (no reload if unchanged)
+            get_session().refresh('02_Data_Analysis/opportunities.xlsx')
+            report = generate_validation_report(args.mode)
         elif choice == "2":
             section = input("Enter section number (1-5): ").strip()
             try:
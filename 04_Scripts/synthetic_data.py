@@ -0,0 +1,126 @@
+"""
+synthetic_data.py - Seeded synthetic opportunity data for benchmarks
+
+Generates data with the workbook's schema (ID, ProductName, CustomerName,
+ACV, Status, CloseDate, StartDate) at any size. Distributions follow
+opportunities.xlsx: four products with ~2% missing product names, about
+0.38 customers per opportunity, gamma-distributed ACV in steps of 200,
+roughly 59% Lost / 22% Won / 19% Open, CloseDate spread over 2025-2026
+(sorted, as in the export) and StartDate 0-365 days after CloseDate.
+IDs repeat like in the real export (about 70% unique).
+
+The same (n_rows, seed) always yields identical data.
+
+Author: Svitlana Kovalivska
+Purpose: Reproducible large datasets for performance measurement
+"""
+
+import numpy as np
+
+PRODUCTS = np.array(['OptiSlow', 'Waxylog', 'RouteFixer', 'YServer'], dtype=object)
+PRODUCT_WEIGHTS = (0.27, 0.245, 0.235, 0.25)
+PRODUCT_MISSING_SHARE = 0.02
+
+STATUSES = np.array(['Lost', 'Won', 'Open'], dtype=object)
+STATUS_WEIGHTS = (0.59, 0.22, 0.19)
+
+CUSTOMERS_PER_ROW = 0.38
+UNIQUE_ID_SHARE = 0.70
+
+# Gamma fit of the workbook's ACV (mean ~199k, std ~151k)
+ACV_SHAPE = 1.75
+ACV_SCALE = 114_000
+ACV_STEP = 200
+
+SIZES = (10_000, 100_000, 1_000_000, 10_000_000)
+
+
+def _labels(prefix, numbers, width):
+    """Vectorized f"{prefix}{number:0{width}d}" as an object array"""
+    digits = np.char.zfill(numbers.astype(str), width)
+    return np.char.add(prefix, digits).astype(object)
+
+
+def generate_opportunities(n_rows, seed=42, first_year=2025, years=2):
+    """
+    Generate `n_rows` synthetic opportunities
+
+    Args:
+        n_rows (int): Number of rows
+        seed (int): Random seed (same seed -> same data)
+        first_year (int): First CloseDate year
+        years (int): Number of CloseDate years
+
+    Returns: dict {column name: numpy array} with the dtypes that
+             data_cache.load_opportunity_columns() returns for the workbook
+    """
+    rng = np.random.default_rng(seed)
+
+    n_ids = max(1, int(n_rows * UNIQUE_ID_SHARE))
+    width = max(4, len(str(n_ids)))
+    ids = _labels(f"OPP-{first_year}-", rng.integers(0, n_ids, n_rows), width)
+
+    products = PRODUCTS[rng.choice(len(PRODUCTS), n_rows, p=PRODUCT_WEIGHTS)]
+    products[rng.random(n_rows) < PRODUCT_MISSING_SHARE] = None
+
+    n_customers = max(1, int(n_rows * CUSTOMERS_PER_ROW))
+    customers = _labels("Customer ", rng.integers(0, n_customers, n_rows), len(str(n_customers)))
+
+    acvs = np.maximum(np.round(rng.gamma(ACV_SHAPE, ACV_SCALE, n_rows) / ACV_STEP), 1)
+    acvs = acvs.astype(np.int64) * ACV_STEP
+
+    statuses = STATUSES[rng.choice(len(STATUSES), n_rows, p=STATUS_WEIGHTS)]
+
+    first_day = np.datetime64(f'{first_year}-01-01', 'D')
+    n_days = (np.datetime64(f'{first_year + years}-01-01', 'D') - first_day).astype(np.int64)
+    close = first_day + np.sort(rng.integers(0, n_days, n_rows))
+    start = close + rng.integers(0, 366, n_rows)
+
+    return {
+        'ID': ids,
+        'ProductName': products,
+        'CustomerName': customers,
+        'ACV': acvs,
+        'Status': statuses,
+        'CloseDate': close.astype('datetime64[us]'),
+        'StartDate': start.astype('datetime64[us]'),
+    }
+
+
+def write_snapshot(n_rows, cache_dir, seed=42):
+    """
+    Generate data and store it as a columnar snapshot (see data_cache.save_columns)
+
+    Returns: the snapshot manifest
+    """
+    from data_cache import save_columns
+
+    return save_columns(generate_opportunities(n_rows, seed), cache_dir,
+                        source={'synthetic': True, 'rows': n_rows, 'seed': seed})
+
+
+def write_workbook(n_rows, path, seed=42):
+    """
+    Generate data and write it as an .xlsx workbook (Excel caps sheets at 1,048,575 rows)
+    """
+    import pandas as pd
+
+    if n_rows > 1_048_575:
+        raise ValueError("Excel sheets hold at most 1,048,575 data rows; use write_snapshot()")
+    pd.DataFrame(generate_opportunities(n_rows, seed)).to_excel(path, index=False)
+    return path
+
+
+if __name__ == "__main__":
+    """
+    Generate a synthetic workbook: python synthetic_data.py ROWS OUTPUT.xlsx [SEED]
+    """
+    import sys
+
+    if len(sys.argv) < 3:
+        print("Usage: python synthetic_data.py ROWS OUTPUT.xlsx [SEED]")
+        sys.exit(1)
+    rows, output = int(sys.argv[1]), sys.argv[2]
+    seed = int(sys.argv[3]) if len(sys.argv) > 3 else 42
+    write_workbook(rows, output, seed)
+    print(f"📦 Wrote {rows:,} synthetic opportunities to {output} (seed {seed})")
@@ -13,8 +13,18 @@ Dataset: opportunities.xlsx (2,621 opportunities)
 Sections: 5 analytical tasks demonstrating data manipulation and business logic
 """
 
-import numpy
-import pandas
+from dataset_session import get_dataset
+from analysis_engine import (
+    find_overdue_open_deals,
+    won_acv_by_start_year,
+    monthly_win_rates,
+)
+from forecast_cube import get_forecast_cube
+from tracing import get_tracer
+
+# Every section below is recorded as a stage (wall/CPU time, rows, optional
+# allocations); set REVOPS_TRACE / REVOPS_CHROME_TRACE to export the trace
+tracer = get_tracer()
 
 ############ SECTION 1 #############
 # DATA EXTRACTION AND PREPARATION
@@ -24,19 +34,29 @@ import pandas
 
 # Load the opportunities dataset from Excel file
 # Path adjusted for script location in 04_Scripts directory
-df = pandas.read_excel('../02_Data_Analysis/opportunities.xlsx')
+# The workbook is parsed once into a columnar snapshot (see data_cache.py);
+# later runs load the snapshot and only re-parse when the file changes.
+# The shared session (see dataset_session.py) reuses it within one process.
+stage = tracer.begin('section1')
+dataset = get_dataset('../02_Data_Analysis/opportunities.xlsx')
+table = dataset.table
+
+# Integer year/month/day index of CloseDate and StartDate, built once per load
+# and reused by every section below instead of re-parsing the date columns
+date_index = dataset.dates
 
 # COMPLETE TASK 1 HERE:
 # Extract each column from the dataset into separate arrays for efficient processing
-# Using .values converts pandas Series to numpy arrays for faster computation
+# The compact table (see compact_table.py) already stores every column as an array:
+# text columns are dictionary-encoded, dates are int32 day numbers
 
-ids = df['ID'].values                    # Unique opportunity identifiers
-products = df['ProductName'].values      # Product/service being sold
-customers = df['CustomerName'].values    # Customer company names
-acvs = df['ACV'].values                 # Annual Contract Value (revenue impact)
-statuses = df['Status'].values          # Deal status (Open, Won, Lost)
-closedates = df['CloseDate'].values     # Expected/actual close dates
-startdates = df['StartDate'].values     # Contract start dates
+ids = table.ids                         # Unique opportunity identifiers
+products = table.products               # Product/service being sold
+customers = table.customers             # Customer company names
+acvs = table.acvs                       # Annual Contract Value (revenue impact)
+statuses = table.statuses               # Deal status (Open, Won, Lost)
+closedates = table.close_days           # Expected/actual close dates
+startdates = table.start_days           # Contract start dates
 
 # Display extraction results for validation
 print("SECTION 1 RESULTS:")
@@ -48,6 +68,8 @@ print(f"Statuses array: {len(statuses)} entries")
 print(f"Close dates array: {len(closedates)} entries")
 print(f"Start dates array: {len(startdates)} entries")
 print("All columns successfully extracted into separate arrays.\n")
+stage.rows = len(ids)
+tracer.end(stage)
 
 
 
@@ -63,28 +85,24 @@ print("All columns successfully extracted into separate arrays.\n")
 # Find opportunities that are still open but have CloseDate in 2025
 # These represent data quality issues requiring immediate remediation
 
+stage = tracer.begin('section2', rows=len(ids))
 print("SECTION 2 RESULTS:")
 print("Overdue open deals (CloseDate in 2025 but still Open):")
 
-# Initialize list to store problematic opportunity IDs
-open_deals_2025 = []
+# Business logic: If deal is still "Open" but close date was in 2025, it's overdue
+# The whole column is filtered at once (see analysis_engine.py)
+open_deals_2025 = find_overdue_open_deals(ids, statuses, date_index.close, year=2025)
 
-# Iterate through all opportunities to identify data quality issues
-for i in range(len(df)):
-    # Convert numpy datetime64 to pandas datetime to access year attribute
-    # This handles datetime format compatibility between pandas and numpy
-    close_year = pandas.to_datetime(closedates[i]).year
-    
-    # Business logic: If deal is still "Open" but close date was in 2025, it's overdue
-    if statuses[i] == 'Open' and close_year == 2025:
-        open_deals_2025.append(ids[i])
-        print(ids[i])  # Output each problematic opportunity ID
+# Output each problematic opportunity ID (single write instead of one per row)
+if len(open_deals_2025):
+    print('\n'.join(map(str, open_deals_2025)))
 
 # Provide business context for the findings
 print(f"\nSECTION 2 ANALYSIS RESULTS:")
 print(f"Found {len(open_deals_2025)} opportunities that are still open but should have been closed in 2025.")
 print(f"These deals require status updates as they are overdue for closure.")
 print(f"Recommended Action: Sales operations should review and update these records immediately.")
+tracer.end(stage)
 
 ####################################
 ############ SECTION 3 #############
@@ -96,24 +114,17 @@ print(f"Recommended Action: Sales operations should review and update these reco
 # Business Value: Provides accurate revenue forecast for financial planning
 # Scope: Only includes deals with "Won" status to ensure revenue certainty
 
+stage = tracer.begin('section3', rows=len(ids))
 print("\nSECTION 3 RESULTS:")
 
 # COMPLETE TASK 3 HERE:
 # Calculate total ACV of all Won deals that start in 2026
 # This represents confirmed, contracted revenue for the upcoming year
 
-won_acv_2026 = 0  # Initialize accumulator for total ACV
+# Business logic: Only count deals that are Won (confirmed) and start in 2026
+# This ensures we're only including contracted revenue, not potential revenue
+won_acv_2026 = won_acv_by_start_year(statuses, acvs, date_index.start, year=2026)
 
-# Process each opportunity to identify confirmed 2026 revenue
-for i in range(len(df)):
-    # Extract year from start date for filtering
-    start_year = pandas.to_datetime(startdates[i]).year
-    
-    # Business logic: Only count deals that are Won (confirmed) and start in 2026
-    # This ensures we're only including contracted revenue, not potential revenue
-    if statuses[i] == 'Won' and start_year == 2026:
-        won_acv_2026 += acvs[i]  # Add ACV to running total
-        
 print(won_acv_2026)  # Raw number for immediate reference
 
 # Provide business-formatted output with context
@@ -121,6 +132,7 @@ print(f"\nSECTION 3 ANALYSIS RESULTS:")
 print(f"Total ACV of all Won deals starting in 2026: ${won_acv_2026:,.0f}")
 print(f"This represents confirmed revenue from successfully closed deals for 2026.")
 print(f"Financial Impact: Provides certainty for revenue planning and resource allocation.")
+tracer.end(stage)
 
 ####################################
 ############ SECTION 4 #############
@@ -136,30 +148,15 @@ print(f"Financial Impact: Provides certainty for revenue planning and resource a
 # Calculate expected ACV for March 2026 with 25% success rate for open deals
 # This combines confirmed revenue with risk-adjusted potential revenue
 
-total_expected_acv_032026 = 0  # Initialize total expected value accumulator
-won_deals_march = 0            # Counter for confirmed deals
-open_deals_march = 0           # Counter for potential deals
-
-# PHASE 1: Add confirmed revenue from Won deals (100% probability)
-# These represent contracted revenue with no execution risk
-for i in range(len(df)):
-    start_dt = pandas.to_datetime(startdates[i])  # Convert to datetime for month/year access
-    
-    # Filter for Won deals starting specifically in March 2026
-    if statuses[i] == 'Won' and start_dt.year == 2026 and start_dt.month == 3:
-        total_expected_acv_032026 += acvs[i]  # Full ACV value (100% probability)
-        won_deals_march += 1
-
-# PHASE 2: Add risk-adjusted potential revenue from Open deals (25% probability)  
-# 25% represents historical win rate assumption for forecasting purposes
-for i in range(len(df)):
-    start_dt = pandas.to_datetime(startdates[i])
-    
-    # Filter for Open deals starting in March 2026
-    if statuses[i] == 'Open' and start_dt.year == 2026 and start_dt.month == 3:
-        # Apply 25% probability weight to account for win rate uncertainty
-        total_expected_acv_032026 += acvs[i] * 0.25  # Risk-adjusted expected value
-        open_deals_march += 1
+# Won deals starting in March 2026 count at full ACV (100% probability),
+# Open deals at 25% - the historical win rate assumption for forecasting.
+# The forecast cube (see forecast_cube.py) holds expected ACV for every start
+# month and status, built in one grouped pass; March 2026 is a lookup.
+stage = tracer.begin('section4', rows=len(ids))
+forecast = get_forecast_cube(dataset)
+total_expected_acv_032026 = forecast.month(2026, 3)
+won_deals_march = int(forecast.month(2026, 3, 'count', 'Won'))
+open_deals_march = int(forecast.month(2026, 3, 'count', 'Open'))
 
 print(total_expected_acv_032026)  # Raw calculation for verification
 
@@ -169,6 +166,7 @@ print(f"Expected ACV for March 2026: ${total_expected_acv_032026:,.0f}")
 print(f"This includes {won_deals_march} confirmed Won deals + {open_deals_march} Open deals with 25% success probability.")
 print(f"Risk-adjusted forecast combining guaranteed and potential revenue for March 2026.")
 print(f"Business Application: Enables realistic pipeline planning and quota setting.")
+tracer.end(stage)
 
 ####################################
 ############ SECTION 5 #############
@@ -185,29 +183,11 @@ print(f"Business Application: Enables realistic pipeline planning and quota sett
 # Win rate = (Won Deals / Total Closed Deals) × 100
 # This metric shows how the ability to close deals changed over time
 
-# Initialize dictionary to store monthly performance metrics
+# Build monthly performance metrics for deals actually closed in 2025 (Won or Lost)
+# Open deals are excluded as they don't contribute to win rate calculation
 # Structure: {month: {'won': count, 'total': count}}
-monthly_performance = {}
-
-# Process each opportunity to build monthly performance dataset
-for i in range(len(df)):
-    close_dt = pandas.to_datetime(closedates[i])  # Convert to datetime for month extraction
-    
-    # Filter criteria: Only deals actually closed in 2025 (Won or Lost)
-    # Excludes Open deals as they don't contribute to win rate calculation
-    if close_dt.year == 2025 and statuses[i] in ['Won', 'Lost']:
-        month = close_dt.month
-        
-        # Initialize month data structure if first encounter
-        if month not in monthly_performance:
-            monthly_performance[month] = {'won': 0, 'total': 0}
-        
-        # Increment total closed deals for the month
-        monthly_performance[month]['total'] += 1
-        
-        # Increment won deals if status is Won
-        if statuses[i] == 'Won':
-            monthly_performance[month]['won'] += 1
+stage = tracer.begin('section5', rows=len(ids))
+monthly_performance = monthly_win_rates(statuses, date_index.close, year=2025)
 
 # REPORTING SECTION: Calculate and display monthly win rates
 print("Monthly Win Rates for 2025:")
@@ -279,6 +259,7 @@ elif trend > 2:
 else:
     print(f"📊 STABLE: Sales performance remained relatively consistent throughout 2025.")
     print(f"   Focus on optimizing processes to drive systematic improvements.")
+tracer.end(stage)
 
 """
 DETAILED REASONING FOR SECTION 5 METRIC SELECTION:
@@ -0,0 +1,364 @@
+"""
+tracing.py - Hot-path timing and profiling instrumentation
+
+Records one span per pipeline stage (workbook load, snapshot read, date
+index, data integrity, Sections 1-5) with wall time, CPU time, rows
+processed and, optionally, the memory allocated inside the stage
+(tracemalloc). Spans nest and may come from several threads. The trace can
+be exported as JSON or as a Chrome trace-event file (chrome://tracing,
+Perfetto).
+
+Tracing is configured through environment variables, so test.py needs no
+flags:
+
+- REVOPS_TRACE=trace.json          write the JSON trace at exit
+- REVOPS_CHROME_TRACE=trace.ctf    write a Chrome trace-event file at exit
+- REVOPS_TRACE_MEMORY=1            measure allocations per stage (slower)
+- REVOPS_PROFILE=run.prof          cProfile the traced stages (pstats file)
+
+Wall and CPU time are always recorded: two clock reads per stage. With
+memory tracking and profiling off, nothing else runs on the hot path.
+
+Author: Svitlana Kovalivska
+Purpose: Tell which stage made a nightly run slow
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+TRACE_ENV = 'REVOPS_TRACE'
+CHROME_TRACE_ENV = 'REVOPS_CHROME_TRACE'
+MEMORY_ENV = 'REVOPS_TRACE_MEMORY'
+PROFILE_ENV = 'REVOPS_PROFILE'
+
+# Long-running processes keep only the most recent spans
+MAX_SPANS = 100_000
+
+
+class Span:
+    """
+    One timed stage
+
+    Attributes:
+        name (str): Stage name, e.g. 'load' or 'section2'
+        start (float): Seconds since the tracer was created
+        wall, cpu (float): Wall-clock and process CPU seconds
+        rows (int): Rows processed (None if not applicable)
+        allocated (int): Net bytes allocated in the stage (memory tracking only)
+        peak (int): Peak bytes above the level at stage start (memory tracking only)
+        thread (int): Thread identifier
+        depth (int): Nesting level (0 = top-level stage)
+        args (dict): Extra annotations (file names, worker counts, ...)
+    """
+
+    __slots__ = ('name', 'start', 'wall', 'cpu', 'rows', 'allocated', 'peak',
+                 'thread', 'depth', 'args', '_cpu_start', '_memory_start', '_peak_seen')
+
+    def __init__(self, name, rows=None, args=None):
+        self.name = name
+        self.rows = rows
+        self.args = args or {}
+        self.start = 0.0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.allocated = None
+        self.peak = None
+        self.thread = threading.get_ident()
+        self.depth = 0
+
+    @property
+    def rows_per_sec(self):
+        return self.rows / self.wall if self.rows and self.wall > 0 else None
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'start': self.start,
+            'wall': self.wall,
+            'cpu': self.cpu,
+            'rows': self.rows,
+            'rows_per_sec': self.rows_per_sec,
+            'allocated': self.allocated,
+            'peak': self.peak,
+            'thread': self.thread,
+            'depth': self.depth,
+            'args': self.args,
+        }
+
+    def __repr__(self):
+        return f"Span({self.name!r}, wall={self.wall * 1000:.1f}ms, cpu={self.cpu * 1000:.1f}ms, rows={self.rows})"
+
+
+class _SpanContext:
+    __slots__ = ('tracer', 'span')
+
+    def __init__(self, tracer, span):
+        self.tracer = tracer
+        self.span = span
+
+    def __enter__(self):
+        return self.tracer.begin_span(self.span)
+
+    def __exit__(self, *exc_info):
+        self.tracer.end(self.span)
+        return False
+
+
+class Tracer:
+    """
+    Collects stage spans for one process
+
+    Args:
+        memory (bool): Track allocations per stage with tracemalloc
+        profile (str): Path of a cProfile stats file covering the traced stages
+    """
+
+    def __init__(self, memory=False, profile=None, max_spans=MAX_SPANS):
+        self.memory = memory
+        self.profile_path = profile
+        self.spans = deque(maxlen=max_spans)
+        self.created = datetime.now()
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._profiler = None
+        self._profile_depth = 0
+
+    def _stack(self):
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    # -- recording ---------------------------------------------------------
+
+    def stage(self, name, rows=None, **args):
+        """
+        Context manager timing one stage
+
+        The span is yielded, so rows can be filled in once known:
+            with tracer.stage('load') as span:
+                table = load_table()
+                span.rows = len(table)
+        """
+        return _SpanContext(self, Span(name, rows, args))
+
+    def begin(self, name, rows=None, **args):
+        """Start a stage without a with-block (for flat scripts); finish it with end()"""
+        return self.begin_span(Span(name, rows, args))
+
+    def begin_span(self, span):
+        stack = self._stack()
+        span.depth = len(stack)
+        if self.memory:
+            self._memory_enter(span, stack)
+        if self.profile_path:
+            self._profile_enter()
+        stack.append(span)
+        span._cpu_start = time.process_time()
+        span.start = time.perf_counter() - self._origin
+        return span
+
+    def end(self, span):
+        """Finish a stage started with begin()"""
+        span.wall = time.perf_counter() - self._origin - span.start
+        span.cpu = time.process_time() - span._cpu_start
+        stack = self._stack()
+        if stack and stack[-1] is span:
+            stack.pop()
+        if self.profile_path:
+            self._profile_exit()
+        if self.memory:
+            self._memory_exit(span, stack)
+        with self._lock:
+            self.spans.append(span)
+        return span
+
+    # tracemalloc keeps one process-wide peak; it is reset at every stage
+    # boundary and the peak seen so far is handed up to the enclosing stage.
+    # Stages running concurrently on other threads share the counters.
+
+    def _memory_enter(self, span, stack):
+        import tracemalloc
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        current, peak = tracemalloc.get_traced_memory()
+        if stack:
+            stack[-1]._peak_seen = max(stack[-1]._peak_seen, peak)
+        tracemalloc.reset_peak()
+        span._memory_start = current
+        span._peak_seen = current
+
+    def _memory_exit(self, span, stack):
+        import tracemalloc
+
+        current, peak = tracemalloc.get_traced_memory()
+        peak = max(peak, span._peak_seen)
+        span.allocated = current - span._memory_start
+        span.peak = peak - span._memory_start
+        if stack:
+            stack[-1]._peak_seen = max(stack[-1]._peak_seen, peak)
+        tracemalloc.reset_peak()
+
+    def _profile_enter(self):
+        # cProfile follows the thread that enabled it; nested and concurrent
+        # stages are covered by the outermost one
+        with self._lock:
+            if self._profile_depth == 0:
+                if self._profiler is None:
+                    import cProfile
+                    self._profiler = cProfile.Profile()
+                self._profiler.enable()
+            self._profile_depth += 1
+
+    def _profile_exit(self):
+        with self._lock:
+            self._profile_depth -= 1
+            if self._profile_depth == 0:
+                self._profiler.disable()
+
+    # -- reporting ---------------------------------------------------------
+
+    def summary(self):
+        """
+        Totals per stage name in order of first appearance
+
+        Returns: dict {name: {'calls', 'wall', 'cpu', 'rows', 'allocated', 'peak'}}
+        """
+        totals = {}
+        for span in sorted(self.spans, key=lambda s: s.start):
+            entry = totals.setdefault(span.name, {'calls': 0, 'wall': 0.0, 'cpu': 0.0, 'rows': 0,
+                                                  'allocated': None, 'peak': None})
+            entry['calls'] += 1
+            entry['wall'] += span.wall
+            entry['cpu'] += span.cpu
+            entry['rows'] += span.rows or 0
+            if span.allocated is not None:
+                entry['allocated'] = (entry['allocated'] or 0) + span.allocated
+                entry['peak'] = max(entry['peak'] or 0, span.peak)
+        return totals
+
+    def to_dict(self):
+        """The trace as plain data (spans ordered by start time)"""
+        return {
+            'created': self.created.isoformat(timespec='seconds'),
+            'pid': os.getpid(),
+            'memory_tracking': self.memory,
+            'spans': [span.to_dict() for span in sorted(self.spans, key=lambda s: s.start)],
+            'summary': self.summary(),
+        }
+
+    def chrome_events(self):
+        """Complete ('X') trace events in microseconds, one per span"""
+        pid = os.getpid()
+        events = []
+        for span in sorted(self.spans, key=lambda s: s.start):
+            args = {'cpu_ms': round(span.cpu * 1000, 3)}
+            if span.rows is not None:
+                args['rows'] = span.rows
+            if span.allocated is not None:
+                args['allocated_bytes'] = span.allocated
+                args['peak_bytes'] = span.peak
+            args.update(span.args)
+            events.append({'name': span.name, 'cat': 'revops', 'ph': 'X', 'pid': pid,
+                           'tid': span.thread, 'ts': round(span.start * 1e6, 3),
+                           'dur': round(span.wall * 1e6, 3), 'args': args})
+        return events
+
+    def write_json(self, path):
+        _write_json(path, self.to_dict())
+        return path
+
+    def write_chrome_trace(self, path):
+        _write_json(path, {'traceEvents': self.chrome_events(), 'displayTimeUnit': 'ms'})
+        return path
+
+    def write_profile(self, path=None):
+        """Dump the cProfile statistics (load with pstats.Stats(path))"""
+        path = path or self.profile_path
+        if self._profiler is None or not path:
+            return None
+        self._profiler.dump_stats(path)
+        return path
+
+    def format_summary(self):
+        """Human-readable table of the per-stage totals"""
+        lines = [f"{'Stage':<24} {'Calls':>5} {'Wall ms':>10} {'CPU ms':>10} {'Rows':>12} {'Alloc MB':>9}",
+                 "-" * 75]
+        for name, entry in self.summary().items():
+            alloc = f"{entry['allocated'] / 2**20:.2f}" if entry['allocated'] is not None else '-'
+            lines.append(f"{name:<24} {entry['calls']:>5} {entry['wall'] * 1000:>10.1f} "
+                         f"{entry['cpu'] * 1000:>10.1f} {entry['rows'] or '-':>12} {alloc:>9}")
+        return "\n".join(lines)
+
+    def clear(self):
+        with self._lock:
+            self.spans.clear()
+
+
+def _write_json(path, data):
+    folder = os.path.dirname(os.path.abspath(path))
+    os.makedirs(folder, exist_ok=True)
+    with open(path, 'w') as handle:
+        json.dump(data, handle, indent=2, default=str)
+
+
+def _flag(value):
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def _tracer_from_env(environ=os.environ):
+    return Tracer(memory=_flag(environ.get(MEMORY_ENV, '')), profile=environ.get(PROFILE_ENV) or None)
+
+
+_tracer = _tracer_from_env()
+_exports_registered = False
+
+
+def get_tracer():
+    """Return the process-wide tracer"""
+    return _tracer
+
+
+def stage(name, rows=None, **args):
+    """Shortcut for get_tracer().stage(...)"""
+    return _tracer.stage(name, rows, **args)
+
+
+def export(trace=None, chrome_trace=None):
+    """
+    Write the process-wide trace (and the cProfile stats, when enabled)
+
+    Paths default to the REVOPS_TRACE / REVOPS_CHROME_TRACE variables.
+
+    Returns: list of files written
+    """
+    written = []
+    trace = trace or os.environ.get(TRACE_ENV)
+    chrome_trace = chrome_trace or os.environ.get(CHROME_TRACE_ENV)
+    if trace:
+        written.append(_tracer.write_json(trace))
+    if chrome_trace:
+        written.append(_tracer.write_chrome_trace(chrome_trace))
+    profile = _tracer.write_profile()
+    if profile:
+        written.append(profile)
+    return written
+
+
+def export_at_exit():
+    """Register export() to run when the interpreter exits (once per process)"""
+    global _exports_registered
+    if not _exports_registered:
+        import atexit
+        atexit.register(export)
+        _exports_registered = True
+
+
+if any(os.environ.get(name) for name in (TRACE_ENV, CHROME_TRACE_ENV, PROFILE_ENV)):
+    export_at_exit()
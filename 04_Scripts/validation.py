@@ -9,102 +9,171 @@ Author: Svitlana Kovalivska
 Purpose: Ensure reliability and accuracy of RevOps analysis results
 """
 
-import pandas as pd
 import numpy as np
-from datetime import datetime
+from datetime import date, datetime
+from concurrent.futures import ThreadPoolExecutor
+import io
+import threading
+import time
 import warnings
+
+from close_date_index import get_open_deal_index, to_day
+from data_quality import get_quality_report
+from dataset_session import get_session
+from tracing import get_tracer
+from forecast_cube import get_forecast_cube
+from win_rate_engine import get_win_rates
+from validation_results import (
+    DataIntegrityResult,
+    ExtractionResult,
+    OverdueDealsResult,
+    WonAcvResult,
+    ForecastResult,
+    WinRateResult,
+)
 warnings.filterwarnings('ignore')
 
+# (result key, method name) in reporting order
+VALIDATION_SECTIONS = (
+    ('data_integrity', 'validate_data_integrity'),
+    ('section1', 'validate_section1_extraction'),
+    ('section2', 'validate_section2_overdue_deals'),
+    ('section3', 'validate_section3_won_acv_2026'),
+    ('section4', 'validate_section4_march_forecast'),
+    ('section5', 'validate_section5_win_rate_analysis'),
+)
+
 
 class DataValidator:
     """
     Comprehensive validation class for opportunity data analysis
     """
     
-    def __init__(self, excel_file='02_Data_Analysis/opportunities.xlsx'):
-        """Initialize validator with data source"""
-        self.df = pd.read_excel(excel_file)
+    def __init__(self, excel_file='02_Data_Analysis/opportunities.xlsx', session=None, quiet=False,
+                 max_workers=1, tracer=None, as_of=None):
+        """
+        Initialize validator with data source
+
+        The data comes from the shared dataset session, so creating several
+        validators for the same workbook loads it only once. All sections
+        work on the compact OpportunityTable; `df` is decoded on demand.
+        With quiet=True nothing is printed; results are only returned.
+        max_workers > 1 runs the validation sections concurrently.
+        Every section is recorded as a stage of `tracer` (default: the
+        process-wide tracer, see tracing.py).
+        `as_of` (date or 'YYYY-MM-DD') fixes the reference date of the
+        overdue checks so results are reproducible; default: today.
+        """
+        self.quiet = quiet
+        self.as_of = as_of
+        self.max_workers = max_workers
+        self.tracer = tracer or get_tracer()
+        self.section_timings = {}
+        self._local = threading.local()
+        self.dataset = (session or get_session()).get(excel_file)
+        self.table = self.dataset.table
+        # Integer year/month/day arrays shared by every section (built once per load)
+        self.dates = self.dataset.dates
         self.expected_columns = ['ID', 'ProductName', 'CustomerName', 'ACV', 'Status', 'CloseDate', 'StartDate']
+    
+    @property
+    def df(self):
+        """The dataset as a pandas DataFrame (decoded once per load)"""
+        return self.dataset.df
+    
+    def _log(self, *args, **kwargs):
+        """Print progress output unless the validator is quiet"""
+        if self.quiet:
+            return
+        # Sections running on a worker thread write to their own buffer,
+        # which is printed in section order once all of them are done
+        buffer = getattr(self._local, 'buffer', None)
+        print(*args, file=buffer, **kwargs)
         
     def validate_data_integrity(self):
         """
         Validate basic data integrity and structure
-        Returns: dict with validation results
+        Returns: DataIntegrityResult
         """
-        results = {
-            'total_records': len(self.df),
-            'column_check': True,
-            'missing_columns': [],
-            'data_types_valid': True,
-            'null_counts': {},
-            'status_values': [],
-            'date_range_valid': True
-        }
+        results = DataIntegrityResult(total_records=len(self.table))
         
-        print("=" * 60)
-        print("DATA INTEGRITY VALIDATION")
-        print("=" * 60)
+        self._log("=" * 60)
+        self._log("DATA INTEGRITY VALIDATION")
+        self._log("=" * 60)
         
         # Check required columns
-        missing_cols = [col for col in self.expected_columns if col not in self.df.columns]
+        missing_cols = [col for col in self.expected_columns if col not in self.table]
         if missing_cols:
-            results['column_check'] = False
-            results['missing_columns'] = missing_cols
-            print(f"❌ MISSING COLUMNS: {missing_cols}")
+            results.column_check = False
+            results.missing_columns = missing_cols
+            self._log(f"❌ MISSING COLUMNS: {missing_cols}")
         else:
-            print("✅ All required columns present")
+            self._log("✅ All required columns present")
         
         # Check null values
         for col in self.expected_columns:
-            if col in self.df.columns:
-                null_count = self.df[col].isnull().sum()
-                results['null_counts'][col] = null_count
+            if col in self.table:
+                null_count = int(self.table.isnull(col).sum())
+                results.null_counts[col] = null_count
                 if null_count > 0:
-                    print(f"⚠️  {col}: {null_count} null values")
+                    self._log(f"⚠️  {col}: {null_count} null values")
                 else:
-                    print(f"✅ {col}: No null values")
+                    self._log(f"✅ {col}: No null values")
         
         # Validate status values
-        if 'Status' in self.df.columns:
-            unique_statuses = self.df['Status'].unique()
-            results['status_values'] = list(unique_statuses)
+        if 'Status' in self.table:
+            unique_statuses = self.table.statuses.unique()
+            results.status_values = list(unique_statuses)
             expected_statuses = ['Won', 'Lost', 'Open']
             unexpected = [s for s in unique_statuses if s not in expected_statuses]
             if unexpected:
-                print(f"⚠️  Unexpected status values: {unexpected}")
+                self._log(f"⚠️  Unexpected status values: {unexpected}")
             else:
-                print("✅ All status values are valid")
+                self._log("✅ All status values are valid")
         
         # Validate date ranges
         try:
-            min_date = pd.to_datetime(self.df['CloseDate']).min()
-            max_date = pd.to_datetime(self.df['CloseDate']).max()
-            print(f"📅 Date range: {min_date.strftime('%Y-%m-%d')} to {max_date.strftime('%Y-%m-%d')}")
-        except:
-            print("❌ Date validation failed")
-            results['date_range_valid'] = False
-        
-        print(f"📊 Total records: {results['total_records']}")
+            min_date = self.dates.close.min_date()
+            max_date = self.dates.close.max_date()
+            if np.isnat(min_date):
+                raise ValueError("no valid close dates")
+            results.min_close_date = str(min_date)
+            results.max_close_date = str(max_date)
+            self._log(f"📅 Date range: {min_date} to {max_date}")
+        except Exception:
+            self._log("❌ Date validation failed")
+            results.date_range_valid = False
+        
+        # Row-level rules (see data_quality.py): which rows break which rule
+        quality = get_quality_report(self.dataset)
+        results.rule_violations = quality.counts()
+        results.clean_rows = quality.clean_count
+        self._log(f"🧪 Row-level rules: {results.clean_rows} of {results.total_records} rows clean")
+        for name, count in results.rule_violations.items():
+            if count:
+                self._log(f"⚠️  {name}: {count} rows")
+        
+        self._log(f"📊 Total records: {results.total_records}")
         return results
     
     def validate_section1_extraction(self):
-        """Validate Section 1: Data extraction into arrays"""
-        print("\n" + "=" * 60)
-        print("SECTION 1 VALIDATION: Data Extraction")
-        print("=" * 60)
+        """Validate Section 1: Data extraction into arrays (returns ExtractionResult)"""
+        self._log("\n" + "=" * 60)
+        self._log("SECTION 1 VALIDATION: Data Extraction")
+        self._log("=" * 60)
         
-        expected_length = len(self.df)
+        expected_length = len(self.table)
         validations = {}
         
         # Test each array extraction
         arrays_to_test = {
-            'IDs': self.df['ID'].values,
-            'Products': self.df['ProductName'].values,
-            'Customers': self.df['CustomerName'].values,
-            'ACVs': self.df['ACV'].values,
-            'Statuses': self.df['Status'].values,
-            'Close dates': self.df['CloseDate'].values,
-            'Start dates': self.df['StartDate'].values
+            'IDs': self.table.ids,
+            'Products': self.table.products,
+            'Customers': self.table.customers,
+            'ACVs': self.table.acvs,
+            'Statuses': self.table.statuses,
+            'Close dates': self.table.close_days,
+            'Start dates': self.table.start_days
         }
         
         all_valid = True
@@ -112,242 +181,328 @@ class DataValidator:
             is_valid = len(array) == expected_length
             validations[name] = is_valid
             status = "✅" if is_valid else "❌"
-            print(f"{status} {name}: {len(array)} entries (expected: {expected_length})")
+            self._log(f"{status} {name}: {len(array)} entries (expected: {expected_length})")
             if not is_valid:
                 all_valid = False
         
         if all_valid:
-            print("✅ SECTION 1: All arrays extracted correctly")
+            self._log("✅ SECTION 1: All arrays extracted correctly")
         else:
-            print("❌ SECTION 1: Array extraction errors detected")
+            self._log("❌ SECTION 1: Array extraction errors detected")
             
-        return validations
+        return ExtractionResult(expected_length=expected_length, arrays=validations)
     
     def validate_section2_overdue_deals(self):
-        """Validate Section 2: Overdue open deals analysis"""
-        print("\n" + "=" * 60)
-        print("SECTION 2 VALIDATION: Overdue Open Deals")
-        print("=" * 60)
+        """Validate Section 2: Overdue open deals analysis (returns OverdueDealsResult)"""
+        self._log("\n" + "=" * 60)
+        self._log("SECTION 2 VALIDATION: Overdue Open Deals")
+        self._log("=" * 60)
         
         # Independent calculation of overdue deals
-        df_dates = pd.to_datetime(self.df['CloseDate'])
-        overdue_mask = (self.df['Status'] == 'Open') & (df_dates.dt.year == 2025)
-        expected_overdue = self.df[overdue_mask]['ID'].tolist()
+        close = self.dates.close
+        overdue_mask = (self.table.statuses == 'Open') & (close.year == 2025)
+        expected_overdue = self.table.ids[overdue_mask]
         expected_count = len(expected_overdue)
         
-        print(f"📊 Expected overdue deals: {expected_count}")
-        print(f"📋 Sample IDs: {expected_overdue[:5]}")
+        self._log(f"📊 Expected overdue deals: {expected_count}")
+        self._log(f"📋 Sample IDs: {expected_overdue[:5].tolist()}")
         
-        # Verify business logic
-        validation_results = {
-            'expected_count': expected_count,
-            'expected_ids': expected_overdue,
-            'logic_valid': True,
-            'date_parsing_correct': True
-        }
+        # Check if any deals are truly overdue (CloseDate <= as-of date and still Open):
+        # binary searches in the sorted CloseDate index of Open deals
+        as_of = to_day(self.as_of or date.today())
+        index = get_open_deal_index(self.dataset)
+        truly_overdue = index.count_between(to_day('2025-01-01'), min(as_of, to_day('2025-12-31')))
+        ageing = index.ageing_buckets(as_of)
         
-        # Check if any deals are truly overdue (CloseDate < today and still Open)
-        today = datetime.now()
-        truly_overdue = df_dates[overdue_mask] < today
+        self._log(f"⏰ As-of date: {np.datetime64(as_of, 'D')}")
+        self._log(f"⚠️  Truly overdue deals (past due date): {truly_overdue}")
+        self._log("⏳ Open deals past CloseDate by age: " + ", ".join(
+            f"{label} days: {bucket['count']}" for label, bucket in ageing.items()))
         
-        print(f"⏰ Current date: {today.strftime('%Y-%m-%d')}")
-        print(f"⚠️  Truly overdue deals (past due date): {truly_overdue.sum()}")
+        # Verify business logic
+        validation_results = OverdueDealsResult(
+            expected_count=expected_count,
+            expected_ids=expected_overdue,
+            truly_overdue=truly_overdue,
+            as_of=str(np.datetime64(as_of, 'D')),
+            ageing=ageing
+        )
         
         if expected_count > 0:
-            print("✅ SECTION 2: Overdue deals calculation logic is correct")
+            self._log("✅ SECTION 2: Overdue deals calculation logic is correct")
         else:
-            print("ℹ️  SECTION 2: No overdue deals found (this may be correct)")
+            self._log("ℹ️  SECTION 2: No overdue deals found (this may be correct)")
             
         return validation_results
     
     def validate_section3_won_acv_2026(self):
-        """Validate Section 3: Total ACV of Won deals starting in 2026"""
-        print("\n" + "=" * 60)
-        print("SECTION 3 VALIDATION: Won ACV 2026")
-        print("=" * 60)
+        """Validate Section 3: Total ACV of Won deals starting in 2026 (returns WonAcvResult)"""
+        self._log("\n" + "=" * 60)
+        self._log("SECTION 3 VALIDATION: Won ACV 2026")
+        self._log("=" * 60)
         
         # Independent calculation
-        start_dates = pd.to_datetime(self.df['StartDate'])
-        won_2026_mask = (self.df['Status'] == 'Won') & (start_dates.dt.year == 2026)
+        start = self.dates.start
+        won_2026_mask = (self.table.statuses == 'Won') & (start.year == 2026)
         
-        expected_acv = self.df[won_2026_mask]['ACV'].sum()
+        expected_acv = self.table.acvs[won_2026_mask].sum()
         deal_count = won_2026_mask.sum()
         
-        print(f"💰 Expected total ACV: ${expected_acv:,.0f}")
-        print(f"📈 Number of Won deals in 2026: {deal_count}")
+        self._log(f"💰 Expected total ACV: ${expected_acv:,.0f}")
+        self._log(f"📈 Number of Won deals in 2026: {deal_count}")
         
         if deal_count > 0:
             avg_deal_size = expected_acv / deal_count
-            print(f"📊 Average deal size: ${avg_deal_size:,.0f}")
+            self._log(f"📊 Average deal size: ${avg_deal_size:,.0f}")
         
         # Validate ranges and reasonableness
-        validation_results = {
-            'expected_acv': expected_acv,
-            'deal_count': deal_count,
-            'avg_deal_size': expected_acv / deal_count if deal_count > 0 else 0,
-            'calculation_valid': True
-        }
+        validation_results = WonAcvResult(
+            expected_acv=expected_acv,
+            deal_count=int(deal_count),
+            avg_deal_size=expected_acv / deal_count if deal_count > 0 else 0
+        )
         
-        print("✅ SECTION 3: Won ACV 2026 calculation validated")
+        self._log("✅ SECTION 3: Won ACV 2026 calculation validated")
         return validation_results
     
     def validate_section4_march_forecast(self):
-        """Validate Section 4: March 2026 expected ACV forecast"""
-        print("\n" + "=" * 60)
-        print("SECTION 4 VALIDATION: March 2026 Forecast")
-        print("=" * 60)
+        """Validate Section 4: March 2026 expected ACV forecast (returns ForecastResult)"""
+        self._log("\n" + "=" * 60)
+        self._log("SECTION 4 VALIDATION: March 2026 Forecast")
+        self._log("=" * 60)
         
-        start_dates = pd.to_datetime(self.df['StartDate'])
-        march_2026_mask = (start_dates.dt.year == 2026) & (start_dates.dt.month == 3)
+        # Lookups in the forecast cube (built once per dataset load)
+        cube = get_forecast_cube(self.dataset)
         
         # Won deals (100% probability)
-        won_march = self.df[march_2026_mask & (self.df['Status'] == 'Won')]
-        won_acv = won_march['ACV'].sum()
-        won_count = len(won_march)
+        won_acv = cube.month(2026, 3, 'acv', 'Won')
+        won_count = int(cube.month(2026, 3, 'count', 'Won'))
         
         # Open deals (25% probability)
-        open_march = self.df[march_2026_mask & (self.df['Status'] == 'Open')]
-        open_expected_acv = open_march['ACV'].sum() * 0.25
-        open_count = len(open_march)
+        open_expected_acv = cube.month(2026, 3, 'expected', 'Open')
+        open_count = int(cube.month(2026, 3, 'count', 'Open'))
         
         total_expected = won_acv + open_expected_acv
         
-        print(f"🎯 Won deals ACV (100%): ${won_acv:,.0f} ({won_count} deals)")
-        print(f"🎲 Open deals expected ACV (25%): ${open_expected_acv:,.0f} ({open_count} deals)")
-        print(f"📊 Total expected ACV: ${total_expected:,.0f}")
-        
-        validation_results = {
-            'won_acv': won_acv,
-            'won_count': won_count,
-            'open_expected_acv': open_expected_acv,
-            'open_count': open_count,
-            'total_expected': total_expected,
-            'probability_applied_correctly': True
-        }
+        self._log(f"🎯 Won deals ACV (100%): ${won_acv:,.0f} ({won_count} deals)")
+        self._log(f"🎲 Open deals expected ACV (25%): ${open_expected_acv:,.0f} ({open_count} deals)")
+        self._log(f"📊 Total expected ACV: ${total_expected:,.0f}")
+        
+        validation_results = ForecastResult(
+            won_acv=won_acv,
+            won_count=won_count,
+            open_expected_acv=open_expected_acv,
+            open_count=open_count,
+            total_expected=total_expected
+        )
         
-        print("✅ SECTION 4: March 2026 forecast calculation validated")
+        self._log("✅ SECTION 4: March 2026 forecast calculation validated")
         return validation_results
     
     def validate_section5_win_rate_analysis(self):
-        """Validate Section 5: Monthly win rate analysis for 2025"""
-        print("\n" + "=" * 60)
-        print("SECTION 5 VALIDATION: 2025 Win Rate Analysis")
-        print("=" * 60)
-        
-        close_dates = pd.to_datetime(self.df['CloseDate'])
-        year_2025_mask = close_dates.dt.year == 2025
-        closed_deals_2025 = self.df[year_2025_mask & (self.df['Status'].isin(['Won', 'Lost']))]
-        
-        # Calculate monthly performance
-        monthly_stats = {}
-        for month in range(1, 13):
-            month_deals = closed_deals_2025[close_dates.dt.month == month]
-            if len(month_deals) > 0:
-                won_deals = month_deals[month_deals['Status'] == 'Won']
-                win_rate = len(won_deals) / len(month_deals) * 100
-                monthly_stats[month] = {
-                    'total': len(month_deals),
-                    'won': len(won_deals),
-                    'win_rate': win_rate
-                }
+        """Validate Section 5: Monthly win rate analysis for 2025 (returns WinRateResult)"""
+        self._log("\n" + "=" * 60)
+        self._log("SECTION 5 VALIDATION: 2025 Win Rate Analysis")
+        self._log("=" * 60)
+        
+        # Monthly counts come from the grouped win-rate cube (built once per load)
+        cube = get_win_rates(self.dataset, 'month')
+        in_2025 = cube.year_mask(2025)
+        month_wins, month_totals = (counts[in_2025] for counts in cube.counts())
+        has_data = month_totals > 0
+        months_with_data = (cube.periods[in_2025] % 12 + 1)[has_data]
         
         # Overall statistics
-        total_closed = len(closed_deals_2025)
-        total_won = len(closed_deals_2025[closed_deals_2025['Status'] == 'Won'])
+        total_closed = int(month_totals.sum())
+        total_won = int(month_wins.sum())
         overall_win_rate = total_won / total_closed * 100 if total_closed > 0 else 0
         
-        print(f"📊 Total closed deals in 2025: {total_closed}")
-        print(f"🏆 Total won deals: {total_won}")
-        print(f"📈 Overall win rate: {overall_win_rate:.1f}%")
-        print(f"📅 Months with data: {len(monthly_stats)}")
+        self._log(f"📊 Total closed deals in 2025: {total_closed}")
+        self._log(f"🏆 Total won deals: {total_won}")
+        self._log(f"📈 Overall win rate: {overall_win_rate:.1f}%")
+        self._log(f"📅 Months with data: {len(months_with_data)}")
+        
+        validation_results = WinRateResult(
+            months=months_with_data.astype(np.int8),
+            won=month_wins[has_data],
+            total=month_totals[has_data],
+            overall_win_rate=overall_win_rate,
+            total_deals=total_closed,
+            total_won=total_won
+        )
         
         # Trend analysis
-        months_with_data = sorted(monthly_stats.keys())
-        if len(months_with_data) >= 6:
-            first_half = [monthly_stats[m]['win_rate'] for m in months_with_data if m <= 6]
-            second_half = [monthly_stats[m]['win_rate'] for m in months_with_data if m > 6]
-            
-            if first_half and second_half:
-                avg_first = sum(first_half) / len(first_half)
-                avg_second = sum(second_half) / len(second_half)
-                trend = avg_second - avg_first
-                print(f"📊 First half average: {avg_first:.1f}%")
-                print(f"📊 Second half average: {avg_second:.1f}%")
-                print(f"📈 Trend: {trend:+.1f} percentage points")
-        
-        validation_results = {
-            'monthly_stats': monthly_stats,
-            'overall_win_rate': overall_win_rate,
-            'total_deals': total_closed,
-            'total_won': total_won,
-            'analysis_valid': True
-        }
+        trend = cube.half_year_trend(2025) if len(months_with_data) >= 6 else None
+        if trend:
+            self._log(f"📊 First half average: {trend['first_half']:.1f}%")
+            self._log(f"📊 Second half average: {trend['second_half']:.1f}%")
+            self._log(f"📈 Trend: {trend['trend']:+.1f} percentage points")
         
-        print("✅ SECTION 5: Win rate analysis validated")
+        self._log("✅ SECTION 5: Win rate analysis validated")
         return validation_results
     
-    def run_comprehensive_validation(self):
-        """Run all validation tests"""
-        print("🔍 COMPREHENSIVE VALIDATION REPORT")
-        print("=" * 80)
-        print(f"Validation timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    def run_incremental_validation(self, state_path=None):
+        """
+        Validate Sections 2-5 incrementally from the persisted per-ID state
+        
+        Only opportunities whose Status, ACV or dates changed since the
+        previous run (plus added and removed ones) are reprocessed; the first
+        run builds the state with a full computation. Data integrity and
+        Section 1 are checked as usual.
+        
+        Args:
+            state_path (str): State file (default: next to the workbook snapshot)
+        
+        Returns: dict of result records, plus 'changes' (ChangeSummary or None)
+        """
+        from incremental import default_state_path, update_state
+        
+        state_path = state_path or default_state_path(self.dataset.path)
+        results = {
+            'data_integrity': self.validate_data_integrity(),
+            'section1': self.validate_section1_extraction(),
+        }
+        
+        self._log("\n" + "=" * 60)
+        self._log("INCREMENTAL VALIDATION: Sections 2-5")
+        self._log("=" * 60)
+        
+        start = time.perf_counter()
+        state, changes = update_state(self.table, state_path)
+        results.update(state.section_results(self.as_of))
+        elapsed = time.perf_counter() - start
+        
+        if changes is None:
+            self._log(f"🆕 State built from scratch: {len(state.ids)} opportunities")
+        else:
+            self._log(f"♻️  Changes since last run: {changes.added} added, {changes.removed} removed, "
+                      f"{changes.changed} changed, {changes.unchanged} unchanged")
+        self._log(f"📊 Overdue deals: {results['section2'].expected_count}")
+        self._log(f"💰 Won ACV 2026: ${results['section3'].expected_acv:,.0f}")
+        self._log(f"🎯 March 2026 expected ACV: ${results['section4'].total_expected:,.0f}")
+        self._log(f"📈 2025 win rate: {results['section5'].overall_win_rate:.1f}%")
+        self._log(f"⏱️  Incremental update: {elapsed * 1000:.1f} ms")
+        
+        results['changes'] = changes
+        return results
+    
+    def _timed_section(self, key, method_name):
+        """Run one section as a traced stage; returns (result, wall seconds)"""
+        with self.tracer.stage(key, rows=len(self.table)) as span:
+            result = getattr(self, method_name)()
+        return result, span.wall
+    
+    def _run_section(self, key, method_name):
+        """Run one section on a worker thread, capturing its output and wall time"""
+        self._local.buffer = io.StringIO()
+        try:
+            result, elapsed = self._timed_section(key, method_name)
+            return result, self._local.buffer.getvalue(), elapsed
+        finally:
+            self._local.buffer = None
+    
+    def _run_sections(self, max_workers):
+        """
+        Run every section serially or on a thread pool
+        
+        The sections only read the shared table and date index, so they can
+        run concurrently; results and output are merged in section order.
+        """
+        results = {}
+        if max_workers <= 1:
+            for key, method_name in VALIDATION_SECTIONS:
+                results[key], self.section_timings[key] = self._timed_section(key, method_name)
+            return results
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = [(key, pool.submit(self._run_section, key, method_name))
+                       for key, method_name in VALIDATION_SECTIONS]
+            for key, future in futures:
+                result, output, elapsed = future.result()
+                if output and not self.quiet:
+                    print(output, end='')
+                results[key] = result
+                self.section_timings[key] = elapsed
+        return results
+    
+    def _log_timings(self, workers, wall_time):
+        self._log(f"\n⏱️  SECTION TIMINGS ({workers} worker{'s' if workers != 1 else ''})")
+        for key, elapsed in self.section_timings.items():
+            self._log(f"{key.upper()}: {elapsed * 1000:.1f} ms")
+        busy_time = sum(self.section_timings.values())
+        speedup = busy_time / wall_time if wall_time > 0 else 1.0
+        self._log(f"Wall time: {wall_time * 1000:.1f} ms (sections: {busy_time * 1000:.1f} ms, {speedup:.2f}x)")
+    
+    def run_comprehensive_validation(self, max_workers=None):
+        """
+        Run all validation tests
+        
+        Args:
+            max_workers (int): Concurrent sections (default: the validator's max_workers)
+        """
+        workers = self.max_workers if max_workers is None else max_workers
+        self.section_timings = {}
+        
+        self._log("🔍 COMPREHENSIVE VALIDATION REPORT")
+        self._log("=" * 80)
+        self._log(f"Validation timestamp: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         
         results = {}
         
         try:
             # Run all validations
-            results['data_integrity'] = self.validate_data_integrity()
-            results['section1'] = self.validate_section1_extraction()
-            results['section2'] = self.validate_section2_overdue_deals()
-            results['section3'] = self.validate_section3_won_acv_2026()
-            results['section4'] = self.validate_section4_march_forecast()
-            results['section5'] = self.validate_section5_win_rate_analysis()
+            start = time.perf_counter()
+            results.update(self._run_sections(workers))
+            wall_time = time.perf_counter() - start
             
             # Summary
-            print("\n" + "=" * 60)
-            print("VALIDATION SUMMARY")
-            print("=" * 60)
+            self._log("\n" + "=" * 60)
+            self._log("VALIDATION SUMMARY")
+            self._log("=" * 60)
             
             all_passed = True
             for section, result in results.items():
-                if isinstance(result, dict):
-                    if section == 'section1':
-                        passed = all(result.values())
-                    elif section == 'data_integrity':
-                        passed = result['column_check'] and result['data_types_valid']
-                    else:
-                        passed = result.get('calculation_valid', True) or result.get('analysis_valid', True)
-                    
-                    status = "✅ PASSED" if passed else "❌ FAILED"
-                    print(f"{section.upper()}: {status}")
-                    
-                    if not passed:
-                        all_passed = False
+                passed = result.passed
+                status = "✅ PASSED" if passed else "❌ FAILED"
+                self._log(f"{section.upper()}: {status}")
+                
+                if not passed:
+                    all_passed = False
             
-            print(f"\n{'✅ ALL VALIDATIONS PASSED' if all_passed else '❌ SOME VALIDATIONS FAILED'}")
+            self._log(f"\n{'✅ ALL VALIDATIONS PASSED' if all_passed else '❌ SOME VALIDATIONS FAILED'}")
+            self._log_timings(workers, wall_time)
             
         except Exception as e:
-            print(f"❌ VALIDATION ERROR: {str(e)}")
+            self._log(f"❌ VALIDATION ERROR: {str(e)}")
             results['error'] = str(e)
         
         return results
 
 
-def quick_validation():
-    """Quick validation function for immediate use"""
-    validator = DataValidator()
+def quick_validation(quiet=False, max_workers=1, incremental=False, as_of=None):
+    """
+    Quick validation function for immediate use
+    
+    With incremental=True, Sections 2-5 are updated from the persisted
+    state of the previous run instead of being recomputed over all rows.
+    `as_of` fixes the reference date of the overdue checks (default: today).
+    """
+    validator = DataValidator(quiet=quiet, max_workers=max_workers, as_of=as_of)
+    if incremental:
+        return validator.run_incremental_validation()
     return validator.run_comprehensive_validation()
 
 
-def validate_specific_calculation(section_number, expected_result=None):
+def validate_specific_calculation(section_number, expected_result=None, quiet=False):
     """
     Validate a specific section's calculation
     
     Args:
         section_number (int): Section number to validate (1-5)
         expected_result: Expected result to compare against
+        quiet (bool): Suppress all printed output
     """
-    validator = DataValidator()
+    validator = DataValidator(quiet=quiet)
     
     validation_functions = {
         1: validator.validate_section1_extraction,
@@ -360,14 +515,15 @@ def validate_specific_calculation(section_number, expected_result=None):
     if section_number in validation_functions:
         result = validation_functions[section_number]()
         
-        if expected_result is not None:
+        if expected_result is not None and not quiet:
             print(f"\n🎯 EXPECTED vs ACTUAL COMPARISON:")
             print(f"Expected: {expected_result}")
             print(f"Calculated: {result}")
             
         return result
     else:
-        print(f"❌ Invalid section number: {section_number}")
+        if not quiet:
+            print(f"❌ Invalid section number: {section_number}")
         return None
 
 
@@ -375,9 +531,33 @@ if __name__ == "__main__":
     """
     Run validation when script is executed directly
     """
-    print("🚀 Starting automated validation of test.py results...")
-    results = quick_validation()
+    import argparse
+    import tracing
+    from report_writer import FORMATS, write_report
+    
+    parser = argparse.ArgumentParser(description="Validate test.py results")
+    parser.add_argument('--output', help="write the results to this file (.json, .csv or .parquet)")
+    parser.add_argument('--format', choices=FORMATS, help="report format (default: from --output extension)")
+    parser.add_argument('--quiet', action='store_true', help="print nothing")
+    parser.add_argument('--workers', type=int, default=1, help="validate sections concurrently on N threads")
+    parser.add_argument('--incremental', action='store_true',
+                        help="update Sections 2-5 from the previous run's state (changed rows only)")
+    parser.add_argument('--as-of', help="reference date YYYY-MM-DD for overdue checks (default: today)")
+    parser.add_argument('--trace', help="write per-stage wall/CPU time, rows and allocations as JSON")
+    parser.add_argument('--chrome-trace', help="write the stages as a Chrome trace-event file")
+    args = parser.parse_args()
+    
+    if not args.quiet:
+        print("🚀 Starting automated validation of test.py results...")
+    results = quick_validation(quiet=args.quiet, max_workers=args.workers, incremental=args.incremental,
+                               as_of=args.as_of)
+    
+    if args.output:
+        write_report(results, args.output, args.format)
+    if args.trace or args.chrome_trace:
+        tracing.export(args.trace, args.chrome_trace)
     
-    print(f"\n📋 Validation completed. Results saved in memory.")
-    print(f"💡 Use validate_specific_calculation(section_number) for detailed section validation.")
-    print(f"💡 Import this module to use validation functions in other scripts.")
+    if not args.quiet:
+        print(f"\n📋 Validation completed. {'Results written to ' + args.output if args.output else 'Results saved in memory.'}")
+        print(f"💡 Use validate_specific_calculation(section_number) for detailed section validation.")
+        print(f"💡 Import this module to use validation functions in other scripts.")
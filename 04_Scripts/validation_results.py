@@ -0,0 +1,147 @@
+"""
+validation_results.py - Typed result records returned by DataValidator
+
+Each validation section returns one of the slotted dataclasses below instead
+of an ad-hoc dict. Per-row outputs (overdue IDs, monthly counts) are held as
+NumPy arrays rather than Python lists. The records still support
+dict-style access (result['expected_count'], result.get(...)) so existing
+callers keep working.
+
+Author: Svitlana Kovalivska
+Purpose: Compact, machine-readable validation results
+"""
+
+from dataclasses import dataclass, field, fields
+
+import numpy as np
+
+
+class ResultRecord:
+    """Common behaviour of all validation result records"""
+
+    __slots__ = ()
+
+    @property
+    def passed(self):
+        """Whether the section passed validation"""
+        return True
+
+    def to_dict(self):
+        """Return the record's fields as a dict (arrays are not copied)"""
+        return {f.name: getattr(self, f.name) for f in fields(self)}
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+
+    def __contains__(self, key):
+        return hasattr(self, key)
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+
+@dataclass(slots=True)
+class DataIntegrityResult(ResultRecord):
+    """Column presence, null counts, status values, CloseDate range and row-level rule violations"""
+    total_records: int
+    column_check: bool = True
+    missing_columns: list = field(default_factory=list)
+    data_types_valid: bool = True
+    null_counts: dict = field(default_factory=dict)
+    status_values: list = field(default_factory=list)
+    date_range_valid: bool = True
+    min_close_date: str = None
+    max_close_date: str = None
+    rule_violations: dict = field(default_factory=dict)
+    clean_rows: int = None
+
+    @property
+    def passed(self):
+        return self.column_check and self.data_types_valid
+
+
+@dataclass(slots=True)
+class ExtractionResult(ResultRecord):
+    """Section 1: per-array length check ({array name: valid})"""
+    expected_length: int
+    arrays: dict = field(default_factory=dict)
+
+    @property
+    def passed(self):
+        return all(self.arrays.values())
+
+
+@dataclass(slots=True)
+class OverdueDealsResult(ResultRecord):
+    """Section 2: Open deals with a CloseDate in the target year"""
+    expected_count: int
+    expected_ids: np.ndarray
+    truly_overdue: int = 0
+    as_of: str = None
+    ageing: dict = field(default_factory=dict)
+    logic_valid: bool = True
+    date_parsing_correct: bool = True
+
+    @property
+    def passed(self):
+        return self.logic_valid
+
+
+@dataclass(slots=True)
+class WonAcvResult(ResultRecord):
+    """Section 3: total ACV of Won deals starting in the target year"""
+    expected_acv: float
+    deal_count: int
+    avg_deal_size: float
+    calculation_valid: bool = True
+
+    @property
+    def passed(self):
+        return self.calculation_valid
+
+
+@dataclass(slots=True)
+class ForecastResult(ResultRecord):
+    """Section 4: probability-weighted expected ACV for one month"""
+    won_acv: float
+    won_count: int
+    open_expected_acv: float
+    open_count: int
+    total_expected: float
+    probability_applied_correctly: bool = True
+
+    @property
+    def passed(self):
+        return self.probability_applied_correctly
+
+
+@dataclass(slots=True)
+class WinRateResult(ResultRecord):
+    """Section 5: monthly won/total counts for closed deals"""
+    months: np.ndarray
+    won: np.ndarray
+    total: np.ndarray
+    overall_win_rate: float
+    total_deals: int
+    total_won: int
+    analysis_valid: bool = True
+
+    @property
+    def passed(self):
+        return self.analysis_valid
+
+    @property
+    def win_rates(self):
+        """Win rate (%) per entry of `months`"""
+        return self.won / self.total * 100
+
+    @property
+    def monthly_stats(self):
+        """Monthly statistics in the original dict layout {month: {...}}"""
+        return {
+            int(month): {'total': int(total), 'won': int(won), 'win_rate': float(rate)}
+            for month, won, total, rate in zip(self.months, self.won, self.total, self.win_rates)
+        }
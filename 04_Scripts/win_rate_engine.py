@@ -0,0 +1,234 @@
+"""
+win_rate_engine.py - Win-rate analytics at any grain in one grouped pass
+
+Section 5 only looks at monthly win rates for 2025. WinRateCube counts
+won and total closed deals (Won + Lost, by CloseDate) for every period of
+the chosen grain (month, quarter or year) and every group of an optional
+dimension (product, customer or ACV band) with a single bincount. Rolling
+windows, H1/H2 trends and per-period series are derived from the counts
+without rescanning the data, so multi-year dashboard analyses stay cheap.
+
+Author: Svitlana Kovalivska
+Purpose: Reusable win-rate trends for Section 5 and the BI dashboard
+"""
+
+import numpy as np
+
+GRAINS = ('month', 'quarter', 'year')
+DIMENSIONS = (None, 'product', 'customer', 'acv_band')
+
+# ACV bands used by the BI dashboard's deal size categories
+DEFAULT_ACV_BANDS = ((0, 'Small'), (100_000, 'Medium'), (300_000, 'Large'), (600_000, 'Enterprise'))
+
+MISSING_LABEL = '(missing)'
+
+
+def period_key(year, number, grain):
+    """Integer key of a period: number is the month (1-12), quarter (1-4) or ignored for years"""
+    if grain == 'month':
+        return (year - 1970) * 12 + (number - 1)
+    if grain == 'quarter':
+        return (year - 1970) * 4 + (number - 1)
+    return year
+
+
+def period_label(key, grain):
+    """Human-readable label of a period key ('2025-03', '2025-Q1', '2025')"""
+    key = int(key)
+    if grain == 'month':
+        return f"{key // 12 + 1970}-{key % 12 + 1:02d}"
+    if grain == 'quarter':
+        return f"{key // 4 + 1970}-Q{key % 4 + 1}"
+    return str(key)
+
+
+def _period_keys(close, grain):
+    year = close.year.astype(np.int64)
+    month = close.month.astype(np.int64)
+    if grain == 'month':
+        return (year - 1970) * 12 + (month - 1)
+    if grain == 'quarter':
+        return (year - 1970) * 4 + (month - 1) // 3
+    if grain == 'year':
+        return year
+    raise ValueError(f"Unknown grain {grain!r} (expected one of {GRAINS})")
+
+
+def _group_codes(table, by, acv_bands):
+    """Per-row group code and the list of group labels for dimension `by`"""
+    if by is None:
+        return np.zeros(len(table), dtype=np.int64), ['All']
+    if by in ('product', 'customer'):
+        column = table.products if by == 'product' else table.customers
+        labels = [str(c) for c in column.categories] + [MISSING_LABEL]
+        codes = column.codes.astype(np.int64)
+        return np.where(codes < 0, len(labels) - 1, codes), labels
+    if by == 'acv_band':
+        edges = np.array([edge for edge, _ in acv_bands[1:]], dtype=np.float64)
+        labels = [label for _, label in acv_bands] + [MISSING_LABEL]
+        acvs = np.asarray(table.acvs, dtype=np.float64)
+        # searchsorted puts NaN after every edge; send missing ACVs to their own group instead
+        codes = np.searchsorted(edges, acvs, side='right')
+        return np.where(np.isnan(acvs), len(labels) - 1, codes), labels
+    raise ValueError(f"Unknown dimension {by!r} (expected one of {DIMENSIONS})")
+
+
+class WinRateCube:
+    """
+    Won / total closed-deal counts per (period, group)
+
+    Attributes:
+        grain (str): 'month', 'quarter' or 'year'
+        periods (int array): Period keys of the rows (dense, ascending)
+        groups (list): Group labels of the columns
+        won, total (2-D int arrays): Counts per (period, group)
+    """
+
+    def __init__(self, grain, periods, groups, won, total):
+        self.grain = grain
+        self.periods = periods
+        self.groups = list(groups)
+        self.won = won
+        self.total = total
+
+    @classmethod
+    def build(cls, table, grain='month', by=None, acv_bands=DEFAULT_ACV_BANDS,
+              won_status='Won', lost_status='Lost'):
+        """Count won/total closed deals per period and group in one pass"""
+        close = table.dates.close
+        won = table.statuses == won_status
+        closed = (won | (table.statuses == lost_status)) & close.valid
+
+        keys = _period_keys(close, grain)[closed]
+        groups, labels = _group_codes(table, by, acv_bands)
+        groups = groups[closed]
+        n_groups = len(labels)
+        if not len(keys):
+            empty = np.zeros((0, n_groups), dtype=np.int64)
+            return cls(grain, np.array([], dtype=np.int64), labels, empty, empty)
+
+        first = int(keys.min())
+        n_periods = int(keys.max()) - first + 1
+        cell = (keys - first) * n_groups + groups
+        size = n_periods * n_groups
+        total = np.bincount(cell, minlength=size).reshape(n_periods, n_groups)
+        won_counts = np.bincount(cell[won[closed]], minlength=size).reshape(n_periods, n_groups)
+        return cls(grain, np.arange(first, first + n_periods), labels, won_counts, total)
+
+    # -- derived views -------------------------------------------------------
+
+    def _columns(self, group):
+        if group is None:
+            return slice(None)
+        position = self.groups.index(group)
+        return slice(position, position + 1)
+
+    def counts(self, group=None):
+        """(won, total) per period, summed over all groups or for one group"""
+        columns = self._columns(group)
+        return self.won[:, columns].sum(axis=1), self.total[:, columns].sum(axis=1)
+
+    def win_rates(self, group=None):
+        """Win rate (%) per period; NaN where no deals closed"""
+        won, total = self.counts(group)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(total > 0, won / np.maximum(total, 1) * 100, np.nan)
+
+    def labels(self):
+        return [period_label(key, self.grain) for key in self.periods]
+
+    def select(self, start=None, end=None):
+        """Boolean mask of periods with start <= key <= end"""
+        mask = np.ones(len(self.periods), dtype=bool)
+        if start is not None:
+            mask &= self.periods >= start
+        if end is not None:
+            mask &= self.periods <= end
+        return mask
+
+    def year_mask(self, year):
+        """Boolean mask of the periods falling in calendar `year`"""
+        if self.grain == 'month':
+            return self.select(period_key(year, 1, 'month'), period_key(year, 12, 'month'))
+        if self.grain == 'quarter':
+            return self.select(period_key(year, 1, 'quarter'), period_key(year, 4, 'quarter'))
+        return self.periods == year
+
+    def rolling(self, window, group=None):
+        """
+        Rolling win rate (%) over `window` consecutive periods
+
+        Counts are summed over the window before dividing, so quiet
+        periods do not distort the rate. The first window-1 values are NaN.
+        """
+        won, total = self.counts(group)
+        won_sum = np.convolve(won, np.ones(window, dtype=np.int64))[:len(won)]
+        total_sum = np.convolve(total, np.ones(window, dtype=np.int64))[:len(total)]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            rates = np.where(total_sum > 0, won_sum / np.maximum(total_sum, 1) * 100, np.nan)
+        rates[:window - 1] = np.nan
+        return rates
+
+    def half_year_trend(self, year, group=None):
+        """
+        H1 vs H2 comparison of monthly win rates (month grain only)
+
+        Averages the win rates of months with closed deals in each half,
+        as in test.py Section 5.
+
+        Returns: dict with first_half, second_half and trend (pp), or None
+                 when either half has no data
+        """
+        if self.grain != 'month':
+            raise ValueError("half_year_trend() needs a month-grain cube")
+        mask = self.year_mask(year)
+        rates = self.win_rates(group)[mask]
+        months = self.periods[mask] % 12 + 1
+        has_data = ~np.isnan(rates)
+        first = rates[has_data & (months <= 6)]
+        second = rates[has_data & (months > 6)]
+        if not len(first) or not len(second):
+            return None
+        return {
+            'first_half': float(first.mean()),
+            'second_half': float(second.mean()),
+            'trend': float(second.mean() - first.mean()),
+        }
+
+    def group_summary(self, start=None, end=None):
+        """Per-group won, total and win rate (%) over a period range"""
+        mask = self.select(start, end)
+        won = self.won[mask].sum(axis=0)
+        total = self.total[mask].sum(axis=0)
+        return {
+            label: {'won': int(w), 'total': int(t), 'win_rate': float(w / t * 100) if t else float('nan')}
+            for label, w, t in zip(self.groups, won, total)
+        }
+
+
+def get_win_rates(dataset, grain='month', by=None):
+    """Win-rate cube of a dataset for (grain, by), built once per load"""
+    return dataset.derived(('win_rates', grain, by),
+                           lambda table: WinRateCube.build(table, grain, by))
+
+
+if __name__ == "__main__":
+    """
+    Print quarterly win rates and the win rate per ACV band
+    """
+    from dataset_session import get_dataset
+
+    dataset = get_dataset()
+    quarterly = get_win_rates(dataset, 'quarter')
+    won, total = quarterly.counts()
+    print("📈 QUARTERLY WIN RATES (closed deals by CloseDate)")
+    print("=" * 50)
+    for label, rate, w, t in zip(quarterly.labels(), quarterly.win_rates(), won, total):
+        if t:
+            print(f"{label}: {rate:5.1f}% ({w}/{t})")
+
+    print("\n💰 WIN RATE BY ACV BAND")
+    print("=" * 50)
+    for band, stats in get_win_rates(dataset, 'year', 'acv_band').group_summary().items():
+        if stats['total']:
+            print(f"{band:<12} {stats['win_rate']:5.1f}% ({stats['won']}/{stats['total']})")